@@ -0,0 +1,61 @@
+#!/usr/bin/python
+"""
+IPv4 address allocators for the nets of a network.
+
+An allocator takes a list of pairs (net name, number of hosts) and returns
+a list of pairs (network address, mask), as strings, in the same order.
+allocate_subnets gives each net the smallest subnet that fits its hosts,
+so there is no limit on the number of nets or on their size other than
+the size of the base block.
+
+>>> allocate_subnets([("Josjo1 [wifi]", 3), ("Backbone", 300)])
+[('10.0.2.0', '255.255.255.248'), ('10.0.0.0', '255.255.254.0')]
+"""
+import socket
+import struct
+
+DEFAULT_BASE = "10.0.0.0/8"
+
+def get_address_from_int(value):
+    """Return IPv4 address string from an integer."""
+    return socket.inet_ntoa(struct.pack("!I", value))
+
+def get_int_from_address(address):
+    """Return integer from an IPv4 address string."""
+    return struct.unpack("!I", socket.inet_aton(address))[0]
+
+def get_mask(prefix):
+    """Return netmask string for a prefix length (24 -> 255.255.255.0)."""
+    return get_address_from_int((0xffffffff << (32 - prefix)) & 0xffffffff)
+
+def get_prefix(hosts):
+    """Return the longest prefix of a subnet with room for hosts (at least /30)."""
+    bits = (hosts + 1).bit_length()
+    return 32 - max(bits, 2)
+
+def allocate_subnets(nets, base=DEFAULT_BASE):
+    """
+    Allocate a subnet for each pair (net name, number of hosts) inside the
+    base block ("address/prefix"). Largest subnets are allocated first, so
+    all of them are aligned without holes. Raise ValueError if they do not
+    fit in the base block.
+    """
+    base_address, base_prefix = base.split("/")
+    start = get_int_from_address(base_address)
+    end = start + (1 << (32 - int(base_prefix)))
+    prefixes = [get_prefix(hosts) for (name, hosts) in nets]
+    subnets = [None] * len(nets)
+    address = start
+    for index in sorted(range(len(nets)), key=lambda index: prefixes[index]):
+        size = 1 << (32 - prefixes[index])
+        if address + size > end:
+            raise ValueError, "Subnets do not fit in %s" % base
+        subnets[index] = (get_address_from_int(address), get_mask(prefixes[index]))
+        address += size
+    return subnets
+
+def allocate_legacy_subnets(nets):
+    """Allocate a 10.1.X.0/24 subnet for each net (up to 256 nets of 254 hosts)."""
+    if len(nets) > 256 or any(hosts > 254 for (name, hosts) in nets):
+        raise ValueError, "Too many nets or hosts for 10.1.X.0/24 subnets"
+    return [("10.1.%d.0" % index, "255.255.255.0") for index in range(len(nets))]
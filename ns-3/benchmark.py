@@ -0,0 +1,230 @@
+#!/usr/bin/python
+"""
+Benchmark report parsing and conversion on synthetic reports (see
+synthetic.generate_report) of several sizes.
+
+Each benchmark runs in its own (fresh) worker process, so the peak memory
+of one does not hide the others. The peak (maximum resident size of the
+process) is a high-water mark: setup_memory is its growth during the setup
+(e.g. parsing the report), peak_memory its growth during the benchmarked
+code on top of that (0 if it stays below the setup peak). Times are the
+best of several repetitions, and throughput is the number of items (units
+or links) per second.
+Results can be saved as a baseline (JSON) and compared with it later:
+
+>>> results = run_benchmarks(["small", "medium"])
+>>> save_baseline("baseline.json", results)
+>>> comparison = compare_results(results, load_baseline("baseline.json"))
+>>> sys.stdout.write(format_comparison(comparison))
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import tempfile
+import optparse
+import multiprocessing
+
+import radiomobile
+import synthetic
+import radiomobile_ns3_report
+
+# Options for synthetic.generate_report
+SIZES = {
+    "small": dict(nunits=100, nsystems=10, nnets=10, members=10),
+    "medium": dict(nunits=1000, nsystems=20, nnets=100, members=10),
+    "large": dict(nunits=5000, nsystems=50, nnets=500, members=20),
+}
+
+DEFAULT_SIZES = ["small", "medium", "large"]
+
+# Fraction of throughput loss (or memory increase) considered a regression
+DEFAULT_TOLERANCE = 0.2
+
+FIELDS = ["benchmark", "size", "items", "seconds", "throughput", "setup_memory",
+    "peak_memory"]
+
+def benchmark_parse_report(filename):
+    """Parse a report. Items: units."""
+    yield
+    report = radiomobile.parse_report(filename)
+    yield len(report.units)
+
+def benchmark_get_net_links(filename):
+    """Get the links of all nets of a parsed report. Items: links."""
+    report = radiomobile.parse_report(filename)
+    nets_rows = [[dict(net_members=member.net_members, quality_grid=member.quality_grid)
+        for member in net.net_members.itervalues()] for net in report.nets.itervalues()]
+    yield
+    yield sum(len(list(radiomobile.get_net_links(rows, "quality_grid", report.units)))
+        for rows in nets_rows)
+
+def benchmark_generate_simple_text_report(filename):
+    """Generate the simple text report of a parsed report. Items: units."""
+    report = radiomobile.parse_report(filename)
+    yield
+    radiomobile_ns3_report.generate_simple_text_report(report)
+    yield len(report.units)
+
+# Benchmarks are generators: setup (not timed) before the first yield,
+# then the benchmarked code, which yields the number of items processed
+BENCHMARKS = [
+    ("parse_report", benchmark_parse_report),
+    ("get_net_links", benchmark_get_net_links),
+    ("generate_simple_text_report", benchmark_generate_simple_text_report),
+]
+
+def get_peak_memory():
+    """Return the peak resident size of the process (kilobytes on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_benchmark(args):
+    """Run a benchmark on a report (worker function) and return a result dict."""
+    name, size, filename, repeat = args
+    function = dict(BENCHMARKS)[name]
+    seconds = []
+    for index in xrange(repeat):
+        initial_memory = get_peak_memory()
+        steps = function(filename)
+        steps.next()
+        setup_memory = get_peak_memory()
+        start = time.time()
+        items = steps.next()
+        seconds.append(time.time() - start)
+        if index == 0:
+            # Later repetitions run below the high-water mark of the first
+            memory = (setup_memory - initial_memory, get_peak_memory() - setup_memory)
+    best = min(seconds)
+    return dict(benchmark=name, size=size, items=items, seconds=best,
+        throughput=(items / best if best > 0 else None),
+        setup_memory=memory[0], peak_memory=memory[1])
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, repeat=3, decimal_comma=False,
+        seed=1, processes=1):
+    """
+    Run benchmarks (default: all) on synthetic reports of the given sizes
+    (see SIZES) and return a list of result dictionaries (see FIELDS).
+    """
+    names = (names or [name for (name, function) in BENCHMARKS])
+    for name in names:
+        if name not in dict(BENCHMARKS):
+            raise ValueError, "Unknown benchmark: %s" % name
+    directory = tempfile.mkdtemp()
+    try:
+        tasks = []
+        for size in sizes:
+            if size not in SIZES:
+                raise ValueError, "Unknown size: %s" % size
+            filename = os.path.join(directory, "%s.txt" % size)
+            synthetic.write_report(filename, decimal_comma=decimal_comma,
+                seed=seed, **SIZES[size])
+            tasks.extend((name, size, filename, repeat) for name in names)
+        pool = multiprocessing.Pool(processes, maxtasksperchild=1)
+        try:
+            return pool.map(run_benchmark, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        shutil.rmtree(directory)
+
+def save_baseline(filename, results):
+    """Save results as baseline (JSON)."""
+    with open(filename, "w") as fd:
+        json.dump(results, fd, indent=2, sort_keys=True)
+
+def load_baseline(filename):
+    """Return results from a baseline file."""
+    with open(filename) as fd:
+        return json.load(fd)
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results with a baseline and return a list of tuples (result,
+    throughput ratio, memory ratio, regression). Ratios are None if the
+    benchmark is not in the baseline, a regression is a ratio of throughput
+    below 1 - tolerance or of memory above 1 + tolerance.
+    """
+    def _ratio(value, reference):
+        return (float(value) / reference if value is not None and reference else None)
+    references = dict(((result["benchmark"], result["size"]), result)
+        for result in baseline)
+    comparison = []
+    for result in results:
+        reference = references.get((result["benchmark"], result["size"]), {})
+        throughput_ratio = _ratio(result["throughput"], reference.get("throughput"))
+        memory_ratio = _ratio(result["peak_memory"], reference.get("peak_memory"))
+        regression = ((throughput_ratio is not None and throughput_ratio < 1 - tolerance) or
+            (memory_ratio is not None and memory_ratio > 1 + tolerance))
+        comparison.append((result, throughput_ratio, memory_ratio, regression))
+    return comparison
+
+def format_value(value):
+    """Return string for a value (empty if missing)."""
+    if value is None:
+        return ""
+    elif isinstance(value, float):
+        return "%0.6g" % value
+    return str(value)
+
+def format_results(results):
+    """Return a tab-separated table (with header) of results."""
+    lines = ["\t".join(FIELDS)]
+    for result in results:
+        lines.append("\t".join(format_value(result[field]) for field in FIELDS))
+    return "\n".join(lines) + "\n"
+
+def format_comparison(comparison):
+    """Return a tab-separated table (with header) of a comparison with a baseline."""
+    lines = ["\t".join(FIELDS + ["throughput_ratio", "memory_ratio", "regression"])]
+    for result, throughput_ratio, memory_ratio, regression in comparison:
+        values = [result[field] for field in FIELDS] + \
+            [throughput_ratio, memory_ratio, ("yes" if regression else "")]
+        lines.append("\t".join(map(format_value, values)))
+    return "\n".join(lines) + "\n"
+
+def main(args):
+    usage = """Usage: %prog [OPTIONS]
+
+    Benchmark parsing and conversion of synthetic reports and (optionally)
+    compare the results with a baseline.
+
+    Sizes: """ + ", ".join("%s (%d units)" % (size, SIZES[size]["nunits"])
+        for size in DEFAULT_SIZES) + """
+    Benchmarks: """ + ", ".join(name for (name, function) in BENCHMARKS)
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-s', '--sizes', dest='sizes', default=",".join(DEFAULT_SIZES),
+        help='Comma-separated sizes')
+    parser.add_option('-b', '--benchmarks', dest='benchmarks', default=None,
+        help='Comma-separated benchmarks (default: all)')
+    parser.add_option('-n', '--repeat', dest='repeat', type='int', default=3,
+        help='Repetitions of each benchmark (best time is used)')
+    parser.add_option('-c', '--decimal-comma', dest='decimal_comma',
+        action='store_true', default=False, help='Use localized (decimal comma) reports')
+    parser.add_option('-w', '--save-baseline', dest='save', metavar='FILE',
+        help='Save results as baseline to FILE')
+    parser.add_option('-r', '--compare', dest='compare', metavar='FILE',
+        help='Compare results with baseline FILE')
+    parser.add_option('-t', '--tolerance', dest='tolerance', type='float',
+        default=DEFAULT_TOLERANCE, help='Fraction considered a regression')
+    options, args = parser.parse_args(args)
+    if args:
+        parser.print_help()
+        return 2
+    names = (options.benchmarks.split(",") if options.benchmarks else None)
+    results = run_benchmarks(options.sizes.split(","), names, options.repeat,
+        options.decimal_comma)
+    if options.save:
+        save_baseline(options.save, results)
+    if options.compare:
+        comparison = compare_results(results, load_baseline(options.compare),
+            options.tolerance)
+        sys.stdout.write(format_comparison(comparison))
+        return (1 if any(regression for (r, t, m, regression) in comparison) else 0)
+    sys.stdout.write(format_results(results))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+#!/usr/bin/python
+"""
+Metrics and summaries of ns-3 flow statistics.
+
+Flows are dictionaries with the raw counters of a FlowMonitor flow (see
+radiomobile_ns3.get_flow_stats): flow_id, source, destination, protocol,
+source_port, destination_port, source_net, destination_net, tx_packets,
+rx_packets, tx_bytes, rx_bytes, delay_sum, jitter_sum (seconds),
+first_tx and last_rx (seconds). This module has no dependency on ns-3.
+
+>>> flows = map(get_flow_metrics, radiomobile_ns3.get_flow_stats(network))
+>>> write_summary("summary.json", flows)
+"""
+import csv
+import json
+import StringIO
+
+FLOW_FIELDS = ["flow_id", "source", "destination", "protocol",
+    "source_port", "destination_port", "source_net", "destination_net",
+    "tx_packets", "rx_packets", "tx_bytes", "rx_bytes",
+    "throughput", "delay", "jitter", "loss"]
+
+NET_FIELDS = ["net", "flows", "tx_packets", "rx_packets", "tx_bytes",
+    "rx_bytes", "throughput", "delay", "jitter", "loss"]
+
+def get_ratio(numerator, denominator):
+    """Return numerator/denominator as float (None if denominator is 0)."""
+    return (float(numerator) / denominator if denominator else None)
+
+def get_flow_metrics(flow):
+    """
+    Return a copy of a flow with metrics: throughput (received bits per
+    second), delay and jitter (mean, seconds) and loss (lost packets ratio).
+    """
+    metrics = dict(flow)
+    metrics["throughput"] = get_ratio(8 * flow["rx_bytes"],
+        flow["last_rx"] - flow["first_tx"]) or 0.0
+    metrics["delay"] = get_ratio(flow["delay_sum"], flow["rx_packets"])
+    metrics["jitter"] = get_ratio(flow["jitter_sum"], max(flow["rx_packets"] - 1, 0))
+    metrics["loss"] = get_ratio(flow["tx_packets"] - flow["rx_packets"],
+        flow["tx_packets"])
+    return metrics
+
+def summarize_flows(flows, key=None):
+    """
+    Aggregate flows (with metrics) by key (a function of the flow, None to
+    aggregate all of them) and return a list of dictionaries with NET_FIELDS
+    (net is the key). Throughput is the sum of the flows, delay and jitter
+    are averaged over the received packets.
+    """
+    groups = {}
+    for flow in flows:
+        group_key = (key(flow) if key else None)
+        groups.setdefault(group_key, []).append(flow)
+    summaries = []
+    for group_key in sorted(groups):
+        group = groups[group_key]
+        total = lambda field: sum(flow[field] for flow in group)
+        rx_packets, tx_packets = total("rx_packets"), total("tx_packets")
+        summaries.append({
+            "net": group_key,
+            "flows": len(group),
+            "tx_packets": tx_packets,
+            "rx_packets": rx_packets,
+            "tx_bytes": total("tx_bytes"),
+            "rx_bytes": total("rx_bytes"),
+            "throughput": total("throughput"),
+            "delay": get_ratio(total("delay_sum"), rx_packets),
+            "jitter": get_ratio(total("jitter_sum"),
+                sum(max(flow["rx_packets"] - 1, 0) for flow in group)),
+            "loss": get_ratio(tx_packets - rx_packets, tx_packets),
+        })
+    return summaries
+
+def summarize_nets(flows):
+    """Aggregate flows (with metrics) by the net of their source."""
+    return summarize_flows(flows, lambda flow: flow["source_net"])
+
+def format_csv(rows, fields):
+    """Return CSV string (with header) of rows (dictionaries)."""
+    output = StringIO.StringIO()
+    writer = csv.DictWriter(output, fields, extrasaction="ignore",
+        lineterminator="\n")
+    writer.writerow(dict(zip(fields, fields)))
+    for row in rows:
+        writer.writerow(dict((key, ("" if value is None else value))
+            for (key, value) in row.iteritems()))
+    return output.getvalue()
+
+def format_json(flows):
+    """Return JSON string with flows, nets summaries and total summary."""
+    summary = {
+        "flows": [dict((field, flow.get(field)) for field in FLOW_FIELDS)
+            for flow in flows],
+        "nets": summarize_nets(flows),
+        "total": summarize_flows(flows)[0] if flows else None,
+    }
+    return json.dumps(summary, indent=1, sort_keys=True)
+
+def write_summary(filename, flows):
+    """
+    Write summary of flows (with metrics) to filename: JSON if the
+    extension is .json, otherwise CSV (flows, a blank line and nets).
+    """
+    if filename.lower().endswith(".json"):
+        output = format_json(flows) + "\n"
+    else:
+        output = format_csv(flows, FLOW_FIELDS) + "\n" + \
+            format_csv(summarize_nets(flows), NET_FIELDS)
+    with open(filename, "w") as fd:
+        fd.write(output)
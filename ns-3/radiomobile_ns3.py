@@ -1,11 +1,27 @@
 import sys
+import time
+import itertools
 import ns3
 from pprint import pprint
 
 import radiomobile
+import reportcache
+import linkbudget
+import addressing
+import routing
+import profiling
 
 verbose_level = 0
 
+# Frequency (MHz) used to compute path losses
+DEFAULT_FREQUENCY = 2400.0
+
+DEFAULT_RATE_MANAGER = "ns3::AarfWifiManager"
+
+# CCA (mode 1) threshold below the energy detection threshold (dB), as in
+# the defaults of YansWifiPhy (-96 and -99 dBm)
+CCA_THRESHOLD_MARGIN = 3.0
+
 class Struct:
     """Struct/record-like class."""
     def __init__(self, _name, **entries):
@@ -36,89 +52,374 @@ def add_devices_to_node(network, ns3node_to_node, nodes, devices, phy_helper):
             interfaces=[])
         node.devices[system] = device
 
-def add_interfaces_to_device(network, ns3node_to_node, nodes, interfaces):
-    """Add new devices to node.devices[system].interfaces list."""
+def add_interfaces_to_device(network, ns3node_to_node, nodes, interfaces, 
+        addresses):
+    """
+    Add new devices to node.devices[system].interfaces list and to the 
+    addresses dictionary {(node name, net name): address}.
+    """
     for index in range(interfaces.GetN()):
         address = interfaces.GetAddress(index)
         ns3_node = (nodes if type(nodes) == ns3.Node else nodes.Get(index))
         node = ns3node_to_node[ns3_node.GetId()]
         system = network.net_members[node.name].system
-        interface = Struct("Interface", address=address) 
+        interface = Struct("Interface", address=address, net=network.name) 
         node.devices[system].interfaces.append(interface)
+        addresses[(node.name, network.name)] = address
+
+def get_units_positions(units):
+    """
+    Return list of (x, y, z) positions (meters, float) for units: x/y are
+    relative to the first unit (flat-earth, computed in one batch) and z is
+    the elevation.
+    """
+    if not units:
+        return []
+    coords = [unit.location_coords for unit in units.itervalues()]
+    reference = radiomobile.get_reference(coords[0])
+    positions = radiomobile.get_positions_from_reference(coords, reference, as_float=True)
+    return [(x, y, float(unit.elevation)) for ((x, y), unit) in 
+        zip(positions.tolist(), units.itervalues())]
+
+def install_mobility(report, nodes):
+    """Install constant-position mobility models for all units."""
+    allocator = ns3.ListPositionAllocator()
+    container = ns3.NodeContainer()
+    for name, (x, y, z) in zip(report.units.keys(), get_units_positions(report.units)):
+        allocator.Add(ns3.Vector(x, y, z))
+        container.Add(nodes[name].ns3_node)
+    mobility = ns3.MobilityHelper()
+    mobility.SetPositionAllocator(allocator)
+    mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel")
+    mobility.Install(container)
+
+def get_net_losses(report, network, frequency=None, rmap=None, source="links"):
+    """
+    Return dictionary {(name1, name2): path loss (dB)} for pairs of members
+    of a net. Source "links" uses the links of the report (and their 
+    distances), "pathloss" evaluates all pairs of members. Losses are
+    calculated with linkbudget, over the terrain of rmap (see
+    mapfile.open_map) if given or over straight terrain otherwise, at 
+    frequency (MHz, default: centre of the band of the net or 
+    DEFAULT_FREQUENCY if unknown).
+    """
+    if source == "links":
+        pairs = [link.peers for link in network.links]
+        distances = [link.distance for link in network.links]
+    elif source == "pathloss":
+        pairs = list(itertools.combinations(network.net_members.keys(), 2))
+        distances = None
+    else:
+        raise ValueError, "Unknown propagation loss source: %s" % source
+    if not pairs:
+        return {}
+    units, members = report.units, network.net_members
+    names1, names2 = zip(*pairs)
+    coords1 = [units[name].location_coords for name in names1]
+    coords2 = [units[name].location_coords for name in names2]
+    heights1 = [members[name].antenna for name in names1]
+    heights2 = [members[name].antenna for name in names2]
+    if rmap is not None:
+        profiles = linkbudget.get_terrain_profiles(rmap, coords1, coords2)
+    else:
+        if distances is None:
+            distances = radiomobile.get_distances(coords1, coords2)
+        profiles = linkbudget.get_flat_profiles(
+            [units[name].elevation for name in names1],
+            [units[name].elevation for name in names2], distances)
+    if frequency is None:
+        frequency = linkbudget.get_net_frequency(network, DEFAULT_FREQUENCY)
+    losses = linkbudget.get_path_losses(profiles, heights1, heights2, frequency)
+    return dict(zip(pairs, losses.path_loss.tolist()))
+
+def set_net_losses(loss_model, nodes, losses):
+    """Set (symmetric) losses in a MatrixPropagationLossModel."""
+    mobility_type = ns3.MobilityModel.GetTypeId()
+    for (name1, name2), loss in losses.iteritems():
+        mobility1 = nodes[name1].ns3_node.GetObject(mobility_type)
+        mobility2 = nodes[name2].ns3_node.GetObject(mobility_type)
+        loss_model.SetLoss(mobility1, mobility2, loss, True)
+
+def set_devices_power(report, network, nodes):
+    """
+    Set power, gain (antenna gain minus losses) and receiver threshold (as
+    energy detection threshold, CCA threshold CCA_THRESHOLD_MARGIN below it)
+    of the PHY of the devices of net members from their systems, as in the
+    link budget.
+    """
+    for name, member in network.net_members.iteritems():
+        if member.system not in nodes[name].devices:
+            continue
+        params = linkbudget.get_system_params(report.systems[member.system])
+        tx_power, loss, gain, rx_threshold = params
+        phy = nodes[name].devices[member.system].ns3_device.GetPhy()
+        phy.SetAttribute("TxPowerStart", ns3.DoubleValue(tx_power))
+        phy.SetAttribute("TxPowerEnd", ns3.DoubleValue(tx_power))
+        phy.SetAttribute("TxGain", ns3.DoubleValue(gain - loss))
+        phy.SetAttribute("RxGain", ns3.DoubleValue(gain - loss))
+        phy.SetAttribute("EnergyDetectionThreshold", ns3.DoubleValue(rx_threshold))
+        phy.SetAttribute("CcaMode1Threshold",
+            ns3.DoubleValue(rx_threshold - CCA_THRESHOLD_MARGIN))
+
+def install_flow_monitor(network):
+    """Install a FlowMonitor in all the nodes of a network (network.flow_monitor)."""
+    helper = ns3.FlowMonitorHelper()
+    monitor = helper.InstallAll()
+    network.flow_monitor = Struct("FlowMonitor", helper=helper, monitor=monitor)
+    return monitor
+
+def get_node_address(node):
+    """Return the first address of a node (devices sorted by system name)."""
+    for system in sorted(node.devices):
+        if node.devices[system].interfaces:
+            return node.devices[system].interfaces[0].address
+    raise ValueError, "Node has no addresses: %s" % node.name
+
+def get_addresses(network):
+    """Return dictionary {address string: (node name, net name)}."""
+    return dict((str(interface.address), (name, interface.net))
+        for (name, node) in network.nodes.iteritems()
+        for device in node.devices.itervalues()
+        for interface in device.interfaces)
+
+def get_flow_stats(network):
+    """
+    Return list of flow dictionaries (see flowstats) with the counters of
+    the FlowMonitor of a network (see install_flow_monitor).
+    """
+    helper, monitor = network.flow_monitor.helper, network.flow_monitor.monitor
+    monitor.CheckForLostPackets()
+    classifier = helper.GetClassifier()
+    addresses = get_addresses(network)
+    flows = []
+    for flow_id, stats in monitor.GetFlowStats():
+        five_tuple = classifier.FindFlow(flow_id)
+        source, destination = map(str, 
+            [five_tuple.sourceAddress, five_tuple.destinationAddress])
+        flows.append({
+            "flow_id": flow_id,
+            "source": source,
+            "destination": destination,
+            "protocol": five_tuple.protocol,
+            "source_port": five_tuple.sourcePort,
+            "destination_port": five_tuple.destinationPort,
+            "source_net": addresses.get(source, (None, None))[1],
+            "destination_net": addresses.get(destination, (None, None))[1],
+            "tx_packets": stats.txPackets,
+            "rx_packets": stats.rxPackets,
+            "tx_bytes": stats.txBytes,
+            "rx_bytes": stats.rxBytes,
+            "delay_sum": stats.delaySum.GetSeconds(),
+            "jitter_sum": stats.jitterSum.GetSeconds(),
+            "first_tx": stats.timeFirstTxPacket.GetSeconds(),
+            "last_rx": stats.timeLastRxPacket.GetSeconds(),
+        })
+    return flows
+
+def enable_pcap(network, name, system, prefix):
+    """Enable pcap tracing of the device of a node (for a system)."""
+    device = network.nodes[name].devices[system]
+    device.phy_helper.EnablePcap(prefix, device.ns3_device)
+
+def get_subnets(report, allocator):
+    """
+    Return list of Subnet structs (name, ap, terminals, address, mask) for
+    the nets with a Node, with addresses from allocator (see addressing).
+    """
+    nets = []
+    for name, network in report.nets.iteritems():
+        node_members = radiomobile.get_units_for_network(network, "Node")
+        if node_members:
+            terminals = radiomobile.get_units_for_network(network, "Terminal")
+            nets.append((name, node_members[0], terminals))
+    allocations = allocator([(name, 1 + len(terminals)) 
+        for (name, ap, terminals) in nets])
+    return [Struct("Subnet", name=name, ap=ap, terminals=terminals, 
+            address=address, mask=mask)
+        for ((name, ap, terminals), (address, mask)) in zip(nets, allocations)]
+
+def install_static_routes(network, routes):
+    """Add routes (see routing.get_routes) to the static routing of nodes."""
+    helper = ns3.Ipv4StaticRoutingHelper()
+    ipv4_type = ns3.Ipv4.GetTypeId()
+    subnets = network.subnets
+    for name, (default, node_routes) in routes.iteritems():
+        ipv4 = network.nodes[name].ns3_node.GetObject(ipv4_type)
+        static_routing = helper.GetStaticRouting(ipv4)
+        def _get_gateway(next_hop, via):
+            net = subnets[via].name
+            interface = ipv4.GetInterfaceForAddress(network.addresses[(name, net)])
+            return network.addresses[(next_hop, net)], interface
+        for target, next_hop, via in node_routes:
+            gateway, interface = _get_gateway(next_hop, via)
+            static_routing.AddNetworkRouteTo(ns3.Ipv4Address(subnets[target].address),
+                ns3.Ipv4Mask(subnets[target].mask), gateway, interface)
+        if default:
+            gateway, interface = _get_gateway(*default)
+            static_routing.SetDefaultRoute(gateway, interface)
 
-def create_network_from_report_file(filename):
+def create_network_from_report_file(filename, **kwargs):
     """Create a network Struct from a RadioMobile text-report filename."""
-    report = radiomobile.parse_report(filename)
-    return create_network(report) 
+    report = reportcache.parse_report(filename)
+    return create_network(report, **kwargs) 
+
+# Roles of the access point of a net
+AP_ROLES = ["Node", "Master"]
+
+def get_channel_key(network):
+    """
+    Return the key of the wifi channel of a net: its band (frequency_range)
+    and the system of its access point (first member with a role in
+    AP_ROLES, or first member). Nets with the same key share a channel (and
+    its PHY helper), so they interfere with each other. Nets with an unknown
+    band get a channel of their own (the key is their name).
+    """
+    frequency_range = getattr(network, "frequency_range", None)
+    if not frequency_range:
+        return network.name
+    members = network.net_members.values()
+    aps = ([member for member in members if member.role in AP_ROLES] or members)
+    return (tuple(frequency_range), (aps[0].system if aps else None))
+
+def create_network(report, channel_key=get_channel_key, propagation=None,
+        frequency=None, rmap=None, rate_manager=DEFAULT_RATE_MANAGER,
+        allocator=addressing.allocate_subnets, routing_mode="global", 
+        routing_root=None):
+    """
+    Create a network Struct from a RadioMobile parsed text report. The time
+    spent building it (seconds) is stored in build_time.
+    
+    By default channels use the log-distance propagation loss model. With
+    propagation set to a source of get_net_losses ("links" or "pathloss"),
+    each channel gets a MatrixPropagationLossModel filled with the path
+    losses of its nets (other pairs of nodes cannot reach each other) and
+    the PHYs use the power and gains of their systems. Path losses are
+    computed at frequency (MHz) or, if not given, at the centre of the band
+    of each net.
+
+    All the wifi devices use the rate_manager remote station manager.
 
-def create_network(report):
-    """Create a network Struct from a RadioMobile parsed text report."""
+    The allocator (see addressing) assigns a subnet to each net. Routing
+    is set up by the global routing of ns-3 (routing_mode="global") or with
+    static routes computed from the graph of nets (routing_mode "static" 
+    or "hierarchical", with routing_root as root, see routing.get_routes).
+    Static routes take quadratic time in the number of nets; use
+    "hierarchical" for large topologies.
+
+    The stages are timed with profiling (see profiling.enable).
+    """
+    start = time.time()
+    with profiling.timer("create_network"):
+        result = _create_network(report, channel_key, propagation, frequency,
+            rmap, rate_manager, allocator, routing_mode, routing_root)
+    result.build_time = time.time() - start
+    debug("Network built in %0.3fs (%d nodes, %d channels)" % 
+        (result.build_time, len(result.nodes), result.channels))
+    return result
+
+def _create_network(report, channel_key, propagation, frequency, rmap,
+        rate_manager, allocator, routing_mode, routing_root):
+    """Build the network Struct (see create_network)."""
     nodes = {}
-    for name, attrs in report.units.iteritems():
-        node = Struct("Node", name=name, ns3_node=ns3.Node(), devices={})
-        nodes[name] = node
+    all_nodes = ns3.NodeContainer()
+    with profiling.timer("create_nodes"):
+        for name, attrs in report.units.iteritems():
+            node = Struct("Node", name=name, ns3_node=ns3.Node(), devices={})
+            nodes[name] = node
+            all_nodes.Add(node.ns3_node)
+    profiling.count("nodes", len(nodes))
     ns3node_to_node = dict((node.ns3_node.GetId(), node) for node in nodes.values())
 
     # Internet stack
-    stack = ns3.InternetStackHelper()
-    for name, node in nodes.iteritems():
-        stack.Install(node.ns3_node)
+    with profiling.timer("install_internet_stack"):
+        stack = ns3.InternetStackHelper()
+        stack.Install(all_nodes)
     
-    for net_index, (name, network) in enumerate(report.nets.iteritems()):
-        node_members = radiomobile.get_units_for_network(network, "Node")
-        if not node_members:
-            continue        
-        node_member = node_members[0]
-        terminal_members = radiomobile.get_units_for_network(network, "Terminal")
-        ap_node = nodes[node_member].ns3_node
+    # Mobility (all units at once)
+    with profiling.timer("install_mobility"):
+        install_mobility(report, nodes)
+    
+    # Helpers shared by all nets (one PHY helper for each channel)
+    channel_helper = ns3.YansWifiChannelHelper.Default()
+    phys = {}
+    loss_models = {}
+    wifi = ns3.WifiHelper.Default()
+    wifi.SetRemoteStationManager(rate_manager)
+    sta_mac = ns3.NqosWifiMacHelper.Default()
+    ap_mac = ns3.NqosWifiMacHelper.Default()
+    address = ns3.Ipv4AddressHelper()
+    with profiling.timer("get_subnets"):
+        subnets = get_subnets(report, allocator)
+    profiling.count("subnets", len(subnets))
+    addresses = {}
+    
+    for net_index, subnet in enumerate(subnets):
+        network = report.nets[subnet.name]
+        ap_node = nodes[subnet.ap].ns3_node
         sta_nodes = ns3.NodeContainer()            
         debug("Add network '%s'\n  ap_node = '%s'\n  sta_nodes = %s" % 
-            (name, node_member, terminal_members))
-        for name in terminal_members:
+            (subnet.name, subnet.ap, subnet.terminals))
+        for name in subnet.terminals:
             sta_nodes.Add(nodes[name].ns3_node)
                     
         # Wifi channel
-        channel = ns3.YansWifiChannelHelper.Default()
-        phy = ns3.YansWifiPhyHelper.Default()
-        phy.SetChannel(channel.Create())
-
-        # STA devices
-        wifi = ns3.WifiHelper.Default()
-        wifi.SetRemoteStationManager("ns3::AarfWifiManager")
-        mac = ns3.NqosWifiMacHelper.Default()
-        ssid = ns3.Ssid("ns-3-ssid")
-        mac.SetType("ns3::NqstaWifiMac", 
-            "Ssid", ns3.SsidValue(ssid),
-            "ActiveProbing", ns3.BooleanValue(False))
-        sta_devices = wifi.Install(phy, mac, sta_nodes)
-        add_devices_to_node(network, ns3node_to_node, sta_nodes, sta_devices, phy)
+        key = channel_key(network)
+        if key not in phys:
+            with profiling.timer("create_channels"):
+                channel = channel_helper.Create()
+                if propagation:
+                    loss_models[key] = ns3.MatrixPropagationLossModel()
+                    channel.SetPropagationLossModel(loss_models[key])
+                phy = ns3.YansWifiPhyHelper.Default()
+                phy.SetChannel(channel)
+                phys[key] = phy
+        phy = phys[key]
+        if propagation:
+            with profiling.timer("set_net_losses"):
+                losses = get_net_losses(report, network, frequency, rmap, propagation)
+                set_net_losses(loss_models[key], nodes, losses)
+
+        # STA devices (each net has its own SSID, as channels may be shared)
+        ssid = ns3.Ssid("ns-3-ssid-%d" % net_index)
+        with profiling.timer("install_sta_devices"):
+            sta_mac.SetType("ns3::NqstaWifiMac", 
+                "Ssid", ns3.SsidValue(ssid),
+                "ActiveProbing", ns3.BooleanValue(False))
+            sta_devices = wifi.Install(phy, sta_mac, sta_nodes)
+            add_devices_to_node(network, ns3node_to_node, sta_nodes, sta_devices, phy)
 
         # AP devices
-        mac = ns3.NqosWifiMacHelper.Default()
-        mac.SetType ("ns3::NqapWifiMac", 
-            "Ssid", ns3.SsidValue(ssid),
-            "BeaconGeneration", ns3.BooleanValue(True),
-            "BeaconInterval", ns3.TimeValue(ns3.Seconds(2.5)))
-        ap_devices = wifi.Install(phy, mac, ap_node)
-        add_devices_to_node(network, ns3node_to_node, ap_node, ap_devices, phy)
+        with profiling.timer("install_ap_devices"):
+            ap_mac.SetType ("ns3::NqapWifiMac", 
+                "Ssid", ns3.SsidValue(ssid),
+                "BeaconGeneration", ns3.BooleanValue(True),
+                "BeaconInterval", ns3.TimeValue(ns3.Seconds(2.5)))
+            ap_devices = wifi.Install(phy, ap_mac, ap_node)
+            add_devices_to_node(network, ns3node_to_node, ap_node, ap_devices, phy)
+        profiling.count("devices", sta_devices.GetN() + ap_devices.GetN())
         
         # Set IP addresses
-        address = ns3.Ipv4AddressHelper()
-        netaddr = "10.1.%d.0" % net_index
-        address.SetBase(ns3.Ipv4Address(netaddr), ns3.Ipv4Mask("255.255.255.0"))
-        ap_interfaces = address.Assign(ap_devices)
-        sta_interfaces = address.Assign(sta_devices)
-        add_interfaces_to_device(network, ns3node_to_node, ap_node, ap_interfaces)
-        add_interfaces_to_device(network, ns3node_to_node, sta_nodes, sta_interfaces)
-
-        # Mobility
-        mobility = ns3.MobilityHelper()
-        mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel")
-        mobility.Install(ap_node)
-        
-        mobility = ns3.MobilityHelper()
-        mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel")
-        mobility.Install(sta_nodes)
+        with profiling.timer("assign_addresses"):
+            address.SetBase(ns3.Ipv4Address(subnet.address), ns3.Ipv4Mask(subnet.mask))
+            ap_interfaces = address.Assign(ap_devices)
+            sta_interfaces = address.Assign(sta_devices)
+            add_interfaces_to_device(network, ns3node_to_node, ap_node, 
+                ap_interfaces, addresses)
+            add_interfaces_to_device(network, ns3node_to_node, sta_nodes, 
+                sta_interfaces, addresses)
+        if propagation:
+            with profiling.timer("set_devices_power"):
+                set_devices_power(report, network, nodes)
+    profiling.count("channels", len(phys))
     
-    ns3.Ipv4GlobalRoutingHelper.PopulateRoutingTables()
-    return Struct("Network", nodes=nodes)
+    result = Struct("Network", nodes=nodes, subnets=subnets, addresses=addresses,
+        channels=len(phys))
+    if routing_mode == "global":
+        with profiling.timer("populate_routing_tables"):
+            ns3.Ipv4GlobalRoutingHelper.PopulateRoutingTables()
+    else:
+        with profiling.timer("install_static_routes"):
+            nets = [(subnet.name, [subnet.ap] + subnet.terminals) for subnet in subnets]
+            routes = routing.get_routes(nets, routing_mode, routing_root)
+            install_static_routes(result, routes)
+    return result
@@ -39,17 +39,37 @@ Node	Role	Distance to BS  Mode
 Josjojauarina 2	BS	0   wimax-
 Ccatcca	SS	15620   wimax-all
 Kcauri	SS	15670   wimax-qpsk3/4
+
+The same information can be written as JSON or CSV (see FORMATS). Reports
+are written chunk by chunk as they are generated (see write_simple_report),
+so the whole output is never kept in memory.
 """
 import os
 import re
+import csv
 import sys
+import json
 import math
+import optparse
+import StringIO
+import functools
 import itertools
 from datetime import datetime
 import pprint
 
 import radiomobile
+import reportcache
+import batch
+import profiling
       
+def iter_output_from_sections(sections):
+    """Yield the chunks of build_output_from_sections, without joining them."""
+    for index, (name, lines) in enumerate(sections):
+        yield ("\n\n" if index > 0 else "") + "= %s" % name
+        for line in lines:
+            yield "\n" + line
+    yield "\n"
+
 def build_output_from_sections(sections):
     """Build a string from list of sections with tuple (title, lines). Output is:
         
@@ -61,18 +81,8 @@ def build_output_from_sections(sections):
     = section2 title
     [...]
     """
-    def _section(name, lines):
-        return ["= %s" % name, ""] + list(lines)
-    sections_output = ("\n".join(_section(name, lines)) for (name, lines) in sections)
-    return "\n\n".join(sections_output) + "\n"
-
-def join_list(lstlst, joinval):
-    """Join list of list with a join value and return a 1-level flattened list."""
-    for index, lst in enumerate(lstlst):
-        for x in lst:
-            yield x
-        if index < len(lstlst)-1:
-            yield joinval 
+    return "".join(iter_output_from_sections((name, [""] + list(lines))
+        for (name, lines) in sections))
 
 def get_ns3_mode(member_short_mode): 
     """Return mode in netinfo format."""
@@ -94,54 +104,48 @@ def get_ns3_mode(member_short_mode):
         return wimax_equivalences[short_mode.lower()]
     else:
         raise ValueError, "Standards allowed: WF (wifi), WX (wimax)"
-        
-def generate_simple_text_report(report):
-    """Return string containing a simple text report from Radiomobile report."""        
-    sections = []
-    
-    # General information
+
+ROLES_TABLE = {
+    "wifi": {
+        "Master": "AP",
+        "Node": "AP",
+        "Slave": "STA",
+        "Terminal": "STA",
+    },
+    "wimax": {
+        "Master": "BS",
+        "Node": "BS",
+        "Slave": "SS",
+        "Terminal": "SS",                
+    }            
+}
+
+CSV_FIELDS = ["net", "mode", "node", "role", "distance", "node_mode",
+    "elevation", "latitude", "longitude", "x", "y"]
+
+def get_general_information(report):
+    """Return list of pairs (key, value) with the general information."""
     netfile = re.match(r"Net file\s+.*\\(.*)$", report.general_information[0]).group(1)
-    information = []
-    information.append("Netfile: %s" % netfile)
-    generated = report.generated_on.isoformat()
-    information.append("Generated: %s" % generated)
-    
-    sections.append(["General information", information])
-    
-    # Nodes
-    nodes = []
+    return [("Netfile", netfile), ("Generated", report.generated_on.isoformat())]
+
+def iter_nodes(report):
+    """Yield a dictionary (name, elevation, coordinates, position) for each unit."""
     for name, unit in report.units.iteritems():
-        coords = ",".join(["%0.5f" % x for x in unit.location_coords])
-        position = ",".join(map(str, unit.location_meters))
-        nodes.append("\t".join([name, str(unit.elevation), coords, position]))
-    sections.append(["Nodes", nodes])               
-
-    # Active networks
-    roles_table = {
-        "wifi": {
-            "Master": "AP",
-            "Node": "AP",
-            "Slave": "STA",
-            "Terminal": "STA",
-        },
-        "wimax": {
-            "Master": "BS",
-            "Node": "BS",
-            "Slave": "SS",
-            "Terminal": "SS",                
-        }            
-    }
-    
-    nets = []
+        yield dict(name=name, elevation=unit.elevation,
+            coordinates=unit.location_coords, position=unit.location_meters)
+
+def iter_nets(report):
+    """
+    Yield a dictionary (name, mode, master_role, members) for each net. Members
+    are dictionaries (node, role, distance to master, mode).
+    """
     for complete_name, attrs in report.nets.iteritems():
         match = re.match("^(.*?)\s*\[(.*)\]$", complete_name)
         if not match:
             raise ValueError, "Wrong name for network. Expected: 'Netname [ns3linkname]'"
-        name, options = match.groups()
-        mode = options        
-        net = []
-        net.extend(["== " + name, ""])
-        net.extend(["Mode: %s" % mode, ""])
+        name, mode = match.groups()
+        if mode not in ROLES_TABLE:
+            raise ValueError, "Known modes are 'wifi' and 'wimax': %s" % mode
         masters = radiomobile.get_units_for_network(attrs, 'Master') + \
          radiomobile.get_units_for_network(attrs, 'Nodes')
         assert (len(masters) == 1), "Need one and only one master/node in a network"
@@ -149,43 +153,144 @@ def generate_simple_text_report(report):
         slaves = radiomobile.get_units_for_network(attrs, 'Slave') + \
             radiomobile.get_units_for_network(attrs, 'Terminal')
         assert (len(slaves) >= 1), "Need at least one slave/terminal in a network"
-        master_name = roles_table[mode]["Master"]
-        net.append("\t".join(["Node", "Role", "Distance to %s" % master_name, "Mode"]))
-        master_location = report.units[master].location
+        roles = ROLES_TABLE[mode]
+        master_coords = report.units[master].location_coords
+        members = []
         for member_name, member_attrs in attrs.net_members.iteritems():
             if member_name not in report.units:
                 raise ValueError, "Member of net not found in units: %s" % member_name
-            member_location = report.units[member_name].location
             if member_name != master:
-                distance = radiomobile.get_distance_between_locations(
-                    master_location, member_location)
+                distance = radiomobile.get_distance(master_coords,
+                    report.units[member_name].location_coords)
             else:
                 distance = 0            
-            if mode not in roles_table:
-                raise ValueError, "Known modes are 'wifi' and 'wimax': %s" % mode
-            roles = roles_table[mode]
             member_short_mode = member_attrs.system.split(" - ")[-1]
-            member_info = [
-                member_name, 
-                roles[member_attrs.role], 
-                str(distance),
-                get_ns3_mode(member_short_mode),
-            ]
-            net.append("\t".join(member_info))
-        nets.append(net)
-    sections.append(["Nets", join_list(nets, "")])
-
-    return build_output_from_sections(sections)   
-          
-  
+            members.append(dict(node=member_name, role=roles[member_attrs.role],
+                distance=distance, mode=get_ns3_mode(member_short_mode)))
+        yield dict(name=name, mode=mode, master_role=roles["Master"], members=members)
+
+def iter_simple_text_report(report):
+    """Yield the chunks of the simple text report (see generate_simple_text_report)."""
+    def _iter_nodes():
+        for node in iter_nodes(report):
+            coords = ",".join(["%0.5f" % x for x in node["coordinates"]])
+            position = ",".join(map(str, node["position"]))
+            yield "\t".join([node["name"], str(node["elevation"]), coords, position])
+    def _iter_nets():
+        for index, net in enumerate(iter_nets(report)):
+            if index > 0:
+                yield ""
+            for line in ["== " + net["name"], "", "Mode: %s" % net["mode"], "",
+                    "\t".join(["Node", "Role", "Distance to %s" % net["master_role"], "Mode"])]:
+                yield line
+            for member in net["members"]:
+                yield "\t".join([member["node"], member["role"],
+                    str(member["distance"]), member["mode"]])
+    sections = [
+        ("General information", ["%s: %s" % pair for pair in get_general_information(report)]),
+        ("Nodes", _iter_nodes()),
+        ("Nets", _iter_nets()),
+    ]
+    return iter_output_from_sections((name, itertools.chain([""], lines))
+        for (name, lines) in sections)
+
+def iter_simple_json_report(report):
+    """
+    Yield the chunks of a JSON object with the information of the simple
+    text report: general_information, nodes and nets (see iter_nodes and
+    iter_nets). Nodes and nets are encoded one at a time.
+    """
+    yield '{"general_information": %s' % json.dumps(
+        dict(get_general_information(report)), sort_keys=True)
+    for key, iterator in [("nodes", iter_nodes(report)), ("nets", iter_nets(report))]:
+        yield ', "%s": [' % key
+        for index, item in enumerate(iterator):
+            yield ("\n  " if index == 0 else ",\n  ") + json.dumps(item, sort_keys=True)
+        yield "]"
+    yield "}\n"
+
+def iter_simple_csv_report(report):
+    """Yield the CSV lines (see CSV_FIELDS) of all members of all nets."""
+    output = StringIO.StringIO()
+    writer = csv.DictWriter(output, CSV_FIELDS, lineterminator="\n")
+    def _flush():
+        value = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return value
+    writer.writerow(dict(zip(CSV_FIELDS, CSV_FIELDS)))
+    yield _flush()
+    for net in iter_nets(report):
+        for member in net["members"]:
+            unit = report.units[member["node"]]
+            (latitude, longitude), (x, y) = unit.location_coords, unit.location_meters
+            writer.writerow(dict(net=net["name"], mode=net["mode"],
+                node=member["node"], role=member["role"], distance=member["distance"],
+                node_mode=member["mode"], elevation=unit.elevation,
+                latitude="%0.5f" % latitude, longitude="%0.5f" % longitude, x=x, y=y))
+            yield _flush()
+
+# Output formats: (report iterator, extension in batch mode)
+FORMATS = {
+    "text": (iter_simple_text_report, ".netinfo.txt"),
+    "json": (iter_simple_json_report, ".netinfo.json"),
+    "csv": (iter_simple_csv_report, ".netinfo.csv"),
+}
+
+def generate_simple_text_report(report):
+    """Return string containing a simple text report from Radiomobile report."""        
+    return "".join(iter_simple_text_report(report))
+
+def write_simple_report(report, fd, format="text"):
+    """Write a simple report (format: text, json or csv) to a file object as it is generated."""
+    iter_report, extension = FORMATS[format]
+    for chunk in iter_report(report):
+        fd.write(chunk)
+
+def generate_simple_text_report_file(filename):
+    """Return string containing a simple text report from a report filename."""
+    return generate_simple_text_report(reportcache.parse_report(filename))
+
+def iter_simple_report_file(filename, format="text"):
+    """Return iterator of the chunks of a simple report from a report filename."""
+    iter_report, extension = FORMATS[format]
+    return iter_report(reportcache.parse_report(filename))
+
 def main(args):    
+    usage = """Usage: %prog RADIOMOBILE_REPORT_FILE
+       %prog -o OUTPUT_DIRECTORY REPORT_FILE|DIRECTORY|GLOB [...]
+
+    Generate a simple report (text, JSON or CSV). With an output directory,
+    process many reports in parallel and write a .netinfo.txt (.json, .csv)
+    file for each one."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-o', '--output-directory', dest='output_directory',
+        metavar='DIRECTORY', help='Batch mode: write outputs to DIRECTORY')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', default=None,
+        help='Number of worker processes in batch mode (default: CPUs)')
+    parser.add_option('-f', '--format', dest='format', type='choice',
+        choices=sorted(FORMATS), default='text',
+        help='Output format: %s (default: text)' % ", ".join(sorted(FORMATS)))
+    profiling.add_profile_options(parser)
+    options, args = parser.parse_args(args)
+    if options.output_directory:
+        if options.profile or options.profile_output:
+            parser.error("profiling is not available in batch mode")
+        if not args:
+            parser.print_help()
+            return 2
+        converter = functools.partial(iter_simple_report_file, format=options.format)
+        return batch.run_batch_command(converter, args,
+            options.output_directory, FORMATS[options.format][1], options.jobs)
     if len(args) != 1:
-        prog = os.path.basename(sys.argv[0])
-        sys.stderr.write("Usage: %s RADIOMOBILE_REPORT_FILE\n" % prog)
+        parser.print_help()
         return 2
     text_report_filename, = args
-    report = radiomobile.parse_report(text_report_filename)
-    sys.stdout.write(generate_simple_text_report(report))
+    def _run():
+        report = reportcache.parse_report(text_report_filename)
+        with profiling.timer("write_simple_report"):
+            write_simple_report(report, sys.stdout, options.format)
+    profiling.run_profiled(options, _run)
 
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
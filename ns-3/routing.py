@@ -0,0 +1,135 @@
+#!/usr/bin/python
+"""
+Static routes computed from the graph of nets of a network, as an
+alternative to the global routing of ns-3 (which runs a SPF over the
+whole graph in every simulation).
+
+Nets are given as a list of pairs (net name, member names), in the order
+of the subnets of the network. Routes are returned as a dictionary
+{node name: (default, routes)}, where default is None or a pair
+(next hop, via net index) and routes is a list of tuples (destination net
+index, next hop, via net index). Two modes are available:
+
+- static: a route to every net not attached to the node (minimum number
+  of hops). It needs a BFS for each net, so it is quadratic (nets x
+  links) in time and routes: use it only for small networks.
+- hierarchical: a default route towards a root node and routes only to the
+  nets below the node in the BFS tree from the root. It needs a single BFS
+  and the number of routes is the sum of the depths of the nets, so it is
+  the mode for large topologies.
+
+Computed routes are cached on disk (see reportcache), keyed by the graph.
+
+>>> nets = [("Josjo1 [wifi]", ["Josjojauarina 1", "Urpay", "Huiracochan"]),
+...         ("Huiracochan [wifi]", ["Huiracochan", "Urcos"])]
+>>> get_routes(nets, "static")["Urcos"]
+(None, [(0, 'Huiracochan', 1)])
+"""
+import os
+import hashlib
+import collections
+
+import radiomobile
+import reportcache
+
+MODES = ["static", "hierarchical"]
+
+# Increase when the structure of routes changes (see get_routes)
+ROUTES_VERSION = 1
+
+def get_adjacency(nets):
+    """Return dictionary {node: [(neighbour, via net index), ...]}."""
+    adjacency = collections.defaultdict(list)
+    for index, (name, members) in enumerate(nets):
+        for member in members:
+            adjacency[member].extend((peer, index)
+                for peer in members if peer != member)
+    return adjacency
+
+def get_static_routes(nets):
+    """Return routes (minimum number of hops) to all the nets for all nodes."""
+    adjacency = get_adjacency(nets)
+    routes = dict((node, (None, [])) for node in adjacency)
+    for target, (name, members) in enumerate(nets):
+        distances = dict((member, 0) for member in members)
+        queue = collections.deque(members)
+        while queue:
+            node = queue.popleft()
+            for neighbour, via in adjacency[node]:
+                if neighbour not in distances:
+                    distances[neighbour] = distances[node] + 1
+                    routes[neighbour][1].append((target, node, via))
+                    queue.append(neighbour)
+    return routes
+
+def get_default_root(nets):
+    """Return the node attached to more nets (first in alphabetical order)."""
+    counter = collections.defaultdict(int)
+    for name, members in nets:
+        for member in members:
+            counter[member] += 1
+    return min(counter, key=lambda node: (-counter[node], node))
+
+def get_hierarchical_routes(nets, root=None):
+    """
+    Return default routes towards root (see get_default_root) and routes
+    to the nets below each node. Nodes not connected to root get no routes.
+    """
+    adjacency = get_adjacency(nets)
+    routes = dict((node, (None, [])) for node in adjacency)
+    if not adjacency:
+        return routes
+    root = (root or get_default_root(nets))
+    parents = {root: None}
+    depths = {root: 0}
+    queue = collections.deque([root])
+    while queue:
+        node = queue.popleft()
+        for neighbour, via in adjacency[node]:
+            if neighbour not in parents:
+                parents[neighbour] = (node, via)
+                depths[neighbour] = depths[node] + 1
+                routes[neighbour] = ((node, via), [])
+                queue.append(neighbour)
+    for target, (name, members) in enumerate(nets):
+        connected = [member for member in members if member in depths]
+        if not connected:
+            continue
+        # Walk from the member of the net closest to root up to root
+        child = min(connected, key=lambda member: depths[member])
+        while parents[child]:
+            parent, via = parents[child]
+            routes[parent][1].append((target, child, via))
+            child = parent
+    return routes
+
+def get_cache_key(nets, mode, root):
+    """Return cache key for the routes of a graph of nets."""
+    info = repr((ROUTES_VERSION, mode, root,
+        [(name, list(members)) for (name, members) in nets]))
+    return hashlib.sha1(info).hexdigest()
+
+def get_routes(nets, mode, root=None, directory=None):
+    """
+    Return routes for a graph of nets (mode: static or hierarchical). Routes
+    are cached in directory (default: reportcache.get_cache_directory()).
+    """
+    if mode not in MODES:
+        raise ValueError, "Unknown routing mode: %s" % mode
+    directory = (directory or reportcache.get_cache_directory())
+    path = (os.path.join(directory, "routes-%s.pickle" %
+        get_cache_key(nets, mode, root)) if directory else None)
+    routes = (reportcache.load(path) if path else None)
+    if routes is None:
+        if mode == "static":
+            routes = get_static_routes(nets)
+        else:
+            routes = get_hierarchical_routes(nets, root)
+        if path:
+            try:
+                if not os.path.isdir(directory):
+                    os.makedirs(directory)
+                reportcache.save(path, routes)
+            except (IOError, OSError), exc:
+                radiomobile.debug("Cannot write routes %s: %s" % (path, exc))
+    return routes
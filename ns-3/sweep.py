@@ -0,0 +1,161 @@
+#!/usr/bin/python
+"""
+Run UDP echo simulations (see udp_echo) for all the points of a grid of
+parameters in parallel.
+
+The ns3.Simulator singleton only allows one run for each process, so
+every point runs in its own (fresh) worker process, which builds the
+network from the parsed report (cached by reportcache, so the report is
+only parsed once). Metrics of all runs (times and the FlowMonitor totals, see
+udp_echo.run_simulation) are collected in a table:
+
+>>> grid = {"packet_size": [512, 1024],
+...         "rate_manager": ["ns3::AarfWifiManager", "ns3::ArfWifiManager"]}
+>>> results = run_sweep("report.txt", grid)
+>>> sys.stdout.write(format_results(results))
+"""
+import sys
+import time
+import optparse
+import itertools
+import multiprocessing
+
+import reportcache
+
+# Parameters and default values (frequency None: centre of the band of each net)
+NETWORK_PARAMETERS = {
+    "rate_manager": "ns3::AarfWifiManager",
+    "propagation": None,
+    "frequency": None,
+    "routing_mode": "global",
+}
+
+SIMULATION_PARAMETERS = {
+    "server": "CCATCCA",
+    "client": "URCOS",
+    "packet_size": 1024,
+    "packets": 1,
+    "interval": 1.0,
+    "stop_time": 10.0,
+}
+
+METRICS = ["build_time", "run_time", "simulated_time", "flows", "tx_packets",
+    "rx_packets", "throughput", "delay", "jitter", "loss"]
+
+def expand_grid(grid):
+    """
+    Return list of dictionaries with all the combinations of values of a
+    grid (dictionary of lists), keys sorted.
+    """
+    for key in grid:
+        if key not in NETWORK_PARAMETERS and key not in SIMULATION_PARAMETERS:
+            raise ValueError, "Unknown parameter: %s" % key
+    keys = sorted(grid)
+    return [dict(zip(keys, values))
+        for values in itertools.product(*[grid[key] for key in keys])]
+
+def run_point(args):
+    """Run the simulation of a point of the grid (worker function)."""
+    filename, point = args
+    params = dict(NETWORK_PARAMETERS, **SIMULATION_PARAMETERS)
+    params.update(point)
+    metrics = {}
+    try:
+        import radiomobile_ns3
+        import udp_echo
+        report = reportcache.parse_report(filename)
+        network = radiomobile_ns3.create_network(report,
+            **dict((key, params[key]) for key in NETWORK_PARAMETERS))
+        metrics["build_time"] = network.build_time
+        metrics.update(udp_echo.run_simulation(network,
+            **dict((key, params[key]) for key in SIMULATION_PARAMETERS)))
+        error = None
+    except Exception, exc:
+        error = "%s: %s" % (exc.__class__.__name__, exc)
+    return (point, metrics, error)
+
+def run_sweep(filename, grid, processes=None):
+    """
+    Run a simulation for each point of grid (see expand_grid) in a pool of
+    processes (default: number of CPUs) and return a list of tuples
+    (point, metrics, error), in the order of the grid.
+    """
+    points = expand_grid(grid)
+    # Parse (and cache) the report once, before starting the workers
+    reportcache.parse_report(filename)
+    pool = multiprocessing.Pool(processes, maxtasksperchild=1)
+    try:
+        return pool.map(run_point, [(filename, point) for point in points],
+            chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+def format_metric(value):
+    """Return string for a metric (empty if missing, length of lists)."""
+    if value is None:
+        return ""
+    elif isinstance(value, list):
+        return str(len(value))
+    elif isinstance(value, float):
+        return "%0.6g" % value
+    return str(value)
+
+def format_results(results):
+    """Return a tab-separated table (with header) of sweep results."""
+    keys = sorted(set(key for (point, metrics, error) in results for key in point))
+    lines = ["\t".join(keys + METRICS + ["error"])]
+    for point, metrics, error in results:
+        values = [point[key] for key in keys] + \
+            [format_metric(metrics.get(key)) for key in METRICS] + [error or ""]
+        lines.append("\t".join(map(str, values)))
+    return "\n".join(lines) + "\n"
+
+def parse_value(string):
+    """Return int, float or string from a string."""
+    for cast in [int, float]:
+        try:
+            return cast(string)
+        except ValueError:
+            pass
+    return string
+
+def main(args):
+    usage = """Usage: %prog [OPTIONS] -s NAME=VALUE[,VALUE...] [...] RADIOMOBILE_REPORT_FILE
+
+    Run UDP echo simulations for all the combinations of parameter values
+    and write a table with the metrics of each run.
+
+    Parameters: """ + ", ".join(sorted(NETWORK_PARAMETERS.keys() +
+        SIMULATION_PARAMETERS.keys()))
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-s', '--set', dest='parameters', action='append',
+        default=[], metavar='NAME=VALUES', help='Comma-separated values of a parameter')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', default=None,
+        help='Number of worker processes (default: CPUs)')
+    parser.add_option('-o', '--output', dest='output', metavar='FILE',
+        help='Write results to FILE (default: standard output)')
+    options, args = parser.parse_args(args)
+    if len(args) != 1:
+        parser.print_help()
+        return 2
+    text_report_filename, = args
+    grid = {}
+    for parameter in options.parameters:
+        name, values = parameter.split("=", 1)
+        grid[name] = map(parse_value, values.split(","))
+    start = time.time()
+    results = run_sweep(text_report_filename, grid, options.jobs)
+    output = format_results(results)
+    if options.output:
+        with open(options.output, "w") as fd:
+            fd.write(output)
+    else:
+        sys.stdout.write(output)
+    nerrors = len([error for (point, metrics, error) in results if error])
+    sys.stderr.write("%d runs (%d errors) in %0.3fs\n" %
+        (len(results), nerrors, time.time() - start))
+    return (1 if nerrors else 0)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,37 @@
+#!/usr/bin/python
+import unittest
+
+import addressing
+
+class AddressingTest(unittest.TestCase):
+    def test_get_prefix(self):
+        self.assertEqual([30, 30, 29, 29, 28], map(addressing.get_prefix, [1, 2, 3, 6, 7]))
+        self.assertEqual([8, 7], map(addressing.get_prefix, [2 ** 24 - 2, 2 ** 24 - 1]))
+        self.assertEqual(3, addressing.get_prefix(2 ** 29 - 2))
+
+    def test_allocate_subnets(self):
+        subnets = addressing.allocate_subnets([("a", 3), ("b", 300), ("c", 2)])
+        self.assertEqual([
+            ("10.0.2.0", "255.255.255.248"),
+            ("10.0.0.0", "255.255.254.0"),
+            ("10.0.2.8", "255.255.255.252"),
+        ], subnets)
+
+    def test_allocate_many_subnets(self):
+        nets = [("net%d" % index, 10) for index in range(5000)]
+        subnets = addressing.allocate_subnets(nets)
+        self.assertEqual(5000, len(set(subnets)))
+        self.assertEqual(("10.1.56.112", "255.255.255.240"), subnets[-1])
+
+    def test_allocate_subnets_overflow(self):
+        self.assertRaises(ValueError, addressing.allocate_subnets,
+            [("a", 200), ("b", 100)], "192.168.0.0/24")
+
+    def test_allocate_legacy_subnets(self):
+        self.assertEqual([("10.1.0.0", "255.255.255.0"), ("10.1.1.0", "255.255.255.0")],
+            addressing.allocate_legacy_subnets([("a", 3), ("b", 4)]))
+        self.assertRaises(ValueError, addressing.allocate_legacy_subnets,
+            [("net%d" % index, 2) for index in range(257)])
+
+if __name__ == '__main__':
+    unittest.main()
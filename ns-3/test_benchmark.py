@@ -0,0 +1,50 @@
+#!/usr/bin/python
+import os
+import shutil
+import tempfile
+import unittest
+
+import synthetic
+import benchmark
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_benchmark(self):
+        filename = os.path.join(self.directory, "report.txt")
+        synthetic.write_report(filename, seed=1, **benchmark.SIZES["small"])
+        for name, function in benchmark.BENCHMARKS:
+            result = benchmark.run_benchmark((name, "small", filename, 2))
+            self.assertEqual(sorted(benchmark.FIELDS), sorted(result))
+            self.assertEqual((name, "small"), (result["benchmark"], result["size"]))
+            self.assertEqual((90 if name == "get_net_links" else 100), result["items"])
+            self.assertTrue(result["seconds"] > 0)
+            self.assertTrue(result["setup_memory"] >= 0 and result["peak_memory"] >= 0)
+
+    def test_compare_results(self):
+        def _result(name, throughput, peak_memory):
+            return dict(benchmark=name, size="small", items=100, seconds=1.0,
+                throughput=throughput, setup_memory=0, peak_memory=peak_memory)
+        baseline = [_result("parse_report", 100.0, 1000), _result("get_net_links", 100.0, 1000)]
+        results = [_result("parse_report", 75.0, 1000), _result("get_net_links", 90.0, 1300),
+            _result("generate_simple_text_report", 100.0, 1000)]
+        comparison = benchmark.compare_results(results, baseline, tolerance=0.2)
+        self.assertEqual([(0.75, 1.0, True), (0.9, 1.3, True), (None, None, False)],
+            [(t, m, regression) for (result, t, m, regression) in comparison])
+        self.assertFalse(benchmark.compare_results(results, baseline, 0.5)[0][3])
+        lines = benchmark.format_comparison(comparison).splitlines()
+        self.assertEqual(["0.75", "1", "yes"], lines[1].split("\t")[-3:])
+
+    def test_baseline(self):
+        results = [dict(benchmark="parse_report", size="small", items=100,
+            seconds=0.5, throughput=200.0, peak_memory=1000)]
+        filename = os.path.join(self.directory, "baseline.json")
+        benchmark.save_baseline(filename, results)
+        self.assertEqual(results, benchmark.load_baseline(filename))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import flowstats
+
+def get_flow(flow_id, source_net, tx_packets, rx_packets, delay_sum, jitter_sum):
+    return {"flow_id": flow_id, "source": "10.1.0.2", "destination": "10.1.0.1",
+        "protocol": 17, "source_port": 49153, "destination_port": 9,
+        "source_net": source_net, "destination_net": source_net,
+        "tx_packets": tx_packets, "rx_packets": rx_packets,
+        "tx_bytes": 1052 * tx_packets, "rx_bytes": 1052 * rx_packets,
+        "delay_sum": delay_sum, "jitter_sum": jitter_sum,
+        "first_tx": 2.0, "last_rx": 6.0}
+
+class FlowStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.flows = map(flowstats.get_flow_metrics, [
+            get_flow(1, "Josjo1 [wifi]", 4, 3, 0.03, 0.004),
+            get_flow(2, "Josjo1 [wifi]", 2, 2, 0.01, 0.001),
+            get_flow(3, "Huiracochan [wifi]", 1, 0, 0.0, 0.0),
+        ])
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_flow_metrics(self):
+        flow = self.flows[0]
+        self.assertAlmostEqual(8 * 1052 * 3 / 4.0, flow["throughput"])
+        self.assertAlmostEqual(0.01, flow["delay"])
+        self.assertAlmostEqual(0.002, flow["jitter"])
+        self.assertAlmostEqual(0.25, flow["loss"])
+        self.assertEqual(None, self.flows[2]["delay"])
+        self.assertEqual(None, self.flows[2]["jitter"])
+
+    def test_summarize_nets(self):
+        nets = flowstats.summarize_nets(self.flows)
+        self.assertEqual(["Huiracochan [wifi]", "Josjo1 [wifi]"],
+            [net["net"] for net in nets])
+        josjo1 = nets[1]
+        self.assertEqual((2, 6, 5), 
+            (josjo1["flows"], josjo1["tx_packets"], josjo1["rx_packets"]))
+        self.assertAlmostEqual(0.008, josjo1["delay"])
+        self.assertAlmostEqual(0.005 / 3, josjo1["jitter"])
+        self.assertAlmostEqual(1.0 / 6, josjo1["loss"])
+        self.assertEqual(1.0, nets[0]["loss"])
+
+    def test_write_summary(self):
+        path = os.path.join(self.directory, "summary.json")
+        flowstats.write_summary(path, self.flows)
+        summary = json.load(open(path))
+        self.assertEqual(3, len(summary["flows"]))
+        self.assertEqual(7, summary["total"]["tx_packets"])
+        path = os.path.join(self.directory, "summary.csv")
+        flowstats.write_summary(path, self.flows)
+        flows, nets = open(path).read().split("\n\n")
+        self.assertEqual(4, len(flows.splitlines()))
+        self.assertEqual("net,flows,tx_packets", nets.splitlines()[0][:20])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+import os
+import unittest
+
+import radiomobile
+
+try:
+    import ns3
+    import radiomobile_ns3
+except ImportError:
+    ns3 = None
+
+@unittest.skipIf(ns3 is None, "ns-3 Python bindings are not available")
+class RadioMobileNs3Test(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "radiomobile",
+            "radiomobile_report_test.txt")
+        self.report = radiomobile.parse_report(path)
+        self.net1, self.net2 = self.report.nets.values()
+        # Both access points use the same system (and band)
+        self.net2.net_members["JOSJOJAHUARINA 1"].system = "Josjo 1 Directiva PC"
+
+    def test_get_channel_key(self):
+        key = radiomobile_ns3.get_channel_key(self.net1)
+        self.assertEqual(((2400.0, 2483.0), "Josjo 1 Directiva PC"), key)
+        self.assertEqual(key, radiomobile_ns3.get_channel_key(self.net2))
+        self.net2.frequency_range = (5725.0, 5850.0)
+        self.assertNotEqual(key, radiomobile_ns3.get_channel_key(self.net2))
+        self.net2.frequency_range = None
+        self.assertEqual(self.net2.name, radiomobile_ns3.get_channel_key(self.net2))
+
+    def test_set_devices_power(self):
+        network = radiomobile_ns3.create_network(self.report, propagation="links")
+        device = network.nodes["URPAY"].devices["Uuario Final PCMCIA"].ns3_device
+        value = ns3.DoubleValue()
+        device.GetPhy().GetAttribute("EnergyDetectionThreshold", value)
+        self.assertEqual(-93.0, value.Get())
+        device.GetPhy().GetAttribute("CcaMode1Threshold", value)
+        self.assertEqual(-96.0, value.Get())
+
+    def test_shared_channel(self):
+        network = radiomobile_ns3.create_network(self.report)
+        nodes = network.nodes
+        phy1 = nodes["JOSJOJAHUARINA 2"].devices["Josjo 2 Troncal"].phy_helper
+        phy2 = nodes["URPAY"].devices["Uuario Final PCMCIA"].phy_helper
+        self.assertTrue(phy1 is phy2)
+        channel1 = nodes["JOSJOJAHUARINA 2"].devices["Josjo 2 Troncal"].ns3_device.GetChannel()
+        channel2 = nodes["URPAY"].devices["Uuario Final PCMCIA"].ns3_device.GetChannel()
+        self.assertEqual(channel1.GetId(), channel2.GetId())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*
 import os
+import csv
+import json
 import unittest
+import StringIO
 import itertools
 from datetime import datetime
 from pprint import pprint
@@ -82,6 +85,37 @@ class RadioMobileReportTest(unittest.TestCase):
             'Ccatcca\tSS\t15619\tQPSK 3/4', 
             'Kcauri\tSS\t15666\tQPSK 3/4', ''], net1_contents)
 
+    def write(self, format):
+        output = StringIO.StringIO()
+        radiomobile_ns3_report.write_simple_report(self.report, output, format)
+        return output.getvalue()
+
+    def test_write_text(self):
+        self.assertEqual(radiomobile_ns3_report.generate_simple_text_report(self.report),
+            self.write("text"))
+
+    def test_write_json(self):
+        data = json.loads(self.write("json"))
+        self.assertEqual({"Netfile": "CUSCO-NE.NET", "Generated": "2010-04-14T13:56:45"},
+            data["general_information"])
+        self.assertEqual({"name": "Josjojauarina 1", "elevation": 280,
+            "coordinates": [-9.319722222222222, -75.14583333333334],
+            "position": [0, 0]}, data["nodes"][0])
+        self.assertEqual(7, len(data["nodes"]))
+        net = data["nets"][1]
+        self.assertEqual(("Josjo2", "wimax", "BS"),
+            (net["name"], net["mode"], net["master_role"]))
+        self.assertEqual({"node": "Ccatcca", "role": "SS", "distance": 15619,
+            "mode": "QPSK 3/4"}, net["members"][1])
+
+    def test_write_csv(self):
+        rows = list(csv.DictReader(StringIO.StringIO(self.write("csv"))))
+        self.assertEqual(10, len(rows))
+        self.assertEqual(dict(net="Josjo1-Josjo2", mode="wifi",
+            node="Josjojauarina 2", role="STA", distance="22482",
+            node_mode="wifia-2mbs", elevation="220", latitude="-9.26694",
+            longitude="-74.94806", x="21728", y="5837"), rows[1])
+
 
 if __name__ == '__main__':
     unittest.main()
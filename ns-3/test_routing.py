@@ -0,0 +1,46 @@
+#!/usr/bin/python
+import shutil
+import tempfile
+import unittest
+
+import routing
+
+# Chain of nets: a - (b, c) - d - e
+NETS = [
+    ("net0", ["a", "b", "c"]),
+    ("net1", ["c", "d"]),
+    ("net2", ["d", "e"]),
+]
+
+class RoutingTest(unittest.TestCase):
+    def test_get_static_routes(self):
+        routes = routing.get_static_routes(NETS)
+        self.assertEqual((None, [(1, "c", 0), (2, "c", 0)]), routes["a"])
+        self.assertEqual((None, [(0, "d", 2), (1, "d", 2)]), routes["e"])
+        self.assertEqual((None, [(2, "d", 1)]), routes["c"])
+
+    def test_get_hierarchical_routes(self):
+        self.assertEqual("c", routing.get_default_root(NETS))
+        routes = routing.get_hierarchical_routes(NETS)
+        self.assertEqual((None, [(2, "d", 1)]), routes["c"])
+        self.assertEqual((("c", 0), []), routes["a"])
+        self.assertEqual((("c", 1), []), routes["d"])
+        self.assertEqual((("d", 2), []), routes["e"])
+        routes = routing.get_hierarchical_routes(NETS, root="e")
+        self.assertEqual((None, [(0, "d", 2), (1, "d", 2)]), routes["e"])
+        self.assertEqual((("e", 2), [(0, "c", 1)]), routes["d"])
+
+    def test_get_routes_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            routes = routing.get_routes(NETS, "static", directory=directory)
+            self.assertEqual(routes, routing.get_routes(NETS, "static",
+                directory=directory))
+            self.assertEqual(routing.get_hierarchical_routes(NETS),
+                routing.get_routes(NETS, "hierarchical", directory=directory))
+        finally:
+            shutil.rmtree(directory)
+        self.assertRaises(ValueError, routing.get_routes, NETS, "ospf")
+
+if __name__ == '__main__':
+    unittest.main()
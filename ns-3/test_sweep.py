@@ -0,0 +1,35 @@
+#!/usr/bin/python
+import unittest
+
+import sweep
+
+class SweepTest(unittest.TestCase):
+    def test_expand_grid(self):
+        grid = {"packet_size": [512, 1024], "client": ["URCOS"],
+            "rate_manager": ["ns3::AarfWifiManager", "ns3::ArfWifiManager"]}
+        points = sweep.expand_grid(grid)
+        self.assertEqual(4, len(points))
+        self.assertEqual({"packet_size": 512, "client": "URCOS",
+            "rate_manager": "ns3::AarfWifiManager"}, points[0])
+        self.assertEqual([{}], sweep.expand_grid({}))
+        self.assertRaises(ValueError, sweep.expand_grid, {"size": [1]})
+
+    def test_format_results(self):
+        results = [
+            ({"packet_size": 512}, {"build_time": 0.1, "run_time": 0.25,
+                "simulated_time": 10.0}, None),
+            ({"packet_size": 1024}, {}, "ValueError: Node has no addresses"),
+        ]
+        lines = sweep.format_results(results).splitlines()
+        self.assertEqual(["packet_size"] + sweep.METRICS + ["error"],
+            lines[0].split("\t"))
+        self.assertEqual(["512", "0.1", "0.25", "10"], lines[1].split("\t")[:4])
+        self.assertEqual(["1024"] + [""] * len(sweep.METRICS) + 
+            ["ValueError: Node has no addresses"], lines[2].split("\t"))
+
+    def test_parse_value(self):
+        self.assertEqual([512, 1.5, "ns3::ArfWifiManager"],
+            map(sweep.parse_value, ["512", "1.5", "ns3::ArfWifiManager"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+import os
+import unittest
+
+import radiomobile
+import workload
+
+class WorkloadTest(unittest.TestCase):
+    def setUp(self):
+        filename = "example.report.txt"
+        path = os.path.join(os.path.dirname(__file__), filename)
+        self.report = radiomobile.parse_report(path)
+
+    def test_get_gateway_matrix(self):
+        flows = workload.get_gateway_matrix(self.report, "voip")
+        self.assertEqual([
+            ("Josjojauarina 2", "Josjojauarina 1", "voip"),
+            ("Ccatcca", "Josjojauarina 2", "voip"),
+            ("Kcauri", "Josjojauarina 2", "voip"),
+            ("Urpay", "Josjojauarina 1", "voip"),
+            ("Huiracochan", "Josjojauarina 1", "voip"),
+            ("Urcos", "Huiracochan", "voip"),
+        ], flows)
+        flows = workload.get_gateway_matrix(self.report, "bulk", gateway="Urcos")
+        self.assertEqual(5, len(flows))
+        self.assertTrue(all(destination == "Urcos" 
+            for (source, destination, profile) in flows))
+
+    def test_get_random_matrix(self):
+        flows = workload.get_random_matrix(self.report.units, "cbr", 1000, seed=1)
+        self.assertEqual(1000, len(flows))
+        self.assertTrue(all(source != destination 
+            for (source, destination, profile) in flows))
+        self.assertEqual(flows, 
+            workload.get_random_matrix(self.report.units, "cbr", 1000, seed=1))
+
+    def test_group_flows(self):
+        flows = workload.get_random_matrix(self.report.units, "cbr", 5000, seed=1)
+        flows += workload.get_gateway_matrix(self.report, "voip")
+        groups = workload.group_flows(flows)
+        self.assertTrue(len(groups) <= 2 * len(self.report.units))
+        self.assertEqual(len(flows), 
+            sum(len(sources) for (key, sources) in groups))
+        self.assertRaises(ValueError, workload.group_flows, [("a", "b", "video")])
+
+    def test_get_data_rate(self):
+        self.assertEqual(64000.0, workload.get_data_rate(workload.PROFILES["voip"]))
+
+if __name__ == '__main__':
+    unittest.main()
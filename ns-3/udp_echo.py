@@ -1,43 +1,64 @@
 #!/usr/bin/python
 import sys
+import time
 import ns3
 import optparse
 from pprint import pprint
 
 import radiomobile_ns3 as rmw_ns3
+import flowstats
+import profiling
 
-ns3.LogComponentEnable("UdpEchoClientApplication", ns3.LOG_LEVEL_INFO)
-ns3.LogComponentEnable("UdpEchoServerApplication", ns3.LOG_LEVEL_INFO)
+def enable_logging():
+    """Enable logging of the echo applications."""
+    ns3.LogComponentEnable("UdpEchoClientApplication", ns3.LOG_LEVEL_INFO)
+    ns3.LogComponentEnable("UdpEchoServerApplication", ns3.LOG_LEVEL_INFO)
 
-def run_simulation(network):
-    #print "distance between CCATCCA and URCOS", distance
+def run_simulation(network, server="CCATCCA", client="URCOS", packet_size=1024,
+        packets=1, interval=1.0, stop_time=10.0, pcap_devices=(), 
+        pcap_prefix="udp_echo"):
+    """
+    Run an UDP echo simulation between two nodes, with pcap tracing for
+    pcap_devices (list of pairs (node name, system)). Return a dictionary
+    of metrics: run_time (wall-clock seconds), simulated_time (seconds),
+    flows (list of flows with metrics, see flowstats) and the fields of 
+    the total summary of flows (see flowstats.summarize_flows).
+    """
     # Applications
-    server = network.nodes["CCATCCA"]    
-    server_address = server.devices["Uuario Final PCMCIA"].interfaces[0].address
+    server = network.nodes[server]
+    server_address = rmw_ns3.get_node_address(server)
     echoServer = ns3.UdpEchoServerHelper(9)
     serverApps = echoServer.Install(server.ns3_node)
     serverApps.Start(ns3.Seconds(1.0))
-    serverApps.Stop(ns3.Seconds(10.0))
+    serverApps.Stop(ns3.Seconds(stop_time))
 
-    client = network.nodes["URCOS"]
+    client = network.nodes[client]
     echoClient = ns3.UdpEchoClientHelper(server_address, 9)
-    echoClient.SetAttribute("MaxPackets", ns3.UintegerValue(1))
-    echoClient.SetAttribute("Interval", ns3.TimeValue(ns3.Seconds(1.0)))
-    echoClient.SetAttribute("PacketSize", ns3.UintegerValue(1024))
+    echoClient.SetAttribute("MaxPackets", ns3.UintegerValue(packets))
+    echoClient.SetAttribute("Interval", ns3.TimeValue(ns3.Seconds(interval)))
+    echoClient.SetAttribute("PacketSize", ns3.UintegerValue(packet_size))
     clientApps = echoClient.Install(client.ns3_node)
     clientApps.Start(ns3.Seconds(2.0))
-    clientApps.Stop(ns3.Seconds(10.0))
+    clientApps.Stop(ns3.Seconds(stop_time))
     
     # Tracing
-    josjo1 = network.nodes["JOSJOJAHUARINA 1"]
-    device = josjo1.devices['Josjo 1 Sectorial PC'].ns3_device
-    phy = josjo1.devices['Josjo 1 Sectorial PC'].phy_helper
-    phy.EnablePcap("udp_echo", device)
+    rmw_ns3.install_flow_monitor(network)
+    for name, system in pcap_devices:
+        rmw_ns3.enable_pcap(network, name, system, pcap_prefix)
 
     # Run simulation    
-    ns3.Simulator.Stop(ns3.Seconds(10.0))
+    start = time.time()
+    ns3.Simulator.Stop(ns3.Seconds(stop_time))
     ns3.Simulator.Run()
+    simulated_time = ns3.Simulator.Now().GetSeconds()
+    flows = map(flowstats.get_flow_metrics, rmw_ns3.get_flow_stats(network))
     ns3.Simulator.Destroy()
+    metrics = dict(run_time=time.time() - start, simulated_time=simulated_time,
+        flows=flows)
+    if flows:
+        total = flowstats.summarize_flows(flows)[0]
+        metrics.update((key, total[key]) for key in flowstats.NET_FIELDS[1:])
+    return metrics
     
 def main(args0):
     usage = """Usage: %prog [OPTIONS] radiomobile_report_path
@@ -46,15 +67,46 @@ def main(args0):
     parser = optparse.OptionParser(usage)
     parser.add_option('-v', '--verbose', dest='vlevel', action="count",
       default=0, help='Increase verbose level)')
+    parser.add_option('-p', '--propagation', dest='propagation', 
+      type="choice", choices=["links", "pathloss"], default=None, 
+      help='Use a matrix propagation loss model from the report links or path loss (links, pathloss)')
+    parser.add_option('-f', '--frequency', dest='frequency', type="float",
+      default=None, help='Frequency (MHz) for path losses (default: centre of the band of each net)')
+    parser.add_option('-m', '--map-file', dest='map_file', default=None,
+      metavar="MAP_PATH", help='Radio Mobile .map file (terrain for path losses)')
+    parser.add_option('-r', '--routing', dest='routing_mode', type="choice",
+      choices=["global", "static", "hierarchical"], default="global",
+      help='Routing: global (ns-3), static (quadratic, small networks) or hierarchical (large networks); static and hierarchical routes are cached')
+    parser.add_option('-s', '--summary', dest='summary', default=None,
+      metavar="FILE", help='Write summary of flows to FILE (.csv or .json)')
+    parser.add_option('-c', '--pcap', dest='pcap_devices', action="append",
+      default=[], metavar="NODE:SYSTEM", help='Write pcap trace of a device')
+    profiling.add_profile_options(parser)
     options, args = parser.parse_args(args0)
     rmw_ns3.verbose_level = options.vlevel
+    enable_logging()
     if len(args) != 1:
         parser.print_help()
         return 2
         
     text_report_filename, = args
-    network = rmw_ns3.create_network_from_report_file(text_report_filename)
-    run_simulation(network)    
+    rmap = None
+    if options.map_file:
+        import mapfile
+        rmap = mapfile.open_map(options.map_file)
+    pcap_devices = [device.split(":", 1) for device in options.pcap_devices]
+    def _run():
+        network = rmw_ns3.create_network_from_report_file(text_report_filename,
+            propagation=options.propagation, frequency=options.frequency, 
+            rmap=rmap, routing_mode=options.routing_mode)
+        with profiling.timer("run_simulation"):
+            metrics = run_simulation(network, pcap_devices=pcap_devices)
+        return network, metrics
+    network, metrics = profiling.run_profiled(options, _run)
+    if options.summary:
+        flowstats.write_summary(options.summary, metrics["flows"])
+    sys.stderr.write("Build time: %0.3fs, run time: %0.3fs\n" % 
+        (network.build_time, metrics["run_time"]))
     
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+"""
+Install traffic generators on a network (see radiomobile_ns3.create_network)
+from a traffic matrix.
+
+A traffic matrix is a list of flows (source, destination, profile): unit
+names and the name of a traffic profile (see PROFILES). Matrices can be
+built with get_gateway_matrix (every terminal to its AP or to a gateway)
+and get_random_matrix (random pairs of units).
+
+Flows are grouped by destination and profile, so a single sink is
+installed for each destination and port, and a single source helper is
+installed at once on the container of all its sources. The setup cost
+grows with the number of destinations, not with the number of flows.
+
+>>> network = radiomobile_ns3.create_network(report)
+>>> flows = get_gateway_matrix(report, "voip", gateway="URCOS")
+>>> install_workload(network, flows, start=1.0, stop=60.0)
+"""
+import random
+
+import radiomobile
+from radiomobile import Struct
+
+# Traffic profiles: transport protocol, port, (mean) data rate, packet size
+# (bytes) and arrivals (constant bit rate, poisson or bulk TCP transfer as
+# fast as possible)
+PROFILES = {
+    "voip": Struct("Profile", protocol="udp", port=5000, data_rate="64kbps",
+        packet_size=160, arrivals="constant"),
+    "cbr": Struct("Profile", protocol="udp", port=5001, data_rate="256kbps",
+        packet_size=512, arrivals="constant"),
+    "poisson": Struct("Profile", protocol="udp", port=5002, data_rate="256kbps",
+        packet_size=512, arrivals="poisson"),
+    "bulk": Struct("Profile", protocol="tcp", port=5003, data_rate=None,
+        packet_size=1024, arrivals="bulk"),
+}
+
+POISSON_BURST = 10
+
+SOCKET_FACTORIES = {
+    "udp": "ns3::UdpSocketFactory",
+    "tcp": "ns3::TcpSocketFactory",
+}
+
+def get_gateway_matrix(report, profile, gateway=None,
+        roles=("Terminal", "Slave")):
+    """
+    Return traffic matrix with a flow from every member with one of roles
+    to a gateway unit or, if not given, to the AP (Node/Master) of its net.
+    """
+    flows = []
+    for net in report.nets.itervalues():
+        aps = radiomobile.get_units_for_network(net, "Node") + \
+            radiomobile.get_units_for_network(net, "Master")
+        for name, member in net.net_members.iteritems():
+            if member.role not in roles:
+                continue
+            destination = (gateway or (aps[0] if aps else None))
+            if destination and destination != name:
+                flows.append((name, destination, profile))
+    return flows
+
+def get_random_matrix(units, profile, nflows, seed=None):
+    """Return traffic matrix with nflows between random pairs of distinct units."""
+    rng = random.Random(seed)
+    names = list(units)
+    if len(names) < 2:
+        raise ValueError, "Need at least two units for random pairs"
+    return [tuple(rng.sample(names, 2)) + (profile,) for index in xrange(nflows)]
+
+def group_flows(flows):
+    """
+    Group flows by destination and profile and return a list of pairs
+    ((destination, profile), sources), sorted. Repeated flows are kept.
+    """
+    groups = {}
+    for source, destination, profile in flows:
+        if profile not in PROFILES:
+            raise ValueError, "Unknown traffic profile: %s" % profile
+        groups.setdefault((destination, profile), []).append(source)
+    return sorted(groups.items())
+
+def get_data_rate(profile):
+    """Return data rate (bits per second) of a profile ("64kbps" -> 64000.0)."""
+    rate = radiomobile.get_number(profile.data_rate)
+    units = profile.data_rate.lstrip("0123456789.").lower()
+    return rate * {"kbps": 1e3, "mbps": 1e6}.get(units, 1.0)
+
+def create_source_helper(profile, address):
+    """Return the ns-3 application helper for the sources of a profile."""
+    import ns3
+    remote = ns3.InetSocketAddress(address, profile.port)
+    factory = SOCKET_FACTORIES[profile.protocol]
+    if profile.arrivals == "bulk":
+        helper = ns3.BulkSendHelper(factory, remote)
+        helper.SetAttribute("SendSize", ns3.UintegerValue(profile.packet_size))
+        return helper
+    helper = ns3.OnOffHelper(factory, remote)
+    helper.SetAttribute("PacketSize", ns3.UintegerValue(profile.packet_size))
+    data_rate = get_data_rate(profile)
+    if profile.arrivals == "constant":
+        on_time, off_time = ns3.ConstantVariable(1), ns3.ConstantVariable(0)
+    elif profile.arrivals == "poisson":
+        # Send each packet in a short burst (at POISSON_BURST times the rate)
+        # followed by an exponential off time, so the mean rate is kept
+        interval = 8.0 * profile.packet_size / data_rate
+        on_time = ns3.ConstantVariable(interval / POISSON_BURST)
+        off_time = ns3.ExponentialVariable(interval * (1 - 1.0 / POISSON_BURST))
+        data_rate *= POISSON_BURST
+    else:
+        raise ValueError, "Unknown arrivals: %s" % profile.arrivals
+    helper.SetAttribute("DataRate", ns3.DataRateValue(ns3.DataRate(int(data_rate))))
+    helper.SetAttribute("OnTime", ns3.RandomVariableValue(on_time))
+    helper.SetAttribute("OffTime", ns3.RandomVariableValue(off_time))
+    return helper
+
+def install_workload(network, flows, start=1.0, stop=10.0):
+    """
+    Install sinks and traffic sources for flows (see group_flows) in a
+    network and return the number of groups of sources installed.
+    """
+    import ns3
+    import radiomobile_ns3
+    groups = group_flows(flows)
+    sinks = set()
+    for (destination, profile_name), sources in groups:
+        profile = PROFILES[profile_name]
+        node = network.nodes[destination]
+        if (destination, profile.port) not in sinks:
+            local = ns3.InetSocketAddress(ns3.Ipv4Address.GetAny(), profile.port)
+            sink = ns3.PacketSinkHelper(SOCKET_FACTORIES[profile.protocol], local)
+            apps = sink.Install(node.ns3_node)
+            apps.Start(ns3.Seconds(start))
+            apps.Stop(ns3.Seconds(stop))
+            sinks.add((destination, profile.port))
+        container = ns3.NodeContainer()
+        for source in sources:
+            container.Add(network.nodes[source].ns3_node)
+        address = radiomobile_ns3.get_node_address(node)
+        apps = create_source_helper(profile, address).Install(container)
+        apps.Start(ns3.Seconds(start))
+        apps.Stop(ns3.Seconds(stop))
+    return len(groups)
@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Convert many report files in a pool of worker processes.
+
+A converter is a module-level function that takes a report path and
+returns the output string (or an iterable of strings, written as they are
+generated). Each input gets its own output file (in the subdirectory of
+the output directory matching its own one below the common directory of
+all inputs), errors in one file do not stop the others (and leave no
+output file) and every file is timed:
+
+>>> for result in run_batch(generate_text, ["reports/"], "out", ".txt"):
+...     print result.path, result.elapsed, result.error
+"""
+import os
+import sys
+import glob
+import time
+import multiprocessing
+
+from radiomobile import Struct
+
+def expand_paths(patterns, extension=".txt"):
+    """
+    Return sorted list of paths from a list of files, directories (files
+    with the given extension inside it) and glob patterns.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            names = sorted(os.listdir(pattern))
+            paths.extend(os.path.join(pattern, name) for name in names
+                if name.lower().endswith(extension))
+        elif os.path.exists(pattern):
+            paths.append(pattern)
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+def get_common_directory(paths):
+    """Return the deepest directory (absolute) that contains all paths."""
+    directories = [os.path.dirname(os.path.abspath(path)).split(os.sep)
+        for path in paths]
+    common = []
+    for parts in zip(*directories):
+        if any(part != parts[0] for part in parts):
+            break
+        common.append(parts[0])
+    return (os.sep.join(common) or os.sep)
+
+def get_output_path(path, output_directory, suffix, root=None):
+    """
+    Return output path for an input path (extension replaced by suffix). If
+    a root directory is given, the subdirectories of the input below it are
+    kept, so inputs with the same name in different directories do not share
+    the output file.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    name = os.path.splitext(filename)[0]
+    if root:
+        relative = os.path.relpath(directory, root)
+        if relative != os.curdir:
+            return os.path.join(output_directory, relative, name + suffix)
+    return os.path.join(output_directory, name + suffix)
+
+def convert_file(args):
+    """Convert one file (worker function) and return a Result struct."""
+    converter, path, output_path = args
+    start = time.time()
+    try:
+        directory = os.path.dirname(output_path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another worker may have created it
+                if not os.path.isdir(directory):
+                    raise
+        output = converter(path)
+        with open(output_path, "w") as fd:
+            if isinstance(output, basestring):
+                fd.write(output)
+            else:
+                for chunk in output:
+                    fd.write(chunk)
+        error = None
+    except Exception, exc:
+        error = "%s: %s" % (exc.__class__.__name__, exc)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return Struct("Result", path=path, output_path=output_path,
+        elapsed=time.time() - start, error=error)
+
+def run_batch(converter, patterns, output_directory, suffix, processes=None):
+    """
+    Convert the reports in patterns (see expand_paths) with converter in a
+    pool of processes (default: number of CPUs) and yield a Result struct for
+    each file (path, output_path, elapsed, error) as soon as it finishes.
+    Inputs whose output path is already used by a previous one are not
+    converted, their results are errors.
+    """
+    paths = expand_paths(patterns)
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    root = (get_common_directory(paths) if paths else None)
+    tasks = []
+    outputs = {}
+    for path in paths:
+        output_path = get_output_path(path, output_directory, suffix, root)
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in outputs:
+            error = "Duplicate output path %s (also used by %s)" % \
+                (output_path, outputs[key])
+            yield Struct("Result", path=path, output_path=output_path,
+                elapsed=0.0, error=error)
+            continue
+        outputs[key] = path
+        tasks.append((converter, path, output_path))
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield convert_file(task)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap_unordered(convert_file, tasks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+def run_batch_command(converter, patterns, output_directory, suffix,
+        processes=None, stream=sys.stderr):
+    """
+    Run a batch conversion and write a line with the time (or the error) of
+    each file to stream. Return exit code: 0 if all files were converted.
+    """
+    start = time.time()
+    nfiles = nerrors = 0
+    for result in run_batch(converter, patterns, output_directory, suffix,
+            processes):
+        nfiles += 1
+        if result.error:
+            nerrors += 1
+            stream.write("%s: %0.3fs error: %s\n" %
+                (result.path, result.elapsed, result.error))
+        else:
+            stream.write("%s: %0.3fs -> %s\n" %
+                (result.path, result.elapsed, result.output_path))
+        stream.flush()
+    stream.write("%d files (%d errors) in %0.3fs\n" %
+        (nfiles, nerrors, time.time() - start))
+    return (1 if nerrors else 0)
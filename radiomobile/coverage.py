@@ -0,0 +1,258 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Coverage maps: received signal level of a transmitting unit over the
+elevation grid of a .map file (see mapfile).
+
+Every grid point in a radius around the transmitter is evaluated as a
+receiver with the link budget model of linkbudget (free-space loss plus
+knife-edge diffraction over the terrain profile). The window is split in
+square tiles, computed in a pool of worker processes. Workers open the map
+themselves, so the (memory-mapped) terrain is shared read-only through the
+page cache instead of being copied to each one.
+
+Path losses do not depend on the transmitter system, so they are cached
+for each tile (see reportcache), keyed by the map contents, the position
+and height of the transmitter and the model parameters. Rerunning a
+coverage, even with a different power or antenna gain, only reads tiles.
+
+>>> report = radiomobile.parse_report("report.txt")
+>>> rmap = mapfile.open_map("cusco-ne.map")
+>>> unit = report.units["Josjojauarina 2"]
+>>> coverage = get_coverage(rmap, unit.location_coords, report.systems["[WFb5.5]"],
+...     height=2.0, frequency=2400.0, radius=10000)
+>>> save_coverage("josjo2.npz", coverage)
+"""
+import os
+import sys
+import math
+import hashlib
+import optparse
+import multiprocessing
+
+import numpy
+
+import radiomobile
+import mapfile
+import linkbudget
+import reportcache
+from radiomobile import Struct
+
+# Increase when the computation of tiles changes (see get_tile_key)
+COVERAGE_VERSION = 1
+
+DEFAULT_RADIUS = 20000.0
+DEFAULT_RX_HEIGHT = 2.0
+DEFAULT_TILE_SIZE = 64
+DEFAULT_SAMPLES = 64
+DEFAULT_FREQUENCY = 2400.0
+
+METERS_PER_DEGREE = 111320.0
+
+# Maps opened by each worker process, by filename
+_worker_maps = {}
+
+def get_window_indexes(rmap, coords, radius):
+    """
+    Return ((row1, row2), (column1, column2)) of the map window (inclusive)
+    that contains a circle of radius meters around coordinates.
+    """
+    lat, lon = coords
+    dlat = radius / METERS_PER_DEGREE
+    dlon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    (south, west), (north, east) = rmap.bounds
+    corners = [(max(lat - dlat, south), max(lon - dlon, west)),
+        (min(lat + dlat, north), min(lon + dlon, east))]
+    rows, columns = mapfile.get_map_index(rmap, corners)
+    return (tuple(sorted(rows.tolist())), tuple(sorted(columns.tolist())))
+
+def get_tiles(rows, columns, tile_size):
+    """Return list of tiles ((row1, row2), (column1, column2)) (exclusive ends)."""
+    (row1, row2), (column1, column2) = rows, columns
+    return [((row, min(row + tile_size, row2 + 1)),
+        (column, min(column + tile_size, column2 + 1)))
+        for row in xrange(row1, row2 + 1, tile_size)
+        for column in xrange(column1, column2 + 1, tile_size)]
+
+def compute_tile(rmap, params, tile):
+    """
+    Return a float32 (rows x columns) array with the path losses (dB) from the
+    transmitter (see get_coverage for params) to the grid points of a tile.
+    """
+    (row1, row2), (column1, column2) = tile
+    rows, columns = numpy.mgrid[row1:row2, column1:column2]
+    lats, lons = mapfile.get_map_coordinates(rmap, rows.ravel(), columns.ravel())
+    points = numpy.column_stack([lats, lons])
+    transmitter = numpy.repeat([params["coords"]], len(points), axis=0)
+    profiles = linkbudget.get_terrain_profiles(rmap, transmitter, points,
+        params["samples"])
+    losses = linkbudget.get_path_losses(profiles, params["height"],
+        params["rx_height"], params["frequency"], params["k_factor"])
+    return losses.path_loss.reshape(rows.shape).astype(numpy.float32)
+
+def _compute_tile_worker(args):
+    """Compute a tile in a worker process (see compute_tile)."""
+    filename, params, tile = args
+    if filename not in _worker_maps:
+        _worker_maps[filename] = mapfile.open_map(filename)
+    return (tile, compute_tile(_worker_maps[filename], params, tile))
+
+def get_tile_key(map_key, params, tile):
+    """Return cache key for the path losses of a tile."""
+    info = repr((COVERAGE_VERSION, map_key, sorted(params.items()), tile))
+    return hashlib.sha1(info).hexdigest()
+
+def compute_path_losses(rmap, params, tiles, processes=None, directory=None):
+    """
+    Return dictionary {tile: path losses} for a list of tiles, reading (and
+    writing) cached tiles in directory (default: reportcache.get_cache_directory()).
+    Missing tiles are computed in a pool of processes (default: number of CPUs).
+    """
+    directory = (directory or reportcache.get_cache_directory())
+    map_key = (reportcache.get_key(rmap.filename) if directory else None)
+    def _get_path(tile):
+        name = "coverage-%s.pickle" % get_tile_key(map_key, params, tile)
+        return os.path.join(directory, name)
+    losses = {}
+    for tile in tiles:
+        tile_losses = (reportcache.load(_get_path(tile)) if directory else None)
+        if tile_losses is not None:
+            losses[tile] = tile_losses
+    missing = [tile for tile in tiles if tile not in losses]
+    if processes == 1 or len(missing) <= 1:
+        computed = [(tile, compute_tile(rmap, params, tile)) for tile in missing]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            computed = pool.imap_unordered(_compute_tile_worker,
+                [(rmap.filename, params, tile) for tile in missing])
+            computed = list(computed)
+        finally:
+            pool.close()
+            pool.join()
+    for tile, tile_losses in computed:
+        losses[tile] = tile_losses
+        if directory:
+            try:
+                if not os.path.isdir(directory):
+                    os.makedirs(directory)
+                reportcache.save(_get_path(tile), tile_losses)
+            except (IOError, OSError), exc:
+                radiomobile.debug("Cannot write coverage tile: %s" % exc)
+    return losses
+
+def get_coverage(rmap, coords, system, height, frequency, radius=DEFAULT_RADIUS,
+        rx_height=DEFAULT_RX_HEIGHT, rx_gain=0.0, tile_size=DEFAULT_TILE_SIZE,
+        samples=DEFAULT_SAMPLES, k_factor=linkbudget.DEFAULT_K_FACTOR,
+        processes=None, directory=None):
+    """
+    Return a Coverage struct for a transmitter at (lat, lon) coordinates with
+    a parsed system and antenna height (meters above ground):
+
+    - levels: float32 raster (north-up) of received signal levels (dBm, for
+      a receiver with rx_gain dB at rx_height meters), NaN beyond radius.
+    - bounds: ((south, west), (north, east)) of the raster grid points.
+    - rx_threshold: receiver threshold (dBm) of the system.
+    """
+    tx_power, tx_loss, tx_gain, rx_threshold = linkbudget.get_system_params(system)
+    rows, columns = get_window_indexes(rmap, coords, radius)
+    params = dict(coords=tuple(map(float, coords)), height=float(height),
+        rx_height=float(rx_height), frequency=float(frequency),
+        k_factor=float(k_factor), samples=int(samples))
+    tiles = get_tiles(rows, columns, tile_size)
+    losses = compute_path_losses(rmap, params, tiles, processes, directory)
+    (row1, row2), (column1, column2) = rows, columns
+    path_loss = numpy.empty((row2 - row1 + 1, column2 - column1 + 1), dtype=numpy.float32)
+    for tile, tile_losses in losses.iteritems():
+        (tile_row1, tile_row2), (tile_column1, tile_column2) = tile
+        path_loss[tile_row1 - row1:tile_row2 - row1,
+            tile_column1 - column1:tile_column2 - column1] = tile_losses
+    levels = (tx_power - tx_loss + tx_gain + rx_gain) - path_loss
+    grid_rows, grid_columns = numpy.mgrid[row1:row2 + 1, column1:column2 + 1]
+    lats, lons = mapfile.get_map_coordinates(rmap, grid_rows, grid_columns)
+    distances = radiomobile.get_distances(numpy.dstack([lats, lons]), coords,
+        as_float=True)
+    levels[distances > radius] = numpy.nan
+    south, west = [float(x) for x in mapfile.get_map_coordinates(rmap, row2, column1)]
+    north, east = [float(x) for x in mapfile.get_map_coordinates(rmap, row1, column2)]
+    return Struct("Coverage", levels=levels, bounds=((south, west), (north, east)),
+        rx_threshold=rx_threshold)
+
+def get_covered_ratio(coverage):
+    """Return the ratio of points (within radius) above the receiver threshold."""
+    levels = coverage.levels[~numpy.isnan(coverage.levels)]
+    return (float((levels >= coverage.rx_threshold).sum()) / len(levels)
+        if len(levels) else 0.0)
+
+def save_coverage(filename, coverage):
+    """Write a coverage (levels, bounds and threshold) to a NumPy .npz file."""
+    numpy.savez(filename, levels=coverage.levels,
+        bounds=numpy.array(coverage.bounds), rx_threshold=coverage.rx_threshold)
+
+def load_coverage(filename):
+    """Return a Coverage struct from a .npz file (see save_coverage)."""
+    data = numpy.load(filename)
+    (south, west), (north, east) = data["bounds"].tolist()
+    return Struct("Coverage", levels=data["levels"],
+        bounds=((south, west), (north, east)),
+        rx_threshold=float(data["rx_threshold"]))
+
+def get_unit_net(report, name):
+    """Return the first net of which a unit is a member."""
+    for net in report.nets.itervalues():
+        if name in net.net_members:
+            return net
+    raise ValueError, "Unit is not a member of any net: %s" % name
+
+def get_unit_system(report, name):
+    """Return pair (system name, antenna height) of a unit in its first net."""
+    member = get_unit_net(report, name).net_members[name]
+    return (member.system, member.antenna)
+
+def main(args):
+    usage = """Usage: %prog [OPTIONS] RADIOMOBILE_REPORT_FILE MAP_FILE UNIT OUTPUT_FILE
+
+    Compute the coverage map of a unit (received signal level over the
+    elevation grid) and write it to a NumPy .npz file. System, antenna
+    height and frequency (centre of the band) default to those of the unit
+    in its first net."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-s', '--system', dest='system', help='System name')
+    parser.add_option('-H', '--height', dest='height', type='float',
+        help='Antenna height (meters)')
+    parser.add_option('-f', '--frequency', dest='frequency', type='float',
+        default=None, help='Frequency (MHz, default: centre of the band of the net)')
+    parser.add_option('-r', '--radius', dest='radius', type='float',
+        default=DEFAULT_RADIUS, help='Radius (meters)')
+    parser.add_option('-t', '--tile-size', dest='tile_size', type='int',
+        default=DEFAULT_TILE_SIZE, help='Tile size (grid points)')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', default=None,
+        help='Number of worker processes (default: CPUs)')
+    options, args = parser.parse_args(args)
+    if len(args) != 4:
+        parser.print_help()
+        return 2
+    report_filename, map_filename, name, output_filename = args
+    report = reportcache.parse_report(report_filename)
+    if name not in report.units:
+        raise ValueError, "Unknown unit: %s" % name
+    system_name, height = options.system, options.height
+    if system_name is None or height is None:
+        default_system, default_height = get_unit_system(report, name)
+        system_name = (system_name or default_system)
+        height = (default_height if height is None else height)
+    frequency = options.frequency
+    if frequency is None:
+        frequency = linkbudget.get_net_frequency(get_unit_net(report, name),
+            DEFAULT_FREQUENCY)
+    coverage = get_coverage(mapfile.open_map(map_filename),
+        report.units[name].location_coords, report.systems[system_name],
+        height, frequency, options.radius, tile_size=options.tile_size,
+        processes=options.jobs)
+    save_coverage(output_filename, coverage)
+    print "--- Bounds: %s" % (coverage.bounds,)
+    print "--- Size: %dx%d" % coverage.levels.shape[::-1]
+    print "--- Covered: %0.1f%%" % (100.0 * get_covered_ratio(coverage))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
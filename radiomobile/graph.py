@@ -0,0 +1,330 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Network graph of a parsed report: units are vertices and the links of all
+nets are edges, so nets are joined through the units they share.
+
+The adjacency is stored in CSR form (NumPy arrays indptr, indices and
+edge attributes quality/distance, one entry for each direction of each
+link). When two nets link the same pair of units, the edge keeps the best
+quality and the shortest distance. Links without quality (i.e. from .net
+files) have quality 0.
+
+>>> graph = create_graph(report)
+>>> get_shortest_path(graph, "URPAY", "JOSJOJAHUARINA 2")
+(11360, ['URPAY', 'JOSJOJAHUARINA 1', 'JOSJOJAHUARINA 2'])
+>>> get_widest_path(graph, "URPAY", "JOSJOJAHUARINA 2")
+(50, ['URPAY', 'JOSJOJAHUARINA 1', 'JOSJOJAHUARINA 2'])
+>>> get_articulation_points(graph)
+['JOSJOJAHUARINA 1']
+"""
+import heapq
+import collections
+
+import numpy
+
+from radiomobile import Struct
+
+def create_graph(report):
+    """Return a Graph struct (names, index, indptr, indices, quality, distance)."""
+    names = list(report.units.keys())
+    index = dict((name, idx) for (idx, name) in enumerate(names))
+    edges = {}
+    for net in report.nets.itervalues():
+        for link in net.links:
+            node1, node2 = [index[name] for name in link.peers]
+            if node1 == node2:
+                continue
+            key = (min(node1, node2), max(node1, node2))
+            quality, distance = (link.quality or 0), link.distance
+            if key in edges:
+                old_quality, old_distance = edges[key]
+                quality = max(quality, old_quality)
+                distance = min(distance, old_distance)
+            edges[key] = (quality, distance)
+    return create_graph_from_edges(names, edges)
+
+def create_graph_from_edges(names, edges):
+    """
+    Return a Graph struct from a list of vertex names and a dictionary
+    {(index1, index2): (quality, distance)} of undirected edges.
+    """
+    nedges = len(edges)
+    pairs = numpy.array(edges.keys(), dtype=int).reshape(nedges, 2)
+    values = numpy.array(edges.values(), dtype=int).reshape(nedges, 2)
+    sources = numpy.concatenate([pairs[:, 0], pairs[:, 1]])
+    targets = numpy.concatenate([pairs[:, 1], pairs[:, 0]])
+    order = numpy.lexsort((targets, sources))
+    counts = numpy.bincount(sources, minlength=len(names))
+    indptr = numpy.concatenate([[0], numpy.cumsum(counts)]).astype(int)
+    return Struct("Graph",
+        names=names,
+        index=dict((name, idx) for (idx, name) in enumerate(names)),
+        indptr=indptr,
+        indices=targets[order],
+        quality=numpy.concatenate([values[:, 0], values[:, 0]])[order],
+        distance=numpy.concatenate([values[:, 1], values[:, 1]])[order])
+
+def get_adjacency_lists(graph, attribute=None):
+    """
+    Return list (one for each vertex) of lists of neighbours, or of pairs
+    (neighbour, value) if an edge attribute (quality/distance) is given.
+    """
+    indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+    if attribute:
+        values = getattr(graph, attribute).tolist()
+        return [zip(indices[start:end], values[start:end])
+            for (start, end) in zip(indptr[:-1], indptr[1:])]
+    return [indices[start:end] for (start, end) in zip(indptr[:-1], indptr[1:])]
+
+def _get_path(previous, target):
+    path = []
+    while target is not None:
+        path.append(target)
+        target = previous[target]
+    return path[::-1]
+
+def _best_first_search(graph, source, target, attribute, initial, combine, better):
+    """
+    Generic Dijkstra-like search. Costs start at initial for the source
+    and are extended with combine(cost, edge value); better(a, b) is True
+    if cost a is better than b. Return (cost, path of names), or
+    (None, []) if target is not reachable.
+    """
+    adjacency = get_adjacency_lists(graph, attribute)
+    start, end = graph.index[source], graph.index[target]
+    sign = (1 if better(0, 1) else -1)
+    costs = {start: initial}
+    previous = {start: None}
+    done = set()
+    queue = [(sign * initial, start)]
+    while queue:
+        cost, node = heapq.heappop(queue)
+        cost *= sign
+        if node in done:
+            continue
+        if node == end:
+            return (cost, [graph.names[idx] for idx in _get_path(previous, end)])
+        done.add(node)
+        for neighbour, value in adjacency[node]:
+            new_cost = combine(cost, value)
+            if neighbour not in done and (neighbour not in costs or
+                    better(new_cost, costs[neighbour])):
+                costs[neighbour] = new_cost
+                previous[neighbour] = node
+                heapq.heappush(queue, (sign * new_cost, neighbour))
+    return (None, [])
+
+def get_shortest_path(graph, source, target, weight="distance"):
+    """
+    Return tuple (cost, path) of the shortest path between two units, by
+    total distance (weight="distance") or number of links (weight="hops").
+    """
+    if weight == "hops":
+        return _best_first_search(graph, source, target, "distance", 0,
+            lambda cost, value: cost + 1, lambda a, b: a < b)
+    elif weight == "distance":
+        return _best_first_search(graph, source, target, "distance", 0,
+            lambda cost, value: cost + value, lambda a, b: a < b)
+    raise ValueError, "Unknown weight: %s" % weight
+
+def get_widest_path(graph, source, target):
+    """
+    Return tuple (bottleneck quality, path) of the path between two units
+    whose worst link has the best quality.
+    """
+    initial = max(graph.quality.max() if len(graph.quality) else 0, 0) + 1
+    cost, path = _best_first_search(graph, source, target, "quality", initial,
+        min, lambda a, b: a > b)
+    return ((cost if len(path) > 1 else None), path)
+
+def get_bottleneck_link(graph, path):
+    """Return tuple (quality, name1, name2) of the worst link of a path."""
+    adjacency = get_adjacency_lists(graph, "quality")
+    links = []
+    for name1, name2 in zip(path[:-1], path[1:]):
+        node1, node2 = graph.index[name1], graph.index[name2]
+        quality = dict(adjacency[node1])[node2]
+        links.append((quality, name1, name2))
+    return min(links)
+
+def _iter_dfs_lowpoints(adjacency):
+    """
+    Iterative DFS of all components. Yield tuples (node, parent, children,
+    low, discovery) for each node when it is finished.
+    """
+    nvertices = len(adjacency)
+    discovery = [-1] * nvertices
+    low = [0] * nvertices
+    counter = 0
+    for root in xrange(nvertices):
+        if discovery[root] >= 0:
+            continue
+        discovery[root] = low[root] = counter
+        counter += 1
+        stack = [(root, -1, iter(adjacency[root]))]
+        children = collections.defaultdict(list)
+        while stack:
+            node, parent, neighbours = stack[-1]
+            for neighbour in neighbours:
+                if discovery[neighbour] < 0:
+                    discovery[neighbour] = low[neighbour] = counter
+                    counter += 1
+                    children[node].append(neighbour)
+                    stack.append((neighbour, node, iter(adjacency[neighbour])))
+                    break
+                elif neighbour != parent:
+                    low[node] = min(low[node], discovery[neighbour])
+            else:
+                stack.pop()
+                if parent >= 0:
+                    low[parent] = min(low[parent], low[node])
+                yield (node, parent, children[node], low, discovery)
+
+def get_articulation_points(graph):
+    """Return sorted list of units whose failure disconnects the network."""
+    points = set()
+    for node, parent, children, low, discovery in \
+            _iter_dfs_lowpoints(get_adjacency_lists(graph)):
+        if parent < 0:
+            if len(children) > 1:
+                points.add(node)
+        elif any(low[child] >= discovery[node] for child in children):
+            points.add(node)
+    return sorted(graph.names[node] for node in points)
+
+def get_bridges(graph):
+    """Return sorted list of links (pairs of units) whose failure disconnects the network."""
+    bridges = []
+    for node, parent, children, low, discovery in \
+            _iter_dfs_lowpoints(get_adjacency_lists(graph)):
+        for child in children:
+            if low[child] > discovery[node]:
+                bridges.append(tuple(sorted([graph.names[node], graph.names[child]])))
+    return sorted(bridges)
+
+def get_components(graph):
+    """Return list of connected components (lists of units), largest first."""
+    adjacency = get_adjacency_lists(graph)
+    component = [-1] * len(adjacency)
+    components = []
+    for root in xrange(len(adjacency)):
+        if component[root] >= 0:
+            continue
+        component[root] = len(components)
+        members, queue = [root], collections.deque([root])
+        while queue:
+            for neighbour in adjacency[queue.popleft()]:
+                if component[neighbour] < 0:
+                    component[neighbour] = len(components)
+                    members.append(neighbour)
+                    queue.append(neighbour)
+        components.append([graph.names[node] for node in members])
+    return sorted(components, key=len, reverse=True)
+
+def _get_reverse_edges(graph):
+    """Return array with the position of the opposite direction of each edge."""
+    nvertices = len(graph.indptr) - 1
+    sources = numpy.repeat(numpy.arange(nvertices), numpy.diff(graph.indptr))
+    keys = sources * nvertices + graph.indices
+    return numpy.searchsorted(keys, graph.indices * nvertices + sources)
+
+def _count_disjoint_paths(indptr, indices, reverse, start, end, limit, skip=-1):
+    """
+    Max-flow with unit vertex capacities from start to end on the CSR lists,
+    ignoring edge position skip (in both directions). Vertex v is split into
+    v_in (2v) and v_out (2v+1): flow[e] is the flow of edge e (u_out -> v_in)
+    and through[v] the flow from v_in to v_out.
+    """
+    nstates = 2 * (len(indptr) - 1)
+    flow = [0] * len(indices)
+    through = [0] * (len(indptr) - 1)
+    skipped = ((skip, reverse[skip]) if skip >= 0 else ())
+    source_out, target_in = 2 * start + 1, 2 * end
+    paths = 0
+    while limit is None or paths < limit:
+        previous = [-1] * nstates
+        via = [-1] * nstates
+        previous[source_out] = source_out
+        queue = collections.deque([source_out])
+        while queue and previous[target_in] < 0:
+            state = queue.popleft()
+            node = state >> 1
+            if state & 1:
+                for edge in xrange(indptr[node], indptr[node + 1]):
+                    following = 2 * indices[edge]
+                    if (previous[following] < 0 and not flow[edge] and
+                            edge not in skipped):
+                        previous[following], via[following] = state, edge
+                        queue.append(following)
+                if through[node] and previous[state - 1] < 0:
+                    previous[state - 1] = state
+                    queue.append(state - 1)
+            else:
+                if not through[node] and previous[state + 1] < 0:
+                    previous[state + 1] = state
+                    queue.append(state + 1)
+                for edge in xrange(indptr[node], indptr[node + 1]):
+                    following, back = 2 * indices[edge] + 1, reverse[edge]
+                    if previous[following] < 0 and flow[back]:
+                        previous[following], via[following] = state, back
+                        queue.append(following)
+        if previous[target_in] < 0:
+            break
+        state = target_in
+        while state != source_out:
+            last = previous[state]
+            if via[state] >= 0:
+                flow[via[state]] = last & 1
+            else:
+                through[state >> 1] = state & 1
+            state = last
+        paths += 1
+    return paths
+
+def get_local_connectivity(graph, source, target, limit=None):
+    """
+    Return the number of vertex-disjoint paths between two (non-adjacent)
+    units (max-flow with unit capacities), stopping when limit is reached.
+    For adjacent units the direct link counts as one path.
+    """
+    return _count_disjoint_paths(graph.indptr.tolist(), graph.indices.tolist(),
+        _get_reverse_edges(graph).tolist(), graph.index[source],
+        graph.index[target], limit)
+
+def is_k_connected(graph, k):
+    """
+    Return True if the network stays connected after removing any k-1
+    units. Vertices with less than k links and k <= 2 are checked in
+    linear time (degrees, articulation points), larger values with Even's
+    algorithm (k x n max-flows, stopping at the first pair that fails).
+    """
+    nvertices = len(graph.names)
+    if nvertices <= k:
+        return False
+    if nvertices and numpy.diff(graph.indptr).min() < k:
+        return False
+    if len(get_components(graph)) > 1:
+        return False
+    if k <= 1:
+        return True
+    if get_articulation_points(graph):
+        return False
+    if k == 2:
+        return True
+    indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+    reverse = _get_reverse_edges(graph).tolist()
+    for i in xrange(k):
+        edges = dict((indices[edge], edge)
+            for edge in xrange(indptr[i], indptr[i + 1]))
+        for j in xrange(i + 1, nvertices):
+            if j in edges:
+                # Paths avoiding the direct link (plus the link itself)
+                paths = 1 + _count_disjoint_paths(indptr, indices, reverse,
+                    i, j, k - 1, edges[j])
+            else:
+                paths = _count_disjoint_paths(indptr, indices, reverse,
+                    i, j, k)
+            if paths < k:
+                return False
+    return True
@@ -0,0 +1,136 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Incremental parsing of Radiomobile report.txt files.
+
+Sections (delimited by "---" lines) and net blocks (separated by two
+blank lines) are hashed, and only those that changed since the previous
+parse are parsed again. Nets whose block did not change are reparsed
+anyway if any of their members changed (link distances depend on the
+units). Hashes are kept in the report (_section_hashes), so a report
+returned by parse_report_incremental can be passed as previous report
+in the next call. The diff tells which units, systems and nets were
+added, removed or changed:
+
+>>> report, diff = parse_report_incremental("report.txt")
+>>> # ... report.txt is edited and exported again ...
+>>> report, diff = parse_report_incremental("report.txt", report)
+>>> diff.nets.changed
+['2. Josjo1 AP - Huiracochan, Ur']
+"""
+import hashlib
+
+import radiomobile
+from radiomobile import Struct, odict
+
+def get_hash(lines):
+    """Return hash of a list of lines."""
+    return hashlib.sha1("\n".join(lines)).hexdigest()
+
+def split_report(lines):
+    """
+    Split lines of a report.txt and return a ReportSections struct with the
+    raw lines of each section: header, general_information, units, systems
+    and nets (list of net blocks).
+    """
+    is_separator = lambda s: s.startswith("---")
+    groups = radiomobile.split_iter((line.rstrip("\r\n") for line in lines),
+        is_separator)
+    sections = Struct("ReportSections", header=list(groups.next()),
+        general_information=[], units=[], systems=[], nets=[])
+    for title, section in radiomobile.grouper(2, groups, ()):
+        title = list(title)
+        if not title:
+            break
+        key = radiomobile.keyify(title[0])
+        section = list(section)
+        if key == "general_information":
+            sections.general_information = section
+        elif key == "active_units_information":
+            sections.units = section
+        elif key == "systems":
+            sections.systems = section
+        elif key == "active_nets_information":
+            sections.nets = list(radiomobile.split_iter_of_consecutive(section,
+                lambda s: not s.strip(), 2))
+    return sections
+
+def get_changes(old, new, is_equal):
+    """
+    Return a Changes struct (added, removed, changed: lists of keys) between
+    two ordered dictionaries. Values are compared with is_equal(old, new).
+    """
+    return Struct("Changes",
+        added=[key for key in new if key not in old],
+        removed=[key for key in old if key not in new],
+        changed=[key for key in new if key in old and
+            not is_equal(old[key], new[key])])
+
+# Attributes derived from other units, not compared (location_meters is
+# relative to the first unit, so it changes for all units if it moves)
+DERIVED_ATTRIBUTES = ["location_meters"]
+
+def _is_same_record(record1, record2):
+    def _get_attributes(record):
+        return dict((key, value) for (key, value) in record._asdict().iteritems()
+            if key not in DERIVED_ATTRIBUTES)
+    return record1 is record2 or _get_attributes(record1) == _get_attributes(record2)
+
+def _is_same_net(net1, net2):
+    return net1 is net2 or repr(net1) == repr(net2)
+
+def _parse_table_section(lines, parse, decimal_separator):
+    return (parse(lines, decimal_separator) if lines else odict())
+
+def parse_report_incremental(filename, previous=None):
+    """
+    Parse a report.txt reusing the unchanged parts of a previous report (as
+    returned by this function) and return a pair (report, diff). The diff is
+    a ReportDiff struct with units, systems and nets Changes structs.
+    """
+    with open(filename) as fd:
+        sections = split_report(fd)
+    old_hashes = (getattr(previous, "_section_hashes", None) or
+        dict(units=None, systems=None, nets={}))
+    old_units = (previous.units if previous else odict())
+    old_systems = (previous.systems if previous else odict())
+    old_nets = (previous.nets if previous else odict())
+    hashes = dict(units=get_hash(sections.units),
+        systems=get_hash(sections.systems), nets={})
+    decimal_separator = radiomobile.detect_decimal_separator(
+        sections.units + sections.systems)
+
+    report = Struct("RadioMobileReport",
+        generated_on=radiomobile.parse_header(sections.header),
+        general_information=sections.general_information,
+        decimal_separator=decimal_separator)
+    if hashes["units"] == old_hashes["units"]:
+        report.units = old_units
+    else:
+        report.units = _parse_table_section(sections.units,
+            radiomobile.parse_active_units, decimal_separator)
+    if hashes["systems"] == old_hashes["systems"]:
+        report.systems = old_systems
+    else:
+        report.systems = _parse_table_section(sections.systems,
+            radiomobile.parse_systems, decimal_separator)
+    units_diff = get_changes(old_units, report.units, _is_same_record)
+    changed_units = set(units_diff.removed + units_diff.changed)
+
+    report.nets = odict()
+    for block in sections.nets:
+        block_hash = get_hash(block)
+        name = old_hashes["nets"].get(block_hash)
+        if name in old_nets and not changed_units.intersection(old_nets[name].net_members):
+            net = old_nets[name]
+        else:
+            net = radiomobile.parse_net(block, report.units, decimal_separator)
+        report.nets[net.name] = net
+        hashes["nets"][block_hash] = net.name
+    report._section_hashes = hashes
+
+    diff = Struct("ReportDiff",
+        units=units_diff,
+        systems=get_changes(old_systems, report.systems, _is_same_record),
+        nets=get_changes(old_nets, report.nets, _is_same_net))
+    return report, diff
@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Terrain path profiles and link budgets for Radiomobile units.
+
+Path loss is the free-space loss plus the single knife-edge diffraction
+loss (ITU-R P.526) of the worst obstacle of the profile, taking into
+account the earth curvature (effective radius factor k).
+
+All calculations are vectorized with NumPy: get_link_budgets evaluates
+many links at once (one row for each link), get_link_budget is a wrapper
+for a single pair of units.
+
+>>> report = radiomobile.parse_report("report.txt")
+>>> rmap = mapfile.open_map("map.map")
+>>> budget = get_link_budget(report.units["URPAY"], report.systems["wifi"],
+...     report.units["HUIRACOCHAN"], report.systems["wifi"],
+...     frequency=2400.0, heights=(5.0, 12.0), rmap=rmap)
+>>> budget.margin
+"""
+import math
+
+import numpy
+
+import radiomobile
+import mapfile
+from radiomobile import Struct
+
+EARTH_RADIUS = 6371000.0
+SPEED_OF_LIGHT = 299792458.0
+DEFAULT_K_FACTOR = 4.0 / 3
+DEFAULT_SAMPLES = 256
+
+def get_system_params(system):
+    """
+    Return tuple (tx_power (dBm), loss (dB), gain (dBi), rx_threshold (dBm))
+    for a parsed system (rx_thr is negative, see radiomobile.get_rx_threshold).
+    Values given as strings with units ("0.200W") are also accepted.
+    """
+    tx_power = getattr(system, "tx_power", None)
+    if tx_power is None:
+        tx_power = radiomobile.get_dbm_from_watts(radiomobile.get_number(system.pwr_tx))
+    loss = radiomobile.get_number(system.loss)
+    gain = radiomobile.get_number(system.ant_g)
+    rx_threshold = radiomobile.get_number(system.rx_thr)
+    return (tx_power, loss, gain, rx_threshold)
+
+def get_net_frequency(network, default=None):
+    """Return the centre frequency (MHz) of the band of a net (default if unknown)."""
+    frequency_range = getattr(network, "frequency_range", None)
+    if not frequency_range:
+        return default
+    return sum(frequency_range) / 2.0
+
+def get_terrain_profiles(rmap, coords1, coords2, samples=DEFAULT_SAMPLES):
+    """
+    Return a Profiles struct (distances: N, elevations: N x samples) with the
+    terrain profiles between two arrays of N (lat, lon) coordinates.
+    """
+    coords1 = numpy.atleast_2d(numpy.asarray(coords1, dtype=float))
+    coords2 = numpy.atleast_2d(numpy.asarray(coords2, dtype=float))
+    steps = numpy.linspace(0.0, 1.0, samples)[numpy.newaxis, :, numpy.newaxis]
+    points = coords1[:, numpy.newaxis, :] + \
+        steps * (coords2 - coords1)[:, numpy.newaxis, :]
+    elevations = mapfile.get_elevation(rmap, points).astype(float)
+    distances = radiomobile.get_distances(coords1, coords2).astype(float)
+    return Struct("Profiles", distances=distances, elevations=elevations)
+
+def get_flat_profiles(elevations1, elevations2, distances, samples=DEFAULT_SAMPLES):
+    """Return a Profiles struct with straight terrain between two elevations."""
+    elevations1 = numpy.atleast_1d(numpy.asarray(elevations1, dtype=float))
+    elevations2 = numpy.atleast_1d(numpy.asarray(elevations2, dtype=float))
+    steps = numpy.linspace(0.0, 1.0, samples)[numpy.newaxis, :]
+    elevations = elevations1[:, numpy.newaxis] + \
+        steps * (elevations2 - elevations1)[:, numpy.newaxis]
+    distances = numpy.atleast_1d(numpy.asarray(distances, dtype=float))
+    return Struct("Profiles", distances=distances, elevations=elevations)
+
+def get_diffraction_loss(v):
+    """Return knife-edge diffraction loss (dB) for Fresnel-Kirchhoff parameter v."""
+    v = numpy.asarray(v, dtype=float)
+    loss = 6.9 + 20 * numpy.log10(numpy.sqrt((v - 0.1)**2 + 1) + v - 0.1)
+    return numpy.where(v > -0.78, loss, 0.0)
+
+def get_path_losses(profiles, heights1, heights2, frequency,
+        k_factor=DEFAULT_K_FACTOR):
+    """
+    Return a PathLoss struct with arrays (one value for each profile):
+    free_space_loss, diffraction_loss and path_loss (dB), and clearance
+    (minimum ratio between the clearance of the line of sight and the
+    radius of the first Fresnel zone, negative if obstructed).
+
+    Heights are the antenna heights (meters above ground), frequency in MHz.
+    """
+    distances, elevations = profiles.distances, profiles.elevations
+    samples = elevations.shape[1]
+    wavelength = SPEED_OF_LIGHT / (1e6 * frequency)
+    total = numpy.maximum(distances, 1.0)[:, numpy.newaxis]
+    steps = numpy.linspace(0.0, 1.0, samples)[numpy.newaxis, 1:-1]
+    d1 = steps * total
+    d2 = total - d1
+    tx = elevations[:, :1] + numpy.asarray(heights1, dtype=float).reshape(-1, 1)
+    rx = elevations[:, -1:] + numpy.asarray(heights2, dtype=float).reshape(-1, 1)
+    line_of_sight = tx + steps * (rx - tx)
+    bulge = d1 * d2 / (2 * k_factor * EARTH_RADIUS)
+    obstacle = elevations[:, 1:-1] + bulge - line_of_sight
+    fresnel_radius = numpy.sqrt(wavelength * d1 * d2 / total)
+    ratios = obstacle / fresnel_radius
+
+    free_space_loss = 20 * numpy.log10(numpy.maximum(distances, 1.0) / 1000.0) + \
+        20 * numpy.log10(frequency) + 32.44
+    if samples > 2:
+        clearance = -ratios.max(axis=1)
+        diffraction_loss = get_diffraction_loss(math.sqrt(2) * -clearance)
+    else:
+        clearance = numpy.repeat(numpy.inf, len(distances))
+        diffraction_loss = numpy.zeros(len(distances))
+    return Struct("PathLoss",
+        free_space_loss=free_space_loss,
+        diffraction_loss=diffraction_loss,
+        path_loss=free_space_loss + diffraction_loss,
+        clearance=clearance)
+
+def get_link_budgets(profiles, heights1, heights2, frequency,
+        eirp, rx_gain, rx_threshold, k_factor=DEFAULT_K_FACTOR):
+    """
+    Evaluate link budgets for a batch of profiles. EIRP (transmitter power
+    minus losses plus antenna gain, dBm), rx_gain (receiver antenna gain minus
+    losses, dB) and rx_threshold (dBm) are scalars or arrays (one value for
+    each link). Return a LinkBudget struct of arrays: the fields of the
+    PathLoss struct plus distance, rx_power and margin.
+    """
+    losses = get_path_losses(profiles, heights1, heights2, frequency, k_factor)
+    rx_power = numpy.asarray(eirp) - losses.path_loss + numpy.asarray(rx_gain)
+    return Struct("LinkBudget",
+        distance=profiles.distances,
+        free_space_loss=losses.free_space_loss,
+        diffraction_loss=losses.diffraction_loss,
+        path_loss=losses.path_loss,
+        clearance=losses.clearance,
+        rx_power=rx_power,
+        margin=rx_power - numpy.asarray(rx_threshold))
+
+def get_link_budget(unit1, system1, unit2, system2, frequency, heights,
+        rmap=None, samples=DEFAULT_SAMPLES, k_factor=DEFAULT_K_FACTOR):
+    """
+    Return LinkBudget struct (with scalar values) from unit1 (transmitter) to
+    unit2 (receiver). Without an elevation map (see mapfile.open_map), the
+    terrain is assumed to be straight between the elevations of the units.
+    """
+    tx_power, tx_loss, tx_gain, _ = get_system_params(system1)
+    _, rx_loss, rx_gain, rx_threshold = get_system_params(system2)
+    coords1, coords2 = unit1.location_coords, unit2.location_coords
+    if rmap is None:
+        distance = radiomobile.get_distance(coords1, coords2)
+        profiles = get_flat_profiles(unit1.elevation, unit2.elevation,
+            distance, samples)
+    else:
+        profiles = get_terrain_profiles(rmap, coords1, coords2, samples)
+    height1, height2 = heights
+    budget = get_link_budgets(profiles, height1, height2, frequency,
+        eirp=tx_power - tx_loss + tx_gain,
+        rx_gain=rx_gain - rx_loss,
+        rx_threshold=rx_threshold,
+        k_factor=k_factor)
+    for key, value in vars(budget).items():
+        if not key.startswith("_"):
+            setattr(budget, key, float(value[0]))
+    return budget
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Read Radio Mobile .map elevation files.
+
+The elevation grid is memory-mapped, so only the pages touched by point
+lookups or window reads are actually loaded from disk. Known layout
+(little-endian):
+
+- 0x00: float32 (unknown), int32 width, int32 height, float32 centre
+        longitude, float32 centre latitude.
+- 0x22: float32 minimum and maximum elevation (meters).
+- 0x3e: float32 corner longitudes (NW, NE, SE, SW).
+- 0x4e: float32 corner latitudes (NW, NE, SE, SW).
+- 0x60: int16 elevations (meters, 0 = no data), width x height, row-major
+        with the southernmost row first.
+
+>>> rmap = open_map("cusco-ne.map")
+>>> rmap.elevations.shape
+(718, 1421)
+>>> get_elevation(rmap, (-9.266944, -74.948055))
+217
+"""
+import os
+import sys
+import struct
+
+import numpy
+
+from radiomobile import Struct, debug
+
+HEADER_SIZE = 0x60
+
+def open_map(filename):
+    """
+    Open a Radio Mobile .map file and return a Map struct. Its elevations
+    attribute is a zero-copy view of the memory-mapped grid (north-up: row 0
+    is the northernmost row, column 0 the westernmost). Bounds are given as
+    ((south, west), (north, east)).
+    """
+    with open(filename, "rb") as fd:
+        header = fd.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE:
+        raise ValueError, "Map file too short: %s" % filename
+    _unknown, width, height, centre_lon, centre_lat = \
+        struct.unpack_from("<f2i2f", header, 0)
+    min_elevation, max_elevation = struct.unpack_from("<2f", header, 0x22)
+    lons = struct.unpack_from("<4f", header, 0x3e)
+    lats = struct.unpack_from("<4f", header, 0x4e)
+    if width <= 1 or height <= 1:
+        raise ValueError, "Wrong map dimensions: %dx%d" % (width, height)
+    if os.path.getsize(filename) < HEADER_SIZE + 2 * width * height:
+        raise ValueError, "Map file truncated: %s" % filename
+    grid = numpy.memmap(filename, dtype="<i2", mode="r",
+        offset=HEADER_SIZE, shape=(height, width))
+    bounds = ((min(lats), min(lons)), (max(lats), max(lons)))
+    return Struct("Map",
+        filename=filename,
+        width=width,
+        height=height,
+        centre=(centre_lat, centre_lon),
+        bounds=bounds,
+        min_elevation=min_elevation,
+        max_elevation=max_elevation,
+        elevations=grid[::-1])
+
+def get_map_index(rmap, coordinates):
+    """
+    Return the (row, column) of the nearest grid point for (lat, lon)
+    coordinates. Arrays of coordinates return arrays of indexes.
+    """
+    coordinates = numpy.asarray(coordinates, dtype=float)
+    lat, lon = coordinates[..., 0], coordinates[..., 1]
+    (south, west), (north, east) = rmap.bounds
+    if numpy.any((lat < south) | (lat > north) | (lon < west) | (lon > east)):
+        raise ValueError, "Coordinates out of map bounds: %s" % (rmap.bounds,)
+    row = numpy.rint((north - lat) / (north - south) * (rmap.height - 1))
+    column = numpy.rint((lon - west) / (east - west) * (rmap.width - 1))
+    return (row.astype(int), column.astype(int))
+
+def get_map_coordinates(rmap, row, column):
+    """Return the (lat, lon) coordinates of a grid point (inverse of get_map_index)."""
+    (south, west), (north, east) = rmap.bounds
+    lat = north - (north - south) * numpy.asarray(row, dtype=float) / (rmap.height - 1)
+    lon = west + (east - west) * numpy.asarray(column, dtype=float) / (rmap.width - 1)
+    return (lat, lon)
+
+def get_elevation(rmap, coordinates):
+    """Return elevation (meters) at (lat, lon) coordinates (or array of them)."""
+    row, column = get_map_index(rmap, coordinates)
+    elevation = rmap.elevations[row, column]
+    return (int(elevation) if numpy.ndim(elevation) == 0 else numpy.asarray(elevation))
+
+def get_window(rmap, corner1, corner2):
+    """
+    Return pair (elevations, bounds) for the window of the map which contains
+    two (lat, lon) corners. Elevations are a view, nothing is copied.
+    """
+    rows, columns = get_map_index(rmap, [corner1, corner2])
+    row1, row2 = sorted(rows)
+    column1, column2 = sorted(columns)
+    lats, lons = get_map_coordinates(rmap, [row2, row1], [column1, column2])
+    bounds = ((float(lats[0]), float(lons[0])), (float(lats[1]), float(lons[1])))
+    return (rmap.elevations[row1:row2+1, column1:column2+1], bounds)
+
+def main(args):
+    """Print basic information of a .map file."""
+    if len(args) != 1:
+        debug("Usage: %s MAP_PATH" % os.path.basename(sys.argv[0]))
+        return 2
+    map_filename, = args
+    rmap = open_map(map_filename)
+    print "--- Size: %dx%d" % (rmap.width, rmap.height)
+    print "--- Centre: %s" % (rmap.centre,)
+    print "--- Bounds: %s" % (rmap.bounds,)
+    print "--- Elevation: %d-%d" % (rmap.min_elevation, rmap.max_elevation)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
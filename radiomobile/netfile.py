@@ -0,0 +1,215 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Parse Radio Mobile binary .net files, so there is no need to export a
+report.txt first. The result has the same units/systems/nets structure
+returned by radiomobile.parse_report.
+
+Known layout (little-endian, fixed-size records):
+
+- Header: float32 (version), int16 number of nets, int16 number of units,
+  int16 number of systems (nets and systems are both 25 in the known
+  samples, so their relative order is a guess).
+- Units (44 bytes each): float32 longitude, latitude and elevation, 12 bytes
+  of flags/style and the name (20 chars).
+- Systems (50 bytes each): float32 power (W), receiver threshold (dBm),
+  loss (dB), antenna gain (dBi) and antenna height (m), and the name
+  (30 chars).
+- Membership (1 byte for each unit/net pair): bit 7 is set if the unit
+  is a member of the net, bits 0-6 are the role index.
+- Member systems (int16 for each unit/net pair): 1-based system index.
+- Nets (72 bytes each): float32 minimum and maximum frequencies (MHz),
+  int16 polarization, float32 ground permittivity, conductivity (S/m) and
+  surface refractivity (N-units), int16 climate, int16 variability mode,
+  float32 % of time, locations and situations, int16 (unknown), uint8
+  active flag, uint8 topology and the name (30 chars).
+
+Link qualities are calculated by Radio Mobile when the report is exported,
+they are not stored in the .net file (quality and max_quality are None).
+
+>>> report = parse_net_file("cusco-ne.net")
+>>> report.units
+>>> report.systems
+>>> report.nets
+"""
+import os
+import sys
+import struct
+import itertools
+from datetime import datetime
+
+import radiomobile
+from radiomobile import Struct, Unit, System, NetMember, Link, debug
+from odict import odict
+
+HEADER = struct.Struct("<f3h")
+UNIT = struct.Struct("<3f2h2i20s")
+SYSTEM = struct.Struct("<5f30s")
+NET = struct.Struct("<2fh3f2h3fh2B30s")
+
+# Role names for each topology, indexed by the role index of a member
+TOPOLOGY_ROLES = {
+    0: ["Command", "Subordinate", "Rebroadcast"],
+    1: ["Master", "Slave"],
+    2: ["Node", "Terminal"],
+}
+
+# Names of topologies, polarizations and climates (ITM codes) as in reports
+TOPOLOGIES = {1: "Star", 2: "Cluster"}
+POLARIZATIONS = {0: "Horizontal", 1: "Vertical"}
+CLIMATES = {
+    1: "Equatorial",
+    2: "Continental subtropical",
+    3: "Maritime subtropical",
+    4: "Desert",
+    5: "Continental temperate",
+    6: "Maritime temperate over land",
+    7: "Maritime temperate over sea",
+}
+
+def get_net_properties(record):
+    """Return dictionary of net properties (see radiomobile.parse_net) for a net record."""
+    (frequency1, frequency2, polarization, permittivity, conductivity, 
+        refractivity, climate) = record[:7]
+    topology = record[-2]
+    return dict(
+        topology=TOPOLOGIES.get(topology),
+        frequency_range=(round(frequency1, 3), round(frequency2, 3)),
+        polarization=POLARIZATIONS.get(polarization),
+        refractivity=round(refractivity, 3),
+        conductivity=round(conductivity, 6),
+        permittivity=round(permittivity, 3),
+        climate=CLIMATES.get(climate))
+
+def get_name(data):
+    """Return name from a fixed-size (space/null padded) string."""
+    return data.rstrip(" \0")
+
+def iter_records(record, data, offset, count):
+    """Yield count unpacked records starting at offset."""
+    for index in range(count):
+        yield record.unpack_from(data, offset + index * record.size)
+
+def get_role(topology, role_index):
+    """Return role name for a role index in a net topology."""
+    roles = TOPOLOGY_ROLES.get(topology, [])
+    return (roles[role_index] if role_index < len(roles) else "Role %d" % role_index)
+
+def parse_net_data(data):
+    """Parse the contents of a .net file and return a RadioMobileReport struct."""
+    if len(data) < HEADER.size:
+        raise ValueError, "Net file too short"
+    version, nnets, nunits, nsystems = HEADER.unpack_from(data, 0)
+    offset = HEADER.size
+    unit_records = list(iter_records(UNIT, data, offset, nunits))
+    offset += nunits * UNIT.size
+    system_records = list(iter_records(SYSTEM, data, offset, nsystems))
+    offset += nsystems * SYSTEM.size
+    membership = struct.unpack_from("<%dB" % (nunits * nnets), data, offset)
+    offset += nunits * nnets
+    member_systems = struct.unpack_from("<%dh" % (nunits * nnets), data, offset)
+    offset += 2 * nunits * nnets
+    net_records = list(iter_records(NET, data, offset, nnets))
+
+    systems = odict()
+    heights = []
+    for pwr_tx, rx_thr, loss, ant_g, height, name in system_records:
+        name = get_name(name)
+        systems[name] = System(
+            name=name,
+            pwr_tx=round(pwr_tx, 3),
+            loss=round(loss, 1),
+            loss_plus=None,
+            rx_thr=radiomobile.get_rx_threshold(round(rx_thr, 1)),
+            ant_g=round(ant_g, 1),
+            ant_type=None,
+            tx_power=radiomobile.get_dbm_from_watts(round(pwr_tx, 3)))
+        heights.append(height)
+    system_names = systems.keys()
+
+    # Active nets and their members (unit index, role index, system index)
+    active_nets = []
+    for net_index, record in enumerate(net_records):
+        active, topology, name = record[-3:]
+        if not active:
+            continue
+        members = []
+        for unit_index in range(nunits):
+            value = membership[unit_index * nnets + net_index]
+            if value & 0x80:
+                system_index = member_systems[unit_index * nnets + net_index] - 1
+                members.append((unit_index, value & 0x7f, system_index))
+        active_nets.append((get_name(name), record, members))
+
+    # Units (only those that are members of an active net, as in reports)
+    active_units = set(unit_index for (name, record, members) in active_nets
+        for (unit_index, role_index, system_index) in members)
+    units = odict()
+    for unit_index, record in enumerate(unit_records):
+        if unit_index not in active_units:
+            continue
+        lon, lat, elevation = record[:3]
+        name = get_name(record[-1])
+        coords = (lat, lon)
+        location = "%s %s" % (radiomobile.get_string_from_lat_lon(coords),
+            radiomobile.get_locator(coords))
+        units[name] = Unit(name=name, location=location,
+            elevation=int(elevation), location_coords=coords)
+    radiomobile.set_units_positions(units)
+
+    nets = odict()
+    for name, record, members in active_nets:
+        topology = record[-2]
+        net_members = odict()
+        for unit_index, role_index, system_index in members:
+            unit_name = get_name(unit_records[unit_index][-1])
+            net_members[unit_name] = NetMember(
+                net_members=unit_name,
+                role=get_role(topology, role_index),
+                system=system_names[system_index],
+                antenna=round(heights[system_index], 1))
+        links = []
+        for (index1, role1, _), (index2, role2, _) in \
+                itertools.combinations(members, 2):
+            if role1 != 0 and role2 != 0:
+                continue
+            name1, name2 = [get_name(unit_records[idx][-1]) for idx in (index1, index2)]
+            distance = radiomobile.get_distance(units[name1].location_coords,
+                units[name2].location_coords)
+            links.append(Link(peers=(name1, name2),
+                quality=None, distance=distance))
+        nets[name] = Struct("Network", name=name,
+            net_members=net_members,
+            links=links,
+            max_quality=None,
+            **get_net_properties(record))
+
+    return Struct("RadioMobileReport",
+        units=units,
+        systems=systems,
+        nets=nets)
+
+def parse_net_file(filename):
+    """Read and parse a Radio Mobile .net file."""
+    with open(filename, "rb") as fd:
+        report = parse_net_data(fd.read())
+    report.generated_on = datetime.fromtimestamp(os.path.getmtime(filename))
+    report.general_information = ["Net file      %s" % filename]
+    return report
+
+def main(args):
+    """Print basic information of a .net file."""
+    if len(args) != 1:
+        debug("Usage: %s NET_PATH" % os.path.basename(sys.argv[0]))
+        return 2
+    net_filename, = args
+    report = parse_net_file(net_filename)
+    print "--- Units:"
+    report.units.pprint()
+    print "--- Systems:"
+    report.systems.pprint()
+    print "--- Nets:"
+    report.nets.pprint()
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,49 +1,100 @@
 """
 Simple Ordered Dictionary.
 
-See http://code.activestate.com/recipes/496761/
+Based on http://code.activestate.com/recipes/496761/, but deletion is O(1):
+removed keys leave a hole in the list of keys, which is compacted when
+there are too many of them.
 """
 from UserDict import DictMixin
 from pprint import pformat
 
-class odict(DictMixin):    
+_deleted = object()
+
+class odict(DictMixin):
     def __init__(self, items=None):
         self._keys = []
+        self._positions = {}
         self._data = {}
         for key, value in (items or []):
             self[key] = value
-        
+
     def __setitem__(self, key, value):
         if key not in self._data:
+            self._positions[key] = len(self._keys)
             self._keys.append(key)
         self._data[key] = value
-                
+
     def __getitem__(self, key):
-        return self._data[key]    
-    
+        return self._data[key]
+
     def __delitem__(self, key):
         del self._data[key]
-        self._keys.remove(key)
-        
+        self._keys[self._positions.pop(key)] = _deleted
+        if len(self._keys) > 2 * len(self._data) + 8:
+            self._compact()
+
+    def _compact(self):
+        self._keys = list(self)
+        self._positions = dict((key, idx) for (idx, key) in enumerate(self._keys))
+
+    def __iter__(self):
+        for key in self._keys:
+            if key is not _deleted:
+                yield key
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def has_key(self, key):
+        return key in self._data
+
+    def iteritems(self):
+        data = self._data
+        for key in self:
+            yield (key, data[key])
+
+    def itervalues(self):
+        data = self._data
+        for key in self:
+            yield data[key]
+
+    def iterkeys(self):
+        return iter(self)
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def __getstate__(self):
+        return self.items()
+
+    def __setstate__(self, items):
+        self.__init__(items)
+
     def __repr__(self):
         result = []
-        for key in self._keys:
-            result.append('(%s, %s)' % (repr(key), repr(self._data[key])))
+        for key, value in self.iteritems():
+            result.append('(%s, %s)' % (repr(key), repr(value)))
         return ''.join(['OrderedDict', '([', ', '.join(result), '])'])
-  
-    def pprint(self):
+
+    def pformat(self):
         info = pformat(self.items())
         template = ("OrderedDict(\n%s\n)" if "\n" in info else "OrderedDict(%s)")
-        print template % info
+        return template % info
+
+    def pprint(self):
+        print self.pformat()
 
     #def getslice(*slice_args):
     #    return [for key in self.keys()[slice(*alice_args)]
-                  
+
     def keys(self):
-        return list(self._keys)
-        
+        return list(self)
+
     def copy(self):
-        copyDict = odict()
-        copyDict._data = self._data.copy()
-        copyDict._keys = self._keys[:]
-        return copyDict
+        return odict(self.iteritems())
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Named timers and counters for the stages of parsing and network building.
+
+Instrumentation is disabled by default: timer() then returns a shared
+do-nothing context manager and count() returns at once, so the stages can
+stay instrumented in the hot paths. Once enabled, times (wall-clock
+seconds and number of calls) and counters are accumulated by name in the
+order they are first seen:
+
+>>> profiling.enable()
+>>> report = radiomobile.parse_report("report.txt")
+>>> sys.stderr.write(profiling.format_stats())
+
+Command-line tools add the options of add_profile_options and call their
+main function through run_profiled, which prints the stage breakdown and/or
+writes a JSON (.json) or cProfile (any other extension) file.
+"""
+import sys
+import json
+import time
+import cProfile
+
+from odict import odict
+
+enabled = False
+
+# {name: [calls, seconds]}
+timers = odict()
+
+# {name: value}
+counters = odict()
+
+class _Timer(object):
+    """Context manager that adds the time spent in its block to a timer."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        add_time(self.name, time.time() - self.start)
+
+class _NullTimer(object):
+    """Context manager used when instrumentation is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_null_timer = _NullTimer()
+
+def enable():
+    """Enable instrumentation."""
+    global enabled
+    enabled = True
+
+def disable():
+    """Disable instrumentation (accumulated stats are kept)."""
+    global enabled
+    enabled = False
+
+def reset():
+    """Clear all timers and counters."""
+    timers.clear()
+    counters.clear()
+
+def timer(name):
+    """Return a context manager that times its block as stage name."""
+    return (_Timer(name) if enabled else _null_timer)
+
+def add_time(name, seconds):
+    """Add a call of seconds to timer name."""
+    if name not in timers:
+        timers[name] = [0, 0.0]
+    stats = timers[name]
+    stats[0] += 1
+    stats[1] += seconds
+
+def count(name, value=1):
+    """Increment counter name by value (only if instrumentation is enabled)."""
+    if enabled:
+        counters[name] = counters.get(name, 0) + value
+
+def get_stats():
+    """
+    Return dictionary with timers (list of {name, calls, seconds}, in order)
+    and counters ({name: value}).
+    """
+    return dict(
+        timers=[dict(name=name, calls=calls, seconds=seconds)
+            for (name, (calls, seconds)) in timers.iteritems()],
+        counters=dict(counters.iteritems()))
+
+def format_stats():
+    """Return a table (string) with the stage breakdown and the counters."""
+    lines = ["%-32s %8s %12s %12s" % ("Stage", "Calls", "Seconds", "Mean (ms)")]
+    for name, (calls, seconds) in timers.iteritems():
+        lines.append("%-32s %8d %12.6f %12.3f" %
+            (name, calls, seconds, 1000.0 * seconds / calls))
+    if counters:
+        lines.append("")
+        lines.append("%-32s %8s" % ("Counter", "Value"))
+        for name, value in counters.iteritems():
+            lines.append("%-32s %8s" % (name, value))
+    return "\n".join(lines) + "\n"
+
+def save_stats(filename):
+    """Write stats (see get_stats) to a JSON file."""
+    with open(filename, "w") as fd:
+        json.dump(get_stats(), fd, indent=2)
+
+def add_profile_options(parser):
+    """Add the profiling options to an optparse parser."""
+    parser.add_option('', '--profile', dest='profile', action='store_true',
+        default=False, help='Print the time spent in each stage to stderr')
+    parser.add_option('', '--profile-output', dest='profile_output',
+        metavar='FILE', default=None,
+        help='Write stage stats (.json) or a cProfile dump (other extensions) to FILE')
+
+def run_profiled(options, function, *args, **kwargs):
+    """
+    Call function(*args, **kwargs) with the profiling requested in options
+    (see add_profile_options) and return its result.
+    """
+    output = options.profile_output
+    if not options.profile and not output:
+        return function(*args, **kwargs)
+    reset()
+    enable()
+    try:
+        if output and not output.endswith(".json"):
+            profile = cProfile.Profile()
+            try:
+                result = profile.runcall(function, *args, **kwargs)
+            finally:
+                profile.dump_stats(output)
+        else:
+            result = function(*args, **kwargs)
+    finally:
+        disable()
+    if output and output.endswith(".json"):
+        save_stats(output)
+    if options.profile:
+        sys.stderr.write(format_stats())
+    return result
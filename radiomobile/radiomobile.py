@@ -8,8 +8,18 @@ import itertools
 from datetime import datetime
 import pprint
 import math
+import optparse
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from odict import odict
+import profiling
+
+# Increase when the structure of parsed reports changes (see reportcache)
+PARSER_VERSION = 5
 
 # Generic functions and types
 
@@ -24,6 +34,34 @@ class Struct:
             vars(self).iteritems() if not k.startswith("_"))
         return "(%s): %s" % (self._name, pprint.pformat(dargs))
 
+class Record(object):
+    """
+    Compact (slotted) record-like class. Subclasses define the record name 
+    (_name), its attributes (__slots__) and, optionally, aliases for keys 
+    which are not valid identifiers (i.e. "loss_(+)") in _aliases.
+    """
+    __slots__ = ()
+    _name = "record"
+    _aliases = {}
+    
+    def __init__(self, **entries):
+        for key, value in entries.iteritems():
+            setattr(self, self._aliases.get(key, key), value)
+
+    def __getattr__(self, key):
+        if key in self._aliases:
+            return getattr(self, self._aliases[key])
+        raise AttributeError, key
+
+    def _asdict(self):
+        """Return dictionary with the attributes (those with value) of the record."""
+        names = dict((slot, key) for (key, slot) in self._aliases.iteritems())
+        return dict((names.get(slot, slot), getattr(self, slot)) 
+            for slot in self.__slots__ if hasattr(self, slot))
+
+    def __repr__(self):
+        return "(%s): %s" % (self._name, pprint.pformat(self._asdict()))
+
 def debug(line):
     """Output line to standard error."""
     sys.stderr.write(line + "\n")
@@ -37,62 +75,182 @@ def grouper(n, iterable, padvalue=None):
     "grouper(3, 'abcdefg', 'x') --> ('a','b','c'), ('d','e','f'), ('g','x','x')"
     return itertools.izip(*[itertools.chain(iterable, itertools.repeat(padvalue, n-1))]*n)
 
-def flatten(lst):
-    """Flat one level of lst."""
-    return [y for x in lst for y in x]
-
-def split_iter_of_consecutive(it, pred, n):
-    """Yield groups in iterable delimited by n consecutive items that match predicate."""
-    lst = list(it)
-    indexes = [idx for (idx, x) in enumerate(lst) if pred(x)]
-    indexeslst = [[x[1] for x in group] for (match, group) 
-        in itertools.groupby(enumerate(indexes), lambda (i, x): i - x)]
-    split_indexes = [(idxs[0], idxs[-1]+1) for idxs in indexeslst if len(idxs) >= n]
-    for start, end in grouper(2, [0] + flatten(split_indexes) + [None]):
-        yield lst[start:end]   
-
 def keyify(s):
     """Replaces spaces in string for underscores."""
     return re.sub("\s+", "_", s).replace(".", "").replace(":", "").lower() 
 
-def split_iter(it, condition, skip_sep=False):
-    """Split iterable yield elements grouped by condition."""
-    for match, group in itertools.groupby(it, condition):
-        if skip_sep and match:
+def get_number(string):
+    """
+    Return float at the start of string ("0.200W" -> 0.2, "-107,0dBm" -> 
+    -107.0). Numbers (already converted values) are returned as floats.
+    """
+    if isinstance(string, (int, long, float)):
+        return float(string)
+    match = re.match(r"\s*([-+]?\d+(?:[.,]\d+)?)", string)
+    if not match:
+        raise ValueError, "Not a number: %s" % string
+    return float(match.group(1).replace(",", "."))
+
+def split_iter(it, condition):
+    """
+    Yield iterators for the groups of items delimited by separators (items
+    that match condition, which are skipped). Groups are lazy, so each one 
+    must be consumed before the next one is used.
+    """
+    it = iter(it)
+    exhausted = []
+    def _group():
+        for x in it:
+            if condition(x):
+                return
+            yield x
+        exhausted.append(True)
+    while not exhausted:
+        yield _group()
+
+def split_iter_of_consecutive(it, pred, n):
+    """
+    Yield lists in iterable delimited by n (or more) consecutive items that
+    match predicate. Leading and trailing matches of each group are stripped.
+    """
+    group, matches = [], []
+    for x in it:
+        if pred(x):
+            matches.append(x)
             continue
-        yield list(group)
+        if len(matches) >= n:
+            if group:
+                yield group
+            group = []
+        elif group:
+            group.extend(matches)
+        matches = []
+        group.append(x)
+    if group:
+        yield group
 
-def strip_iter_items(it, condition=bool):
-    """Remove items in iterable that do not match condition."""
-    return list(itertools.ifilter(condition, it))
+def get_decimal(string, decimal_separator=None):
+    """
+    Return float for a number string with a decimal separator ("." or ",",
+    both are accepted if it is None).
+    """
+    if decimal_separator != ".":
+        string = string.replace(",", ".")
+    return float(string)
+
+_decimal_re = re.compile(r"\d([.,])\d+ ?(?:W|dBm|dBi|dB|m|MHz)\b")
+
+def detect_decimal_separator(lines):
+    """
+    Return the decimal separator ("." or ",") of the first number with a unit
+    (i.e. "280,0m") in lines, None if there are none. Radiomobile writes the
+    numbers of reports with the separator of the locale of the system.
+    """
+    for line in lines:
+        match = _decimal_re.search(line)
+        if match:
+            return match.group(1)
+    return None
+
+def get_unit_converter(unit, decimal_separator=None):
+    """
+    Return a function that converts a value with a unit ("0.200W" for unit
+    "W") to float (None for empty values). See get_decimal for the decimal
+    separator.
+    """
+    size = len(unit)
+    def _convert(string):
+        if not string:
+            return None
+        if string.endswith(unit):
+            try:
+                return get_decimal(string[:-size], decimal_separator)
+            except ValueError:
+                pass
+        return get_number(string)
+    return _convert
+
+UNITS = ["W", "dB", "dB/m", "dBm", "dBi", "m"]
+
+# Converters for each decimal separator: {separator: {unit: converter}}
+UNIT_CONVERTERS = dict((separator, dict((unit, get_unit_converter(unit, separator))
+    for unit in UNITS)) for separator in [None, ".", ","])
+
+# Converters of values with units (any decimal separator, see parse_table)
+get_watts = UNIT_CONVERTERS[None]["W"]
+get_db = UNIT_CONVERTERS[None]["dB"]
+get_db_per_meter = UNIT_CONVERTERS[None]["dB/m"]
+get_dbm = UNIT_CONVERTERS[None]["dBm"]
+get_dbi = UNIT_CONVERTERS[None]["dBi"]
+get_meters = UNIT_CONVERTERS[None]["m"]
+
+def get_column_converters(column_units, decimal_separator=None):
+    """Return converters (see parse_table) for a dictionary {field: unit}."""
+    converters = UNIT_CONVERTERS[decimal_separator]
+    return dict((field, converters[unit]) for (field, unit) in column_units.iteritems())
+
+def get_dbm_from_watts(watts):
+    """Return power in dBm for power in watts."""
+    return 10 * math.log10(1000.0 * watts)
 
-def strip_list(lst, condition=bool):
-    """Strip element in iterable."""
-    start = first(idx for (idx, x) in enumerate(lst) if condition(x)) 
-    end = first((len(lst)-idx) for (idx, x) in enumerate(reversed(lst)) if condition(x))
-    return lst[start:end]
-    
 def find_columns(line, fields):
-    """Return list of pairs (field, index) for fields in line."""
-    return [(field, line.index(field)) for field in fields]
+    """
+    Return list of pairs (field, index) for fields in line. Each field is
+    searched after the previous one, so a field contained in another one 
+    ("Loss" in "Loss (+)") or in a misaligned cell is not matched twice.
+    """
+    columns = []
+    start = 0
+    for field in fields:
+        index = line.find(field, start)
+        if index < 0:
+            raise ValueError, "Field not found in table header: %s" % field
+        columns.append((field, index))
+        start = index + len(field)
+    return columns
 
 def pairwise(iterable):
     "s -> (s0, s1), (s1, s2), (s2, s3), ..."
     a, b = itertools.tee(iterable)
     return itertools.izip(a, itertools.islice(b, 1, None))
 
-def parse_table(lines, fields, keyify_cb=None):
-    """Parse table and yield dictionaries containing the row info."""
-    header, units = lines[0], lines[1:]
-    columns = find_columns(header, fields)
-    fields, indexes = zip(*columns)
-    for line in strip_iter_items(units):
-        def _pairs():
-            for field, (start, end) in zip(fields, pairwise(indexes+(None,))):
-                key = (keyify(field) if (not keyify_cb or keyify_cb(field)) else field)
-                value = line[start:end].strip()
-                yield (key, value)
-        yield dict(_pairs())        
+# Compiled table schemas, by (header, fields, keyify_cb, converters)
+_table_schemas = {}
+MAX_TABLE_SCHEMAS = 1024
+
+def compile_table_schema(header, fields, keyify_cb=None, converters=None):
+    """
+    Return the schema of a table for its header: list of tuples (key, slice,
+    converter) for each field. Keys are keyified fields (those accepted by
+    keyify_cb, if given), converters (dictionary {field: function}, None 
+    for fields to keep as strings) take the stripped value of a cell.
+    """
+    converters = (converters or {})
+    cache_key = (header, tuple(fields), keyify_cb, tuple(sorted(converters.items())))
+    if cache_key in _table_schemas:
+        return _table_schemas[cache_key]
+    fields, indexes = zip(*find_columns(header, fields))
+    schema = [((keyify(field) if (not keyify_cb or keyify_cb(field)) else field),
+            slice(start, end), converters.get(field))
+        for field, (start, end) in zip(fields, pairwise(indexes + (None,)))]
+    if len(_table_schemas) >= MAX_TABLE_SCHEMAS:
+        _table_schemas.clear()
+    _table_schemas[cache_key] = schema
+    return schema
+
+def parse_table(lines, fields, keyify_cb=None, converters=None):
+    """
+    Parse table (first line is the header) and yield row dictionaries. See
+    compile_table_schema for keyify_cb and converters.
+    """
+    lines = iter(lines)
+    schema = compile_table_schema(lines.next(), fields, keyify_cb, converters)
+    for line in itertools.ifilter(bool, lines):
+        row = {}
+        for key, column, convert in schema:
+            value = line[column].strip()
+            row[key] = (convert(value) if convert else value)
+        yield row
 
 def iter_block(lines, startre, endre):
     """Yield lines whose bounds are defined by a start/end regular expressions."""
@@ -116,6 +274,81 @@ def get_distance(origin, destination):
     d = radius * c
     return int(1000.0 * d)
 
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+def _round_to_int(values):
+    """Round array like the builtin round (halves away from zero) and cast to int."""
+    return (numpy.sign(values) * numpy.floor(numpy.abs(values) + 0.5)).astype(int)
+
+def _get_haversine_distances(lat1, lon1, lat2, lon2):
+    radius = 6371
+    a = numpy.sin((lat2 - lat1)/2)**2 + \
+        (numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1)/2)**2)
+    c = 2 * numpy.arctan2(numpy.sqrt(a), numpy.sqrt(1 - a))
+    return 1000.0 * radius * c
+
+def _get_vincenty_distances(lat1, lon1, lat2, lon2, iterations=200, tolerance=1e-12):
+    """Inverse Vincenty formula on the WGS84 ellipsoid (radians in, meters out)."""
+    a, f = WGS84_A, WGS84_F
+    b = a * (1 - f)
+    lat1, lon1, lat2, lon2 = numpy.broadcast_arrays(lat1, lon1, lat2, lon2)
+    u1 = numpy.arctan((1 - f) * numpy.tan(lat1))
+    u2 = numpy.arctan((1 - f) * numpy.tan(lat2))
+    sin_u1, cos_u1 = numpy.sin(u1), numpy.cos(u1)
+    sin_u2, cos_u2 = numpy.sin(u2), numpy.cos(u2)
+    lon = lon2 - lon1
+    lam = lon.copy()
+    for iteration in xrange(iterations):
+        sin_lam, cos_lam = numpy.sin(lam), numpy.cos(lam)
+        sin_sigma = numpy.sqrt((cos_u2 * sin_lam)**2 + 
+            (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)**2)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = numpy.arctan2(sin_sigma, cos_sigma)
+        safe_sin_sigma = numpy.where(sin_sigma == 0, 1.0, sin_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / safe_sin_sigma
+        cos2_alpha = 1 - sin_alpha**2
+        safe_cos2_alpha = numpy.where(cos2_alpha == 0, 1.0, cos2_alpha)
+        # Equatorial lines have cos2_alpha = 0 (and cos_2sigma_m = 0)
+        cos_2sigma_m = numpy.where(cos2_alpha == 0, 0.0,
+            cos_sigma - 2 * sin_u1 * sin_u2 / safe_cos2_alpha)
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        previous_lam = lam
+        lam = lon + (1 - c) * f * sin_alpha * (sigma + c * sin_sigma * 
+            (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2)))
+        if numpy.all(numpy.abs(lam - previous_lam) < tolerance):
+            break
+    u_2 = cos2_alpha * (a**2 - b**2) / b**2
+    k_a = 1 + u_2 / 16384 * (4096 + u_2 * (-768 + u_2 * (320 - 175 * u_2)))
+    k_b = u_2 / 1024 * (256 + u_2 * (-128 + u_2 * (74 - 47 * u_2)))
+    delta_sigma = k_b * sin_sigma * (cos_2sigma_m + k_b / 4 * 
+        (cos_sigma * (-1 + 2 * cos_2sigma_m**2) - k_b / 6 * cos_2sigma_m * 
+        (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sigma_m**2)))
+    return b * k_a * (sigma - delta_sigma)
+
+def get_distances(origins, destinations, as_float=False, method="haversine"):
+    """
+    Vectorized version of get_distance: take two arrays (broadcastable) of
+    (lat, lon) pairs and return an array of distances (meters, truncated to 
+    int unless as_float is set). Needs NumPy.
+
+    Method is "haversine" (sphere, as get_distance) or "vincenty" (WGS84 
+    ellipsoid, accurate to millimeters for long links; nearly antipodal
+    points may not converge).
+    """
+    origins = numpy.radians(numpy.asarray(origins, dtype=float))
+    destinations = numpy.radians(numpy.asarray(destinations, dtype=float))
+    lat1, lon1 = origins[..., 0], origins[..., 1]
+    lat2, lon2 = destinations[..., 0], destinations[..., 1]
+    if method == "haversine":
+        distances = _get_haversine_distances(lat1, lon1, lat2, lon2)
+    elif method == "vincenty":
+        distances = _get_vincenty_distances(lat1, lon1, lat2, lon2)
+    else:
+        raise ValueError, "Unknown distance method: %s" % method
+    return (distances if as_float else distances.astype(int))
+
 def get_position_from_reference(coordinates, reference):
     """Get relative position of coordinates given a reference.
     
@@ -127,16 +360,48 @@ def get_position_from_reference(coordinates, reference):
     y = int(round(r1 * (lat - lat0)))
     return (x, y)
 
+def get_positions_from_reference(coordinates, reference, as_float=False):
+    """
+    Vectorized version of get_position_from_reference: take an array of
+    (lat, lon) pairs and return an array of (x, y) positions (meters, rounded
+    to int unless as_float is set). Needs NumPy.
+    """
+    coordinates = numpy.radians(numpy.asarray(coordinates, dtype=float))
+    lat, lon = coordinates[..., 0], coordinates[..., 1]
+    lat0, lon0, r1, r2 = reference
+    positions = numpy.empty(coordinates.shape)
+    positions[..., 0] = r2 * math.cos(lat0) * (lon - lon0)
+    positions[..., 1] = r1 * (lat - lat0)
+    return (positions if as_float else _round_to_int(positions))
+
 def get_reference(coordinates):
     """Calculate R1/R2 reference to calculate relative positions."""
     lat0, lon0 = map(math.radians, coordinates)
-    a = 6378137
-    f = 1 / 298.257223563
+    a = WGS84_A
+    f = WGS84_F
     e2 = f * (2 - f)     
     r1 = (a * (1 - e2)) / ((1 - e2 * (math.sin(lat0))**2)**(3.0/2))
     r2 = a / math.sqrt(1 - e2 * (math.sin(lat0))**2)
     return (lat0, lon0, r1, r2)
 
+def set_units_positions(units):
+    """
+    Set location_meters (flat-earth (x, y) tuple relative to the first unit) 
+    for all units, in one batch if NumPy is available.
+    """
+    if not units:
+        return
+    reference = get_reference(units.itervalues().next().location_coords)
+    if numpy is None:
+        for unit in units.itervalues():
+            unit.location_meters = \
+                get_position_from_reference(unit.location_coords, reference)
+        return
+    coords = [unit.location_coords for unit in units.itervalues()]
+    positions = get_positions_from_reference(coords, reference)
+    for unit, (x, y) in itertools.izip(units.itervalues(), positions.tolist()):
+        unit.location_meters = (x, y)
+
   
 # Radiomobile functions
 
@@ -153,20 +418,63 @@ def get_lat_lon_from_string(line):
     lat, lon = map(_string_to_float, line.split()[:2])
     return (lat, lon)  
 
+def get_string_from_lat_lon(coordinates):
+    """
+    Return a coordinates string (inverse of get_lat_lon_from_string).
+    
+    Example: (-13.531, -71.930) -> 13°31'52"S 071°55'48"W
+    """
+    def _float_to_string(value, width, sections):
+        seconds = int(round(abs(value) * 3600))
+        minutes, seconds = divmod(seconds, 60)
+        degrees, minutes = divmod(minutes, 60)
+        section = sections[0 if value >= 0 else 1]
+        return "%0*d°%02d'%02d\"%s" % (width, degrees, minutes, seconds, section)
+    lat, lon = coordinates
+    return "%s %s" % (_float_to_string(lat, 2, "NS"), _float_to_string(lon, 3, "EW"))
+
+def get_locator(coordinates):
+    """Return the 6-character Maidenhead locator (i.e. FI20KQ) for coordinates."""
+    lat, lon = coordinates
+    lon, lat = (lon + 180.0) / 20.0, (lat + 90.0) / 10.0
+    chars = []
+    for base, offset, scale in [(18, "A", 10), (10, "0", 24), (24, "A", 1)]:
+        lon_index, lat_index = min(int(lon), base - 1), min(int(lat), base - 1)
+        chars.extend([chr(ord(offset) + lon_index), chr(ord(offset) + lat_index)])
+        lon, lat = (lon - lon_index) * scale, (lat - lat_index) * scale
+    return "".join(chars)
+
+class Unit(Record):
+    __slots__ = ("name", "location", "elevation", "location_coords", "location_meters")
+    _name = "unit"
+
+class System(Record):
+    __slots__ = ("name", "pwr_tx", "loss", "loss_plus", "rx_thr", "ant_g", "ant_type",
+        "tx_power")
+    _name = "system"
+    _aliases = {"loss_(+)": "loss_plus"}
+
+class NetMember(Record):
+    __slots__ = ("net_members", "role", "system", "antenna", "quality_grid")
+    _name = "net_member"
+
+class Link(Record):
+    __slots__ = ("peers", "quality", "distance")
+    _name = "Link"
+
 def get_distance_between_locations(location1, location2):
     coord1 = get_lat_lon_from_string(location1) 
     coord2 = get_lat_lon_from_string(location2)
     return get_distance(coord1, coord2)
 
-def create_odict_from_items(name, key, dictlst):
+def create_odict_from_items(record, key, dictlst):
     """
-    Construct an ordered dictionary from a list of dictionaries, using 
-    the key from the dictionary.
+    Construct an ordered dictionary of records (record class) from a list 
+    of dictionaries, using the key from the dictionary.
     """
     def _generator():
         for delement in dictlst:        
-            dvalues = dict((k, v) for (k, v) in delement.iteritems())
-            yield (delement[key], Struct(name, **dvalues))
+            yield (delement[key], record(**delement))
     return odict(_generator())      
     
 def parse_header(lines):
@@ -183,27 +491,103 @@ def parse_header(lines):
     info = " ".join(generated_on.split()[-3:])
     return datetime.strptime(info, "%H:%M:%S on %m-%d-%Y")
 
-def parse_active_units(lines):
-    """Return orderect dict containing (name, attributes) pairs for units."""
+def parse_active_units(lines, decimal_separator=None):
+    """
+    Return orderect dict containing (name, attributes) pairs for units. See
+    get_decimal for the decimal separator.
+    """
     headers = ["Name", "Location", "Elevation"]
-    units = create_odict_from_items("unit", "name", parse_table(lines, headers))
+    converters = get_column_converters({"Elevation": "m"}, decimal_separator)
+    rows = parse_table(lines, headers, converters=converters)
+    units = create_odict_from_items(Unit, "name", rows)
     if units:
         for name, unit in units.iteritems():
-            coords = get_lat_lon_from_string(unit.location)
-            units[name].location_coords = coords
-            elevation = int(float(re.match("([\d.]+)", unit.elevation).group(1)))
-            units[name].elevation = elevation 
-        unit1 = units.itervalues().next()
-        reference = get_reference(unit1.location_coords)
-        for name, unit in units.iteritems():
-            units[name].location_meters = \
-                get_position_from_reference(unit.location_coords, reference)        
+            unit.location_coords = get_lat_lon_from_string(unit.location)
+            unit.elevation = int(unit.elevation)
+        set_units_positions(units)
     return units
             
-def parse_systems(lines):
-    """Return orderect dict containing (name, attributes) pairs for systems."""
+# Units of the numeric columns of systems
+SYSTEM_UNITS = {
+    "Pwr Tx": "W",
+    "Loss": "dB",
+    "Loss (+)": "dB/m",
+    "Rx thr.": "dBm",
+    "Ant. G.": "dBi",
+}
+
+def get_rx_threshold(dbm):
+    """
+    Return receiver threshold (dBm), always negative: some reports (i.e.
+    English ones) drop its sign.
+    """
+    return (-abs(dbm) if dbm is not None else None)
+
+def _get_rx_threshold_converter(convert):
+    return lambda string: get_rx_threshold(convert(string))
+
+RX_THRESHOLD_CONVERTERS = dict((separator, _get_rx_threshold_converter(converters["dBm"]))
+    for (separator, converters) in UNIT_CONVERTERS.iteritems())
+
+def get_system_converters(decimal_separator=None):
+    """Return converters (see parse_table) for the columns of systems."""
+    converters = get_column_converters(SYSTEM_UNITS, decimal_separator)
+    converters["Rx thr."] = RX_THRESHOLD_CONVERTERS[decimal_separator]
+    return converters
+
+def parse_systems(lines, decimal_separator=None):
+    """
+    Return orderect dict containing (name, attributes) pairs for systems.
+    Numeric attributes are floats: pwr_tx (W), tx_power (dBm), loss (dB),
+    loss_plus (dB/m), rx_thr (dBm, negative, see get_rx_threshold) and ant_g
+    (dBi). See get_decimal for the decimal separator.
+    """
     headers = ["Name", "Pwr Tx", "Loss", "Loss (+)", "Rx thr.", "Ant. G.", "Ant. Type"]
-    return create_odict_from_items("system", "name", parse_table(lines, headers))
+    converters = get_system_converters(decimal_separator)
+    rows = parse_table(lines, headers, converters=converters)
+    systems = create_odict_from_items(System, "name", rows)
+    for system in systems.itervalues():
+        system.tx_power = (get_dbm_from_watts(system.pwr_tx) if system.pwr_tx else None)
+    return systems
+
+def decode_quality_grid(grid, n):
+    """
+    Decode the lines of a quality grid (cells of 3 chars, see get_net_links) 
+    into a NumPy (n x n) integer matrix in one shot. Empty cells are 0.
+    """
+    width = 3 * n
+    data = "".join(line[:width].ljust(width) for line in grid)
+    chars = numpy.frombuffer(data, dtype=numpy.uint8).reshape(len(grid), n, 3)
+    digits = chars.astype(int) - ord("0")
+    isdigit = (digits >= 0) & (digits <= 9)
+    qualities = numpy.zeros((len(grid), n), dtype=int)
+    for index in range(3):
+        qualities = numpy.where(isdigit[..., index], 
+            10 * qualities + digits[..., index], qualities)
+    return qualities
+
+def get_links_matrices(rows, grid_field, units):
+    """
+    Return a pair of NumPy (n x n) matrices (qualities, distances) for the
+    members (rows) of a net. Qualities are only set in the upper triangle 
+    (0 means no link), distances (meters) are computed for all pairs.
+    """
+    if numpy is None:
+        raise ImportError("NumPy is needed to build links matrices")
+    grid = [row[grid_field][3:] for row in rows]
+    qualities = numpy.triu(decode_quality_grid(grid, len(rows)), 1)
+    coords = numpy.array([units[row["net_members"]].location_coords for row in rows])
+    distances = get_distances(coords[:, numpy.newaxis, :], coords[numpy.newaxis, :, :])
+    return qualities, distances
+
+def get_net_matrices(net, units):
+    """Return tuple (names, qualities, distances) for a parsed net in dense form."""
+    rows = [{"net_members": member.net_members, "quality_grid": member.quality_grid}
+        for member in net.net_members.itervalues()]
+    if not rows:
+        return [], numpy.zeros((0, 0), dtype=int), numpy.zeros((0, 0), dtype=int)
+    qualities, distances = get_links_matrices(rows, "quality_grid", units)
+    return net.net_members.keys(), qualities, distances
 
 def get_net_links(rows, grid_field, units):
     """Parse a quality grid and return dictionary with information.""" 
@@ -211,55 +595,120 @@ def get_net_links(rows, grid_field, units):
         s = "".join(lst).strip()
         return (int(s) if s else None)
     def clean_node(node):
-        items = dict((k, v) for (k, v) in node.iteritems() if not k.startswith("#"))
-        return Struct("Node", **items)
+        items = dict((k, v) for (k, v) in node.iteritems() 
+            if k != grid_field and not k.startswith("#"))
+        return NetMember(**items)
+    def _iter_links():
+        for nrow, row in enumerate(rows[:-1]):
+            qualities = map(get_quality, grouper(3, row[grid_field][3:], ''))
+            for npeer_row, quality in enumerate(qualities):
+                if not quality or nrow >= npeer_row:
+                    continue
+                coords1 = units[row["net_members"]].location_coords
+                coords2 = units[rows[npeer_row]["net_members"]].location_coords
+                yield (nrow, npeer_row, quality, get_distance(coords1, coords2))
+    def _iter_links_from_matrices():
+        qualities, distances = get_links_matrices(rows, grid_field, units)
+        for nrow, npeer_row in zip(*numpy.nonzero(qualities)):
+            yield (nrow, npeer_row, qualities[nrow, npeer_row], 
+                distances[nrow, npeer_row])
     
-    for nrow, row in enumerate(rows[:-1]):
-        qualities = map(get_quality, grouper(3, row[grid_field][3:], ''))
-        for npeer_row, quality in enumerate(qualities):
-            if not quality or nrow >= npeer_row:
+    links = (_iter_links() if numpy is None else _iter_links_from_matrices())
+    for nrow, npeer_row, quality, distance in links:
+        link = {            
+            "quality": int(quality),
+            "node1": clean_node(rows[nrow]),
+            "node2": clean_node(rows[npeer_row]),
+            "distance": int(distance),
+        }
+        yield link
+
+def _is_keyified_net_field(field):
+    return not field.startswith('#')
+
+# Net properties (see parse_net_properties): (key, regular expression, types)
+NET_PROPERTIES = [
+    ("frequency_range", re.compile(r"([\d.,]+) MHz to ([\d.,]+) MHz"), "decimal"),
+    ("polarization", re.compile(r"(\w+) polarization$"), "string"),
+    ("refractivity", re.compile(r"Refractivity= *([\d.,]+) N-units, "
+        r"conductivity= *([\d.,]+) S/m, permittivity= *([\d.,]+)"), "decimal"),
+    ("climate", re.compile(r"(.+?) climate$"), "string"),
+    ("topology", re.compile(r"(?:(\w+) topology|Topology (\w+))$"), "string"),
+]
+
+def parse_net_properties(lines, decimal_separator=None):
+    """
+    Parse the header lines of a net (after its name) and return a dictionary
+    with keys topology, frequency_range (pair of MHz), polarization, 
+    refractivity (N-units), conductivity (S/m), permittivity and climate.
+    Missing properties are None.
+    """
+    properties = dict(topology=None, frequency_range=None, polarization=None,
+        refractivity=None, conductivity=None, permittivity=None, climate=None)
+    for line in lines:
+        line = line.strip()
+        for key, regexp, kind in NET_PROPERTIES:
+            match = regexp.match(line)
+            if not match:
                 continue
-            peer_row = rows[npeer_row]
-            node1, node2 = map(clean_node, [row, peer_row])
-            location1 = units[node1.net_members].location
-            location2 = units[node2.net_members].location
-            distance = get_distance_between_locations(location1, location2)
-             
-            link = {            
-                "quality": quality,
-                "node1": node1,
-                "node2": node2,
-                "distance": distance,
-            }
-            yield link
-
-def parse_active_nets(lines, units):
+            if kind == "string":
+                properties[key] = first(group for group in match.groups() if group)
+            elif key == "frequency_range":
+                properties[key] = tuple(get_decimal(value, decimal_separator)
+                    for value in match.groups())
+            else:
+                values = [get_decimal(value, decimal_separator) for value in match.groups()]
+                properties.update(zip(["refractivity", "conductivity", "permittivity"],
+                    values))
+            break
+    return properties
+
+def parse_net(lines, units, decimal_separator=None):
+    """
+    Parse the lines of a net block and return a Network struct with name,
+    net_members, links, max_quality and the net properties (see 
+    parse_net_properties). Antenna heights of members are floats (meters).
+    """
+    name = lines[0].strip()
+    header = itertools.takewhile(lambda s: not s.startswith("Net members:"), lines[1:])
+    properties = parse_net_properties(header, decimal_separator)
+    block = list(iter_block(lines[1:], r"Net members:", r"\s.*Quality ="))
+    table, quality_line = block[:-2], block[-1]
+    max_quality = int(re.search("Quality = (\d+)", quality_line).group(1))
+    grid_field = re.match("Net members:\s*(.*?)\s*Role:", table[0]).group(1)
+    grid_fields = ["Net members:", grid_field, "Role:", "System:", "Antenna:"]    
+    converters = get_column_converters({"Antenna:": "m"}, decimal_separator)
+    rows = list(parse_table(table, grid_fields, _is_keyified_net_field, converters))
+    for row in rows:
+        row["quality_grid"] = row.pop(grid_field)
+    net_members = create_odict_from_items(NetMember, "net_members", rows)        
+    links = []
+    for link in get_net_links(rows, "quality_grid", units):
+        peers = (link["node1"].net_members, link["node2"].net_members)
+        link = Link(
+            peers=peers, 
+            quality=link["quality"], 
+            distance=link["distance"])
+        links.append(link)
+    return Struct("Network", name=name, 
+        net_members=net_members,
+        links=links, 
+        max_quality=max_quality,
+        **properties)
+
+def iter_active_nets(lines, units, decimal_separator=None):
+    """Yield nets (blocks separated by 2 blank lines) as soon as they are read."""
+    for net_lines in split_iter_of_consecutive(lines, lambda s: not s.strip(), 2):
+        with profiling.timer("parse_active_nets"):
+            net = parse_net(net_lines, units, decimal_separator)
+        profiling.count("nets")
+        profiling.count("links", len(net.links))
+        yield net
+
+def parse_active_nets(lines, units, decimal_separator=None):
     """Return an orderd dict with nets, each containing a list of links.""" 
-    nets_lines = list(split_iter_of_consecutive(lines[1:], lambda s: not s.strip(), 2))
-    nets = odict()
-    for net_lines in strip_iter_items(nets_lines):
-        info = strip_list(net_lines)
-        name = info[0].strip()
-        block = list(iter_block(strip_list(info[1:]), r"Net members:", r"\s.*Quality ="))
-        table, quality_line = block[:-2], block[-1]
-        max_quality = int(re.search("Quality = (\d+)", quality_line).group(1))
-        grid_field = re.match("Net members:\s*(.*?)\s*Role:", table[0]).group(1)
-        grid_fields = ["Net members:", grid_field, "Role:", "System:", "Antenna:"]    
-        rows = list(parse_table(table, grid_fields, lambda s: not s.startswith('#')))
-        net_members = create_odict_from_items("net_member", "net_members", rows)        
-        links = []
-        for link in get_net_links(rows, grid_field, units):
-            peers = (link["node1"].net_members, link["node2"].net_members)
-            link = Struct("Link", 
-                peers=peers, 
-                quality=link["quality"], 
-                distance=link["distance"])
-            links.append(link)
-        nets[name] = Struct("Network", name=name, 
-            net_members=net_members,
-            links=links, 
-            max_quality=max_quality)
-    return nets                
+    return odict((net.name, net) for net in 
+        iter_active_nets(lines, units, decimal_separator))
 
 def get_units_for_network(net, role=None):
     """Return units of a network with an (optional) role."""
@@ -269,6 +718,51 @@ def get_units_for_network(net, role=None):
                 yield net_member
     return list(_generator())
                                 
+def iter_report(lines):
+    """
+    Parse lines of a Radiomobile report.txt in a single pass and yield pairs 
+    (key, value) as soon as each section is finished. Keys: generated_on, 
+    general_information, decimal_separator (detected once, from the first
+    table with decimal numbers, see detect_decimal_separator), units, 
+    systems and net (once for each network).
+    """
+    is_separator = lambda s: s.startswith("---")
+    groups = split_iter((line.rstrip("\r\n") for line in lines), is_separator)
+    with profiling.timer("parse_header"):
+        generated_on = parse_header(list(groups.next()))
+    yield ("generated_on", generated_on)
+    units = odict()
+    decimal_separator = None
+    for title, section in grouper(2, groups, ()):
+        title = list(title)
+        if not title:
+            break
+        key = keyify(title[0])
+        if key in ("active_units_information", "systems"):
+            section = list(section)
+            if decimal_separator is None:
+                decimal_separator = detect_decimal_separator(section)
+                if decimal_separator:
+                    yield ("decimal_separator", decimal_separator)
+        if key == "general_information":
+            yield ("general_information", list(section))
+        elif key == "active_units_information":
+            with profiling.timer("parse_active_units"):
+                units = parse_active_units(section, decimal_separator)
+            profiling.count("units", len(units))
+            yield ("units", units)
+        elif key == "systems":
+            with profiling.timer("parse_systems"):
+                systems = parse_systems(section, decimal_separator)
+            profiling.count("systems", len(systems))
+            yield ("systems", systems)
+        elif key == "active_nets_information":
+            for net in iter_active_nets(section, units, decimal_separator):
+                yield ("net", net)
+        else:
+            for line in section:
+                pass
+
 def parse_report(filename):
     """
     Read and parse a Radiomobile report.txt file.
@@ -277,35 +771,66 @@ def parse_report(filename):
     >>> report.nets
     >>> report.systems
     >>> report.units
+    >>> report.decimal_separator
     """
-    lines = open(filename).read().splitlines()
-    splitted_lines = list(split_iter(lines, lambda s: s.startswith("---"), skip_sep=True))
-    generated_on = parse_header(splitted_lines[0])
-    sections = dict((keyify(key[0]), val) for (key, val) in grouper(2, splitted_lines[1:]))
-    
-    units = parse_active_units(sections["active_units_information"])
-    return Struct("RadioMobileReport",
-        generated_on=generated_on,
-        general_information=sections["general_information"],
-        units=units,
-        systems=parse_systems(sections["systems"]),
-        nets=parse_active_nets(sections["active_nets_information"], units))
+    report = Struct("RadioMobileReport", decimal_separator=None,
+        units=odict(), systems=odict(), nets=odict())
+    with profiling.timer("parse_report"):
+        with open(filename) as fd:
+            for key, value in iter_report(fd):
+                if key == "net":
+                    report.nets[value.name] = value
+                else:
+                    setattr(report, key, value)
+    return report
 
 
+def format_report(report):
+    """Return string with the basic information of a parsed report."""
+    return "\n".join([
+        "--- Generated on: %s" % report.generated_on,
+        "--- Units:",
+        report.units.pformat(),
+        "--- Systems:",
+        report.systems.pformat(),
+        "--- Nets:",
+        report.nets.pformat(),
+    ]) + "\n"
+
+def format_report_file(filename):
+    """Return string with the basic information of a report.txt."""
+    import reportcache
+    return format_report(reportcache.parse_report(filename))
+
 def main(args):    
-    """Print basic information of a report.txt."""
+    """Print basic information of a report.txt (or a batch of them)."""
+    usage = """Usage: %prog REPORT_TXT_PATH
+       %prog -o OUTPUT_DIRECTORY REPORT_TXT_PATH|DIRECTORY|GLOB [...]
+
+    Print basic information of a report.txt. With an output directory, 
+    process many reports in parallel and write an output file for each one."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-o', '--output-directory', dest='output_directory',
+        metavar='DIRECTORY', help='Batch mode: write outputs to DIRECTORY')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', default=None,
+        help='Number of worker processes in batch mode (default: CPUs)')
+    profiling.add_profile_options(parser)
+    options, args = parser.parse_args(args)
+    if options.output_directory:
+        if options.profile or options.profile_output:
+            parser.error("profiling is not available in batch mode")
+        if not args:
+            parser.print_help()
+            return 2
+        import batch
+        return batch.run_batch_command(format_report_file, args, 
+            options.output_directory, ".info.txt", options.jobs)
     if len(args) != 1:
-        debug("Usage: %s REPORT_TXT_PATH" % os.path.basename(sys.argv[0]))
+        parser.print_help()
         return 2
     text_report_filename, = args
-    report = parse_report(text_report_filename)
-    print "--- Generated on: %s" % report.generated_on
-    print "--- Units:"
-    report.units.pprint()
-    print "--- Systems:"
-    report.systems.pprint()
-    print "--- Nets:"
-    report.nets.pprint()
+    sys.stdout.write(profiling.run_profiled(options, format_report_file,
+        text_report_filename))
 
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+On-disk cache of parsed Radiomobile reports.
+
+Entries are keyed by the SHA-1 of the report contents and the parser
+version (radiomobile.PARSER_VERSION), so they are invalidated as soon as
+the report or the parser changes. Reports are stored as binary pickles.
+When the cache grows beyond its maximum size, the least recently used
+entries are removed.
+
+The cache directory is $RADIOMOBILE_CACHE (default: ~/.cache/radiomobile),
+set it to an empty string to disable the cache.
+
+>>> report = parse_report("report.txt")
+"""
+import os
+import errno
+import hashlib
+import tempfile
+import cPickle as pickle
+
+import radiomobile
+import profiling
+
+DEFAULT_DIRECTORY = os.path.join("~", ".cache", "radiomobile")
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+def get_cache_directory():
+    """Return cache directory (None if cache is disabled)."""
+    directory = os.environ.get("RADIOMOBILE_CACHE", DEFAULT_DIRECTORY)
+    return (os.path.expanduser(directory) if directory else None)
+
+def get_key(filename):
+    """Return cache key for a report file (hash of contents and parser version)."""
+    sha1 = hashlib.sha1("%s\n" % radiomobile.PARSER_VERSION)
+    with open(filename, "rb") as fd:
+        for data in iter(lambda: fd.read(1 << 20), ""):
+            sha1.update(data)
+    return sha1.hexdigest()
+
+def load(path):
+    """Return object stored in a cache entry (None if missing or corrupt)."""
+    try:
+        with open(path, "rb") as fd:
+            obj = pickle.load(fd)
+    except IOError, exc:
+        if exc.errno != errno.ENOENT:
+            radiomobile.debug("Cannot read cache entry %s: %s" % (path, exc))
+        return None
+    except Exception, exc:
+        radiomobile.debug("Corrupt cache entry %s: %s" % (path, exc))
+        return None
+    os.utime(path, None)
+    return obj
+
+def save(path, obj):
+    """Store object in a cache entry (atomically)."""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp_fd:
+            pickle.dump(obj, temp_fd, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+def evict(directory, max_size):
+    """Remove least recently used entries until directory fits in max_size bytes."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".pickle"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        entries.append((info.st_mtime, info.st_size, path))
+    total_size = sum(size for (mtime, size, path) in entries)
+    for mtime, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+def parse_report(filename, directory=None, max_size=DEFAULT_MAX_SIZE):
+    """
+    Like radiomobile.parse_report but use the cache (directory defaults to
+    get_cache_directory()).
+    """
+    directory = (directory or get_cache_directory())
+    if not directory:
+        return radiomobile.parse_report(filename)
+    path = os.path.join(directory, get_key(filename) + ".pickle")
+    with profiling.timer("reportcache.load"):
+        report = load(path)
+    profiling.count("reportcache.%s" % ("misses" if report is None else "hits"))
+    if report is None:
+        report = radiomobile.parse_report(filename)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with profiling.timer("reportcache.save"):
+                save(path, report)
+            evict(directory, max_size)
+        except (IOError, OSError), exc:
+            radiomobile.debug("Cannot write cache entry %s: %s" % (path, exc))
+    return report
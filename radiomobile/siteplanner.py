@@ -0,0 +1,399 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Propose sites for new towers (from a list of candidate sites) so that the
+terminals of a report reach a Node/Master with an adequate link margin.
+
+Links are scored in batch with the path loss model of linkbudget (terrain
+profiles from a .map file, or straight terrain between the elevations of
+the sites without it). The margin of a link is the worst of both
+directions, with the systems and antenna heights of the units in their
+nets. Path losses are kept in a LinkScoreCache (in memory and on disk, see
+reportcache), so only new candidate sites are scored when planning again
+with other candidates, systems or margins.
+
+Sites are chosen with a greedy set cover (the site that covers more of the
+remaining terminals, then the one with the best margins), followed by the
+removal of redundant sites. With backhaul, a candidate is only eligible
+if it reaches an existing Node/Master itself.
+
+>>> candidates = get_grid_candidates(report.units, step=2000, rmap=rmap)
+>>> plan = plan_sites(report, candidates, report.systems["Troncal"], rmap=rmap)
+>>> plan.sites
+['SITE 00123', 'SITE 00410']
+"""
+import os
+import sys
+import math
+import hashlib
+import optparse
+
+import numpy
+
+import radiomobile
+import mapfile
+import linkbudget
+import reportcache
+from radiomobile import Struct, odict
+
+TERMINAL_ROLES = ("Terminal", "Slave")
+NODE_ROLES = ("Node", "Master")
+
+DEFAULT_FREQUENCY = 2400.0
+DEFAULT_TOWER_HEIGHT = 15.0
+DEFAULT_MIN_MARGIN = 10.0
+DEFAULT_MAX_DISTANCE = 50000.0
+DEFAULT_SAMPLES = 64
+
+# Number of links scored in each batch (bounds the size of the profiles)
+CHUNK_SIZE = 4096
+
+METERS_PER_DEGREE = 111320.0
+
+def get_members(report, roles):
+    """
+    Return ordered dict {unit name: (system name, antenna height)} for the
+    units with one of roles (first net in which they appear).
+    """
+    members = odict()
+    for net in report.nets.itervalues():
+        for name, member in net.net_members.iteritems():
+            if member.role in roles and name not in members:
+                members[name] = (member.system, member.antenna)
+    return members
+
+def create_candidate(name, coords, rmap=None):
+    """Return a Unit for a candidate site (elevation from the map, if given)."""
+    elevation = (mapfile.get_elevation(rmap, coords) if rmap else 0)
+    return radiomobile.Unit(name=name,
+        location=radiomobile.get_string_from_lat_lon(coords),
+        elevation=elevation, location_coords=tuple(coords))
+
+def get_grid_candidates(units, step, margin=None, rmap=None, prefix="SITE"):
+    """
+    Return list of candidate sites on a grid (step meters) over the bounding
+    box of units extended by margin meters (default: step). Points out of
+    the map (if given) are skipped.
+    """
+    coords = numpy.array([unit.location_coords for unit in units.itervalues()])
+    margin = (step if margin is None else margin)
+    # Meters to degrees of latitude and longitude
+    scale = numpy.array([1.0, 1.0 / math.cos(math.radians(coords[:, 0].mean()))]) / \
+        METERS_PER_DEGREE
+    dlat, dlon = step * scale
+    south, west = coords.min(axis=0) - margin * scale
+    north, east = coords.max(axis=0) + margin * scale
+    if rmap:
+        (map_south, map_west), (map_north, map_east) = rmap.bounds
+        south, west = max(south, map_south), max(west, map_west)
+        north, east = min(north, map_north), min(east, map_east)
+    candidates = []
+    for lat in numpy.arange(south, north + dlat / 2, dlat):
+        for lon in numpy.arange(west, east + dlon / 2, dlon):
+            name = "%s %05d" % (prefix, len(candidates))
+            candidates.append(create_candidate(name, (float(lat), float(lon)), rmap))
+    return candidates
+
+class LinkScoreCache(object):
+    """
+    Path losses from sites (Unit records plus antenna height) to a fixed
+    list of units, as one row for each site. Rows are only computed for
+    sites not seen before; links longer than max_distance get an infinite
+    loss. With a directory (default: reportcache.get_cache_directory())
+    rows are also loaded from and saved to disk, keyed by the contents of
+    the map.
+    """
+    def __init__(self, units, heights, frequency=DEFAULT_FREQUENCY, rmap=None,
+            samples=DEFAULT_SAMPLES, k_factor=linkbudget.DEFAULT_K_FACTOR,
+            max_distance=DEFAULT_MAX_DISTANCE, directory=None):
+        self.units = list(units)
+        self.heights = numpy.asarray(heights, dtype=float)
+        self.frequency = frequency
+        self.rmap = rmap
+        self.samples = samples
+        self.k_factor = k_factor
+        self.max_distance = max_distance
+        self.coords = numpy.array([unit.location_coords for unit in self.units])
+        self.elevations = numpy.array([unit.elevation for unit in self.units], dtype=float)
+        directory = (directory or reportcache.get_cache_directory())
+        if directory:
+            map_key = (reportcache.get_key(rmap.filename) if rmap else None)
+            info = repr((frequency, map_key, samples, k_factor, max_distance,
+                self.coords.tolist(), self.elevations.tolist(), self.heights.tolist()))
+            self.path = os.path.join(directory, "linkscores-%s.pickle" %
+                hashlib.sha1(info).hexdigest())
+        else:
+            self.path = None
+        self.rows = ((self.path and reportcache.load(self.path)) or {})
+        self.modified = False
+
+    def check_params(self, units, heights, frequency, rmap, **options):
+        """
+        Raise ValueError if the cache was created for other units or with
+        other parameters (see __init__; the directory is not checked).
+        """
+        params = [
+            ("units", [unit.name for unit in units], [unit.name for unit in self.units]),
+            ("heights", map(float, heights), self.heights.tolist()),
+            ("frequency", frequency, self.frequency),
+            ("map", (rmap.filename if rmap else None),
+                (self.rmap.filename if self.rmap else None)),
+        ]
+        params.extend((name, value, getattr(self, name))
+            for (name, value) in options.iteritems() if name != "directory")
+        for name, value, cache_value in params:
+            if value != cache_value:
+                raise ValueError, "Link score cache created with other %s: %s (not %s)" % (
+                    name, cache_value, value)
+
+    def get_site_key(self, site, height):
+        """Return the key of a site (position, elevation and antenna height)."""
+        return (tuple(site.location_coords), float(site.elevation), float(height))
+
+    def compute_rows(self, sites, heights):
+        """Return (len(sites) x len(units)) matrix of path losses (no cache)."""
+        site_coords = numpy.array([site.location_coords for site in sites])
+        site_elevations = numpy.array([site.elevation for site in sites], dtype=float)
+        distances = radiomobile.get_distances(site_coords[:, numpy.newaxis, :],
+            self.coords[numpy.newaxis, :, :], as_float=True)
+        losses = numpy.empty(distances.shape, dtype=numpy.float32)
+        losses.fill(numpy.inf)
+        pairs = numpy.transpose(numpy.nonzero(distances <= self.max_distance))
+        for start in xrange(0, len(pairs), CHUNK_SIZE):
+            isites, iunits = pairs[start:start + CHUNK_SIZE].T
+            if self.rmap:
+                profiles = linkbudget.get_terrain_profiles(self.rmap,
+                    site_coords[isites], self.coords[iunits], self.samples)
+            else:
+                profiles = linkbudget.get_flat_profiles(site_elevations[isites],
+                    self.elevations[iunits], distances[isites, iunits], self.samples)
+            path_losses = linkbudget.get_path_losses(profiles, heights[isites],
+                self.heights[iunits], self.frequency, self.k_factor)
+            losses[isites, iunits] = path_losses.path_loss
+        return losses
+
+    def get_path_losses(self, sites, heights):
+        """Return (len(sites) x len(units)) matrix of path losses (dB)."""
+        heights = numpy.zeros(len(sites)) + numpy.asarray(heights, dtype=float)
+        keys = [self.get_site_key(site, height) for (site, height) in zip(sites, heights)]
+        missing = [index for (index, key) in enumerate(keys) if key not in self.rows]
+        if missing:
+            rows = self.compute_rows([sites[index] for index in missing], heights[missing])
+            for index, row in zip(missing, rows):
+                self.rows[keys[index]] = row
+            self.modified = True
+        losses = numpy.empty((len(sites), len(self.units)), dtype=numpy.float32)
+        for index, key in enumerate(keys):
+            losses[index] = self.rows[key]
+        return losses
+
+    def save(self):
+        """Save rows to disk (if there is a cache directory and new rows)."""
+        if not self.path or not self.modified:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            reportcache.save(self.path, self.rows)
+            self.modified = False
+        except (IOError, OSError), exc:
+            radiomobile.debug("Cannot write link scores %s: %s" % (self.path, exc))
+
+def get_margins(path_losses, params1, params2):
+    """
+    Return link margins (dB) for a matrix of path losses between sites
+    (rows) and units (columns): the worst of both directions. Params are
+    arrays (or scalars) from linkbudget.get_system_params.
+    """
+    tx_power1, loss1, gain1, threshold1 = [numpy.asarray(x, dtype=float).reshape(-1, 1)
+        for x in params1]
+    tx_power2, loss2, gain2, threshold2 = [numpy.asarray(x, dtype=float).reshape(1, -1)
+        for x in params2]
+    downlink = tx_power1 - loss1 + gain1 - path_losses + gain2 - loss2 - threshold2
+    uplink = tx_power2 - loss2 + gain2 - path_losses + gain1 - loss1 - threshold1
+    return numpy.minimum(downlink, uplink)
+
+def get_units_params(report, members):
+    """Return arrays (tx_power, loss, gain, rx_threshold) for members (see get_members)."""
+    params = []
+    for name, (system_name, height) in members.iteritems():
+        if system_name not in report.systems:
+            raise ValueError, "Unknown system of unit %s: %s" % (name, system_name)
+        params.append(linkbudget.get_system_params(report.systems[system_name]))
+    return numpy.array(params, dtype=float).reshape(-1, 4).T
+
+def get_greedy_cover(coverage, weights, available=None):
+    """
+    Greedy set cover. Coverage is a boolean (sets x elements) matrix and
+    weights a matrix of the same shape used to break ties (sum over the new
+    elements covered). Return list of chosen sets (indexes) until no set
+    covers more elements (or available sets are exhausted).
+    """
+    nsets, nelements = coverage.shape
+    uncovered = numpy.ones(nelements, dtype=bool)
+    available = (numpy.ones(nsets, dtype=bool) if available is None
+        else numpy.array(available, dtype=bool))
+    chosen = []
+    while uncovered.any() and available.any():
+        counts = numpy.where(available, coverage[:, uncovered].sum(axis=1), -1)
+        scores = numpy.where(coverage[:, uncovered], weights[:, uncovered], 0).sum(axis=1)
+        best = numpy.lexsort((-numpy.arange(nsets), scores, counts))[-1]
+        if counts[best] <= 0:
+            break
+        chosen.append(int(best))
+        available[best] = False
+        uncovered &= ~coverage[best]
+    return chosen
+
+def remove_redundant_sets(coverage, chosen, covered=None):
+    """
+    Remove chosen sets (last chosen first) whose elements are all covered
+    by the other chosen sets (or by covered, boolean array of elements).
+    """
+    chosen = list(chosen)
+    covered = (numpy.zeros(coverage.shape[1], dtype=bool) if covered is None else covered)
+    for index in reversed(chosen[:]):
+        others = [other for other in chosen if other != index]
+        rest = covered | (coverage[others].any(axis=0) if others else False)
+        if not (coverage[index] & ~rest).any():
+            chosen.remove(index)
+    return chosen
+
+def plan_sites(report, candidates, system, height=DEFAULT_TOWER_HEIGHT,
+        frequency=DEFAULT_FREQUENCY, min_margin=DEFAULT_MIN_MARGIN, max_sites=None,
+        backhaul=True, rmap=None, cache=None, **cache_options):
+    """
+    Return a Plan struct with the candidate sites (Unit records) proposed
+    for towers (with a parsed system and antenna height):
+
+    - sites: names of the chosen candidates, in order of choice.
+    - assignments: ordered dict {terminal: (site or node, margin)}.
+    - covered_by_nodes: terminals already covered by existing nodes.
+    - uncovered: terminals that no candidate covers.
+    - cache: LinkScoreCache (pass it to the next call to reuse the scores).
+
+    A cache passed in must have been created for the same report, frequency,
+    map and cache_options (ValueError otherwise).
+    """
+    terminals = get_members(report, TERMINAL_ROLES)
+    nodes = get_members(report, NODE_ROLES)
+    # Relays are both terminals (of a net) and nodes (of another)
+    names = terminals.keys() + [name for name in nodes if name not in terminals]
+    columns = dict((name, index) for (index, name) in enumerate(names))
+    units = [report.units[name] for name in names]
+    heights = [(terminals.get(name) or nodes[name])[1] for name in names]
+    if cache is None:
+        cache = LinkScoreCache(units, heights, frequency, rmap, **cache_options)
+    else:
+        cache.check_params(units, heights, frequency, rmap, **cache_options)
+    terminal_columns = [columns[name] for name in terminals]
+    node_columns = [columns[name] for name in nodes]
+    terminal_params = get_units_params(report, terminals)
+    node_params = get_units_params(report, nodes)
+    tower_params = linkbudget.get_system_params(system)
+
+    node_losses = cache.get_path_losses([report.units[name] for name in nodes],
+        [node_height for (system_name, node_height) in nodes.values()])
+    node_margins = get_margins(node_losses[:, terminal_columns], node_params,
+        terminal_params)
+    for inode, name in enumerate(nodes):
+        if name in terminals:
+            node_margins[inode, terminals.keys().index(name)] = -numpy.inf
+    candidate_losses = cache.get_path_losses(candidates, height)
+    margins = get_margins(candidate_losses[:, terminal_columns], tower_params,
+        terminal_params)
+    if backhaul and nodes:
+        backhaul_margins = get_margins(candidate_losses[:, node_columns],
+            tower_params, node_params)
+        available = (backhaul_margins >= min_margin).any(axis=1)
+    else:
+        available = numpy.ones(len(candidates), dtype=bool)
+    cache.save()
+
+    covered_by_nodes = ((node_margins >= min_margin).any(axis=0) if nodes
+        else numpy.zeros(len(terminals), dtype=bool))
+    coverage = (margins >= min_margin) & ~covered_by_nodes[numpy.newaxis, :]
+    weights = numpy.where(coverage, margins, 0.0)
+    chosen = get_greedy_cover(coverage, weights, available)
+    chosen = remove_redundant_sets(coverage, chosen)
+    if max_sites is not None:
+        chosen = chosen[:max_sites]
+
+    assignments = odict()
+    for index, name in enumerate(terminals):
+        options = [(float(node_margins[inode, index]), node_name)
+            for (inode, node_name) in enumerate(nodes)]
+        options.extend((float(margins[isite, index]), candidates[isite].name)
+            for isite in chosen)
+        options = [(margin, site) for (margin, site) in options if margin >= min_margin]
+        if options:
+            margin, site = max(options)
+            assignments[name] = (site, margin)
+    return Struct("Plan",
+        sites=[candidates[index].name for index in chosen],
+        assignments=assignments,
+        covered_by_nodes=[name for (name, covered) in
+            zip(terminals, covered_by_nodes) if covered],
+        uncovered=[name for name in terminals if name not in assignments],
+        cache=cache)
+
+def read_candidates(filename, rmap=None):
+    """Return candidate sites from a file with lines: name<TAB>latitude<TAB>longitude."""
+    candidates = []
+    with open(filename) as fd:
+        for line in fd:
+            if not line.strip() or line.startswith("#"):
+                continue
+            name, lat, lon = line.rstrip("\r\n").split("\t")
+            candidates.append(create_candidate(name, (float(lat), float(lon)), rmap))
+    return candidates
+
+def main(args):
+    usage = """Usage: %prog [OPTIONS] -s SYSTEM RADIOMOBILE_REPORT_FILE
+
+    Propose tower sites (from a file of candidates or a grid around the
+    units) so all terminals reach a Node/Master with a minimum margin."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-s', '--system', dest='system', help='System of the towers')
+    parser.add_option('-H', '--height', dest='height', type='float',
+        default=DEFAULT_TOWER_HEIGHT, help='Antenna height of the towers (meters)')
+    parser.add_option('-c', '--candidates', dest='candidates', metavar='FILE',
+        help='Candidate sites (lines: name, latitude, longitude; tab-separated)')
+    parser.add_option('-g', '--grid', dest='grid', type='float', default=2000.0,
+        metavar='METERS', help='Step of the grid of candidates (without -c)')
+    parser.add_option('-m', '--map-file', dest='map_file', help='Elevation map (.map)')
+    parser.add_option('-f', '--frequency', dest='frequency', type='float',
+        default=DEFAULT_FREQUENCY, help='Frequency (MHz)')
+    parser.add_option('-M', '--min-margin', dest='min_margin', type='float',
+        default=DEFAULT_MIN_MARGIN, help='Minimum link margin (dB)')
+    parser.add_option('-n', '--max-sites', dest='max_sites', type='int',
+        default=None, help='Maximum number of sites')
+    parser.add_option('-B', '--no-backhaul', dest='backhaul', action='store_false',
+        default=True, help='Do not require a link from sites to a Node/Master')
+    options, args = parser.parse_args(args)
+    if len(args) != 1 or not options.system:
+        parser.print_help()
+        return 2
+    report_filename, = args
+    report = reportcache.parse_report(report_filename)
+    rmap = (mapfile.open_map(options.map_file) if options.map_file else None)
+    if options.candidates:
+        candidates = read_candidates(options.candidates, rmap)
+    else:
+        candidates = get_grid_candidates(report.units, options.grid, rmap=rmap)
+    plan = plan_sites(report, candidates, report.systems[options.system],
+        options.height, options.frequency, options.min_margin, options.max_sites,
+        options.backhaul, rmap)
+    sites = dict((candidate.name, candidate) for candidate in candidates)
+    print "--- Sites:"
+    for name in plan.sites:
+        print "%s\t%s" % (name, sites[name].location)
+    print "--- Terminals:"
+    for name, (site, margin) in plan.assignments.iteritems():
+        print "%s\t%s\t%0.1fdB" % (name, site, margin)
+    for name in plan.uncovered:
+        print "%s\t-" % name
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
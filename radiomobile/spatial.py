@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Spatial index of units (or any named WGS84 coordinates) for neighbour
+queries: units within a radius, k-nearest units and units inside a
+bounding box.
+
+Points are hashed into a grid of cells of fixed size (in degrees), so
+queries only visit the cells that overlap the searched area instead of
+scanning all units. Points can be added, moved and removed at any time.
+
+>>> report = radiomobile.parse_report("report.txt")
+>>> index = create_unit_index(report.units)
+>>> index.within(report.units["URPAY"].location_coords, 10000)
+[('URPAY', 0), ('HUIRACOCHAN', 4740)]
+>>> index.nearest((-13.65, -71.59), 2)
+[('JOSJOJAHUARINA 1', 182), ('JOSJOJAHUARINA 2', 689)]
+>>> index.move("URPAY", (-13.70, -71.66))
+"""
+import math
+import heapq
+import itertools
+
+from radiomobile import get_distance
+
+DEFAULT_CELL_SIZE = 0.1
+
+# Length of a degree of latitude (meters) on the sphere used by get_distance
+DEGREE_LENGTH = 6371000.0 * math.pi / 180.0
+
+def get_lon_ranges(west, east):
+    """
+    Return list of pairs (west, east) covering a range of longitudes, split
+    in two when it crosses the antimeridian (+/-180).
+    """
+    if east - west >= 360.0:
+        return [(-180.0, 180.0)]
+    elif west < -180.0:
+        return [(west + 360.0, 180.0), (-180.0, east)]
+    elif east > 180.0:
+        return [(west, 180.0), (-180.0, east - 360.0)]
+    return [(west, east)]
+
+class SpatialIndex(object):
+    """Grid-based spatial index of named (lat, lon) coordinates."""
+
+    def __init__(self, items=None, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._coords = {}
+        for name, coords in (items or []):
+            self.add(name, coords)
+
+    def _get_cell(self, coords):
+        lat, lon = coords
+        return (int(math.floor(lat / self.cell_size)),
+            int(math.floor(lon / self.cell_size)))
+
+    def add(self, name, coords):
+        """Add a point to the index (move it if name is already indexed)."""
+        if name in self._coords:
+            self.remove(name)
+        coords = tuple(coords)
+        self._coords[name] = coords
+        self._cells.setdefault(self._get_cell(coords), set()).add(name)
+
+    move = add
+
+    def remove(self, name):
+        """Remove a point from the index."""
+        coords = self._coords.pop(name)
+        cell = self._get_cell(coords)
+        names = self._cells[cell]
+        names.discard(name)
+        if not names:
+            del self._cells[cell]
+
+    def __len__(self):
+        return len(self._coords)
+
+    def __contains__(self, name):
+        return name in self._coords
+
+    def __getitem__(self, name):
+        return self._coords[name]
+
+    def _iter_cells_in_box(self, (south, west), (north, east)):
+        (row1, col1), (row2, col2) = \
+            self._get_cell((south, west)), self._get_cell((north, east))
+        if (row2 - row1 + 1) * (col2 - col1 + 1) > len(self._cells):
+            for cell, names in self._cells.iteritems():
+                if row1 <= cell[0] <= row2 and col1 <= cell[1] <= col2:
+                    yield names
+        else:
+            for cell in itertools.product(xrange(row1, row2 + 1), xrange(col1, col2 + 1)):
+                if cell in self._cells:
+                    yield self._cells[cell]
+
+    def in_box(self, bounds):
+        """Return sorted list of names inside bounds ((south, west), (north, east))."""
+        (south, west), (north, east) = bounds
+        return sorted(name for names in self._iter_cells_in_box(*bounds)
+            for name in names
+            if south <= self._coords[name][0] <= north and
+               west <= self._coords[name][1] <= east)
+
+    def within(self, coords, radius):
+        """
+        Return list of pairs (name, distance) of the points within radius
+        (meters) of coords, sorted by distance.
+        """
+        lat, lon = coords
+        dlat = float(radius) / DEGREE_LENGTH
+        max_lat = min(abs(lat) + dlat, 89.9)
+        dlon = min(dlat / math.cos(math.radians(max_lat)), 180.0)
+        boxes = [((lat - dlat, west), (lat + dlat, east))
+            for (west, east) in get_lon_ranges(lon - dlon, lon + dlon)]
+        pairs = ((name, get_distance(coords, self._coords[name])) for box in boxes
+            for names in self._iter_cells_in_box(*box) for name in names)
+        return sorted(((name, distance) for (name, distance) in pairs
+            if distance <= radius), key=lambda (name, distance): (distance, name))
+
+    def nearest(self, coords, k=1):
+        """
+        Return list of pairs (name, distance) of the k nearest points to
+        coords, sorted by distance.
+        """
+        k = min(k, len(self._coords))
+        if k <= 0:
+            return []
+        lat, lon = coords
+        row0, col0 = self._get_cell(coords)
+        candidates, seen = [], 0
+        for ring in itertools.count():
+            # Points in ring r (cells at Chebyshev distance r) are at least
+            # r-1 cells away, cells get narrower as latitude increases
+            max_lat = min(abs(lat) + (ring + 1) * self.cell_size, 89.9)
+            cell_length = self.cell_size * DEGREE_LENGTH * math.cos(math.radians(max_lat))
+            if seen == len(self._coords) or (len(candidates) >= k and
+                    candidates[k-1][0] <= (ring - 1) * cell_length):
+                break
+            for row in xrange(row0 - ring, row0 + ring + 1):
+                step = (2 * ring if abs(row - row0) < ring else 1)
+                for col in xrange(col0 - ring, col0 + ring + 1, step):
+                    for name in self._cells.get((row, col), ()):
+                        seen += 1
+                        distance = get_distance(coords, self._coords[name])
+                        candidates.append((distance, name))
+            candidates = heapq.nsmallest(k, candidates)
+        return [(name, distance) for (distance, name) in candidates]
+
+def create_unit_index(units, cell_size=DEFAULT_CELL_SIZE):
+    """Return a SpatialIndex of units (odict of Unit records) by name."""
+    return SpatialIndex(((name, unit.location_coords)
+        for (name, unit) in units.iteritems()), cell_size)
@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+"""
+Generate synthetic Radiomobile report.txt files of any size (e.g. for
+benchmarks).
+
+Units are spread randomly around a centre, and each net ("Net 00001
+[wifi]") is a star of members (randomly chosen units) where the first one
+is the Master, linked to all the others (Slaves). Systems are named as
+expected by radiomobile_ns3_report ("SYSTEM 001 - [WFb11]"). The
+localized variant of Radiomobile (see ns-3/example.report.txt) writes
+numbers with decimal comma ("280,0m", "0,200W"), signed receiver
+thresholds ("-93,0dBm") and locators instead of UTM coordinates, section
+titles and table headers are the same.
+
+>>> write_report("large.txt", nunits=5000, nnets=500, members=10, seed=1)
+>>> write_report("large-es.txt", nunits=5000, decimal_comma=True, seed=1)
+"""
+import sys
+import random
+import optparse
+
+import radiomobile
+
+SEPARATOR = "-" * 75
+
+# The quality grid uses 2-digit member indexes
+MAX_MEMBERS = 99
+
+NET_PROPERTIES = [
+    "Cluster topology",
+    "%(frequency1)s MHz to %(frequency2)s MHz",
+    "Vertical polarization",
+    "Mode of variability is Broadcast, at",
+    "50% of time, 50% of locations, 50% of situations",
+    "Refractivity= 301 N-units, conductivity= %(conductivity)s S/m, permittivity= 15",
+    "Continental temperate climate",
+]
+
+def format_number(value, precision, decimal_comma=False):
+    """Return string for a number (decimal comma if requested)."""
+    string = "%.*f" % (precision, value)
+    return (string.replace(".", ",") if decimal_comma else string)
+
+def iter_units_section(units, decimal_comma=False):
+    """Yield lines of the units section for a list of (name, coords, elevation)."""
+    yield "%-20s%-45s%s" % ("Name", "Location", "Elevation")
+    yield ""
+    for name, coords, elevation in units:
+        location = radiomobile.get_string_from_lat_lon(coords) + " " + \
+            (radiomobile.get_locator(coords) if decimal_comma else "19L BE 00000 00000")
+        yield "%-20s%-47s%sm" % (name, location,
+            format_number(elevation, 1, decimal_comma))
+
+def iter_systems_section(systems, decimal_comma=False):
+    """Yield lines of the systems section for a list of (name, power, gain)."""
+    yield "Name                Pwr Tx    Loss  Loss (+)  Rx thr.   Ant. G. Ant. Type"
+    yield ""
+    for name, power, gain in systems:
+        values = [format_number(power, 3, decimal_comma) + "W",
+            format_number(2.0, 1, decimal_comma) + "dB",
+            format_number(0.0, 3, decimal_comma) + "dB/m",
+            format_number((-93.0 if decimal_comma else 93.0), 1, decimal_comma) + "dBm",
+            format_number(gain, 1, decimal_comma) + "dBi"]
+        yield "%-20s%-10s%-6s%-10s%-10s%-8s%s" % tuple([name] + values + ["omni.ant"])
+
+def iter_net_block(name, members, quality, decimal_comma=False):
+    """
+    Yield lines of a net block for a list of members (unit name, role, system,
+    antenna height). Members with role Master are linked to all the others.
+    """
+    values = dict(frequency1=format_number(2400.0, 1, decimal_comma),
+        frequency2=format_number(2483.0, 1, decimal_comma),
+        conductivity=format_number(0.005, 3, decimal_comma))
+    yield name
+    for line in NET_PROPERTIES:
+        yield (line % values if "%(" in line else line)
+    yield ""
+    grid_header = "#  " + " ".join("%02d" % (idx + 1) for idx in range(len(members)))
+    yield "%-27s%s Role:         System:             Antenna:" % ("Net members:", grid_header)
+    masters = [role == "Master" for (unit, role, system, height) in members]
+    for idx, (unit, role, system, height) in enumerate(members):
+        cells = [("%-2d" % quality if idx != peer and (masters[idx] or masters[peer]) else "  ")
+            for peer in range(len(members))]
+        yield "%-27s%02d %s %-14s%-20s%sm" % (unit, idx + 1, " ".join(cells), role,
+            system[:20], format_number(height, 1, decimal_comma))
+    yield ""
+    yield "%-27sQuality = %d - number of resend" % ("", quality)
+
+def generate_report(nunits=100, nsystems=10, nnets=10, members=10,
+        decimal_comma=False, seed=None, centre=(-13.7, -71.6), spread=0.5):
+    """
+    Return lines of a synthetic report.txt with nunits units (spread degrees
+    around centre), nsystems systems and nnets nets of members units each.
+    """
+    if not 2 <= members <= min(MAX_MEMBERS, nunits):
+        raise ValueError, "Members must be between 2 and %d" % min(MAX_MEMBERS, nunits)
+    rng = random.Random(seed)
+    units = [("UNIT %05d" % idx,
+        (centre[0] + rng.uniform(-spread, spread), centre[1] + rng.uniform(-spread, spread)),
+        rng.randint(2000, 4500)) for idx in xrange(nunits)]
+    systems = [("SYSTEM %03d - [WF%s]" % (idx, rng.choice(["b11", "g54"])), rng.choice([0.1, 0.2, 0.4]),
+        rng.choice([12.0, 19.0, 24.0])) for idx in xrange(nsystems)]
+    lines = ["", "Radio Mobile", "Report generated at 12:00:00 on 01-01-2010"]
+    for title, section in [
+            ("General information", ["Net file      C:\\RADIO MOBILE\\SYNTHETIC.NET"]),
+            ("Active units information", iter_units_section(units, decimal_comma)),
+            ("Systems", iter_systems_section(systems, decimal_comma))]:
+        lines.extend([SEPARATOR, title, SEPARATOR])
+        lines.extend(section)
+    lines.extend([SEPARATOR, "Active nets information", SEPARATOR])
+    for index in xrange(nnets):
+        net_units = rng.sample(units, members)
+        net_members = [(name, ("Master" if idx == 0 else "Slave"),
+            rng.choice(systems)[0], rng.choice([5.0, 6.5, 12.0]))
+            for (idx, (name, coords, elevation)) in enumerate(net_units)]
+        lines.extend(["", ""])
+        lines.extend(iter_net_block("Net %05d [wifi]" % index, net_members,
+            rng.randint(10, 50), decimal_comma))
+    return lines
+
+def write_report(filename, **options):
+    """Write a synthetic report.txt (see generate_report for options)."""
+    with open(filename, "w") as fd:
+        for line in generate_report(**options):
+            fd.write(line + "\n")
+
+def main(args):
+    usage = """Usage: %prog [OPTIONS] OUTPUT_REPORT_FILE
+
+    Write a synthetic Radiomobile report.txt."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-u', '--units', dest='nunits', type='int', default=100,
+        help='Number of units')
+    parser.add_option('-s', '--systems', dest='nsystems', type='int', default=10,
+        help='Number of systems')
+    parser.add_option('-n', '--nets', dest='nnets', type='int', default=10,
+        help='Number of nets')
+    parser.add_option('-m', '--members', dest='members', type='int', default=10,
+        help='Members of each net')
+    parser.add_option('-c', '--decimal-comma', dest='decimal_comma',
+        action='store_true', default=False, help='Localized numbers (decimal comma)')
+    parser.add_option('-r', '--seed', dest='seed', type='int', default=None,
+        help='Seed of the random generator')
+    options, args = parser.parse_args(args)
+    if len(args) != 1:
+        parser.print_help()
+        return 2
+    filename, = args
+    write_report(filename, **vars(options))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import shutil
+import tempfile
+import unittest
+
+import radiomobile
+import batch
+
+def iter_report_lines(path):
+    """Converter yielding the lines of a report (fails after the first one)."""
+    with open(path) as fd:
+        for line in fd:
+            yield line
+            if "broken" in path:
+                raise ValueError, "Broken report"
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_directory = os.path.join(self.directory, "reports")
+        os.mkdir(self.input_directory)
+        source = os.path.join(os.path.dirname(__file__), "radiomobile_report_test.txt")
+        for name in ["report1.txt", "report2.txt"]:
+            shutil.copy(source, os.path.join(self.input_directory, name))
+        with open(os.path.join(self.input_directory, "broken.txt"), "w") as fd:
+            fd.write("not a report\n")
+        self.output_directory = os.path.join(self.directory, "output")
+        os.environ["RADIOMOBILE_CACHE"] = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        del os.environ["RADIOMOBILE_CACHE"]
+        shutil.rmtree(self.directory)
+
+    def test_expand_paths(self):
+        pattern = os.path.join(self.input_directory, "report*.txt")
+        self.assertEqual(["report1.txt", "report2.txt"], 
+            map(os.path.basename, batch.expand_paths([pattern])))
+        self.assertEqual(["broken.txt", "report1.txt", "report2.txt"], 
+            map(os.path.basename, batch.expand_paths([self.input_directory])))
+
+    def test_run_batch(self):
+        results = sorted(batch.run_batch(radiomobile.format_report_file, 
+            [self.input_directory], self.output_directory, ".info.txt", 2),
+            key=lambda result: result.path)
+        self.assertEqual(3, len(results))
+        broken, report1, report2 = results
+        self.assertTrue(broken.error.startswith("ValueError"))
+        self.assertEqual(None, report1.error)
+        self.assertEqual(["report1.info.txt", "report2.info.txt"], 
+            sorted(os.listdir(self.output_directory)))
+        with open(report1.output_path) as fd:
+            self.assertTrue(fd.read().startswith("--- Generated on: 2007-07-04"))
+
+    def test_run_batch_with_chunks(self):
+        results = sorted(batch.run_batch(iter_report_lines,
+            [self.input_directory], self.output_directory, ".copy.txt", 1),
+            key=lambda result: result.path)
+        self.assertEqual(["ValueError: Broken report", None, None],
+            [result.error for result in results])
+        self.assertEqual(["report1.copy.txt", "report2.copy.txt"], 
+            sorted(os.listdir(self.output_directory)))
+        with open(results[1].path) as fd1:
+            with open(results[1].output_path) as fd2:
+                self.assertEqual(fd1.read(), fd2.read())
+
+    def test_run_batch_same_names(self):
+        source = os.path.join(self.input_directory, "report1.txt")
+        for region in ["north", "south"]:
+            os.mkdir(os.path.join(self.input_directory, region))
+            shutil.copy(source, os.path.join(self.input_directory, region, "report.txt"))
+        shutil.copy(source, os.path.join(self.input_directory, "north", "report.dat"))
+        patterns = [os.path.join(self.input_directory, "*", "report.*")]
+        results = sorted(batch.run_batch(iter_report_lines, patterns,
+            self.output_directory, ".copy.txt", 2), key=lambda result: result.path)
+        self.assertEqual(3, len(results))
+        north, duplicate, south = results
+        self.assertTrue(duplicate.error.startswith("Duplicate output path"))
+        self.assertEqual((None, None), (north.error, south.error))
+        self.assertEqual(["north", "south"], sorted(os.listdir(self.output_directory)))
+        self.assertEqual(os.path.join(self.output_directory, "south", "report.copy.txt"),
+            south.output_path)
+        self.assertTrue(os.path.exists(north.output_path))
+        
+if __name__ == '__main__':
+    unittest.main()
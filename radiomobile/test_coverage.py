@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import radiomobile
+import mapfile
+import linkbudget
+import coverage
+
+class CoverageTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join("examples", "cusco-ne", "cusco-ne.map")
+        self.rmap = mapfile.open_map(os.path.join(os.path.dirname(__file__), filename))
+        self.directory = tempfile.mkdtemp()
+        self.coords = (-9.266944, -74.948055)
+        self.system = radiomobile.System(name="wifi", pwr_tx="0.200W", loss="2.0dB",
+            ant_g="19.0dBi", rx_thr="-90.0dBm")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_coverage(self, **options):
+        return coverage.get_coverage(self.rmap, self.coords, self.system,
+            height=10.0, frequency=2400.0, radius=2000.0, tile_size=16,
+            directory=self.directory, **options)
+
+    def test_get_tiles(self):
+        tiles = coverage.get_tiles((10, 49), (5, 24), 16)
+        self.assertEqual(6, len(tiles))
+        self.assertEqual(((10, 26), (5, 21)), tiles[0])
+        self.assertEqual(((42, 50), (21, 25)), tiles[-1])
+        self.assertEqual(40 * 20, sum((r2 - r1) * (c2 - c1)
+            for ((r1, r2), (c1, c2)) in tiles))
+
+    def test_levels(self):
+        result = self.get_coverage(processes=1)
+        self.assertEqual((59, 59), result.levels.shape)
+        self.assertEqual(-90.0, result.rx_threshold)
+        (south, west), (north, east) = result.bounds
+        self.assertTrue(south < self.coords[0] < north and west < self.coords[1] < east)
+        # Corners are beyond the radius
+        self.assertTrue(numpy.isnan(result.levels[0, 0]))
+        # A grid point compared with a single link budget
+        row, column = 10, 30
+        rows, columns = coverage.get_window_indexes(self.rmap, self.coords, 2000.0)
+        lat, lon = mapfile.get_map_coordinates(self.rmap, rows[0] + row, columns[0] + column)
+        profiles = linkbudget.get_terrain_profiles(self.rmap, self.coords,
+            (float(lat), float(lon)), coverage.DEFAULT_SAMPLES)
+        budget = linkbudget.get_link_budgets(profiles, 10.0, coverage.DEFAULT_RX_HEIGHT,
+            2400.0, eirp=10 * numpy.log10(200.0) - 2.0 + 19.0, rx_gain=0.0, rx_threshold=-90.0)
+        self.assertAlmostEqual(budget.rx_power[0], result.levels[row, column], 3)
+        ratio = coverage.get_covered_ratio(result)
+        self.assertTrue(0.0 < ratio <= 1.0)
+
+    def test_processes_and_cache(self):
+        result1 = self.get_coverage(processes=2)
+        nfiles = len(os.listdir(self.directory))
+        self.assertEqual(16, nfiles)
+        result2 = self.get_coverage(processes=1)
+        self.assertEqual(nfiles, len(os.listdir(self.directory)))
+        numpy.testing.assert_array_equal(result1.levels, result2.levels)
+        # Path losses are cached, so another system reuses the tiles
+        self.system.pwr_tx = "0.400W"
+        result3 = self.get_coverage(processes=1)
+        self.assertEqual(nfiles, len(os.listdir(self.directory)))
+        difference = result3.levels - result1.levels
+        self.assertAlmostEqual(10 * numpy.log10(2.0), numpy.nanmax(difference), 4)
+
+    def test_unit_defaults(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "ns-3", "example.report.txt")
+        report = radiomobile.parse_report(path)
+        net = coverage.get_unit_net(report, "Ccatcca")
+        self.assertEqual("Josjo2 [wimax]", net.name)
+        self.assertEqual(("[WXqk34]", 2.0), coverage.get_unit_system(report, "Ccatcca"))
+        self.assertEqual(146.0, linkbudget.get_net_frequency(net))
+        self.assertRaises(ValueError, coverage.get_unit_net, report, "Nowhere")
+
+    def test_save_and_load(self):
+        result = self.get_coverage(processes=1)
+        filename = os.path.join(self.directory, "coverage.npz")
+        coverage.save_coverage(filename, result)
+        loaded = coverage.load_coverage(filename)
+        numpy.testing.assert_array_equal(result.levels, loaded.levels)
+        self.assertEqual((result.bounds, result.rx_threshold),
+            (loaded.bounds, loaded.rx_threshold))
+
+if __name__ == '__main__':
+    unittest.main()
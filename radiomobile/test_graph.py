@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import time
+import random
+import unittest
+
+import radiomobile
+import graph
+
+class GraphTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join("..", "ns-3", "example.report.txt")
+        path = os.path.join(os.path.dirname(__file__), filename)
+        self.report = radiomobile.parse_report(path)
+        self.graph = graph.create_graph(self.report)
+
+    def test_create_graph(self):
+        self.assertEqual(self.report.units.keys(), self.graph.names)
+        self.assertEqual([0, 3, 6, 7, 8, 9, 11, 12], self.graph.indptr.tolist())
+        josjo1 = self.graph.indptr[0]
+        self.assertEqual(["Josjojauarina 2", "Urpay", "Huiracochan"],
+            [self.graph.names[idx] for idx in self.graph.indices[josjo1:josjo1+3]])
+        self.assertEqual([57, 62, 81], self.graph.quality[josjo1:josjo1+3].tolist())
+
+    def test_paths(self):
+        path = ["Urcos", "Huiracochan", "Josjojauarina 1", "Josjojauarina 2", "Kcauri"]
+        self.assertEqual((4, path),
+            graph.get_shortest_path(self.graph, "Urcos", "Kcauri", "hops"))
+        distance, shortest_path = graph.get_shortest_path(self.graph, "Urcos", "Kcauri")
+        self.assertEqual(path, shortest_path)
+        self.assertEqual((57, path), graph.get_widest_path(self.graph, "Urcos", "Kcauri"))
+        self.assertEqual((57, "Josjojauarina 1", "Josjojauarina 2"),
+            graph.get_bottleneck_link(self.graph, path))
+
+    def test_failure_points(self):
+        self.assertEqual(["Huiracochan", "Josjojauarina 1", "Josjojauarina 2"],
+            graph.get_articulation_points(self.graph))
+        self.assertEqual(6, len(graph.get_bridges(self.graph)))
+        self.assertEqual(1, len(graph.get_components(self.graph)))
+        self.assertTrue(graph.is_k_connected(self.graph, 1))
+        self.assertFalse(graph.is_k_connected(self.graph, 2))
+
+    def test_connectivity(self):
+        # A ring of 6 units with one chord is 2-connected but not 3-connected
+        names = ["U%d" % idx for idx in range(6)]
+        edges = dict(((idx, (idx + 1) % 6), (50, 1000)) for idx in range(6))
+        edges[(0, 3)] = (40, 2000)
+        ring = graph.create_graph_from_edges(names, edges)
+        self.assertEqual([], graph.get_articulation_points(ring))
+        self.assertEqual(3, graph.get_local_connectivity(ring, "U0", "U3"))
+        self.assertEqual(2, graph.get_local_connectivity(ring, "U1", "U4"))
+        self.assertTrue(graph.is_k_connected(ring, 2))
+        self.assertFalse(graph.is_k_connected(ring, 3))
+        self.assertEqual((None, []), graph.get_shortest_path(
+            graph.create_graph_from_edges(names, {}), "U0", "U1"))
+
+    def test_connectivity_size(self):
+        # A tree plus random links, with leaves of degree < 3, fails at once
+        rnd = random.Random(1)
+        nvertices = 10000
+        edges = dict(((rnd.randrange(idx), idx), (50, 1000))
+            for idx in range(1, nvertices))
+        while len(edges) < nvertices - 1 + 20000:
+            node1, node2 = sorted(rnd.sample(xrange(nvertices), 2))
+            edges[(node1, node2)] = (50, 1000)
+        names = ["U%d" % idx for idx in range(nvertices)]
+        start = time.time()
+        self.assertFalse(graph.is_k_connected(
+            graph.create_graph_from_edges(names, edges), 3))
+        self.assertTrue(time.time() - start < 1.0)
+        # Units linked to the next two around a ring are 4-connected
+        nvertices = 200
+        edges = dict(((idx, (idx + step) % nvertices), (50, 1000))
+            for idx in range(nvertices) for step in (1, 2))
+        ring = graph.create_graph_from_edges(names[:nvertices], edges)
+        start = time.time()
+        self.assertTrue(graph.is_k_connected(ring, 3))
+        self.assertTrue(graph.is_k_connected(ring, 4))
+        self.assertFalse(graph.is_k_connected(ring, 5))
+        self.assertTrue(time.time() - start < 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import shutil
+import tempfile
+import unittest
+
+import radiomobile
+import incremental
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        source = os.path.join(os.path.dirname(__file__), "radiomobile_report_test.txt")
+        with open(source) as fd:
+            self.contents = fd.read()
+        self.path = os.path.join(self.directory, "report.txt")
+        self.write(self.contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, contents):
+        with open(self.path, "w") as fd:
+            fd.write(contents)
+
+    def edit(self, old, new):
+        self.assertTrue(old in self.contents)
+        self.contents = self.contents.replace(old, new)
+        self.write(self.contents)
+
+    def assertChanges(self, changes, added=[], removed=[], changed=[]):
+        self.assertEqual((added, removed, changed),
+            (changes.added, changes.removed, changes.changed))
+
+    def test_first_parse(self):
+        report, diff = incremental.parse_report_incremental(self.path)
+        expected = radiomobile.parse_report(self.path)
+        self.assertEqual(repr(expected), repr(report))
+        self.assertChanges(diff.units, added=list(expected.units))
+        self.assertChanges(diff.nets, added=list(expected.nets))
+
+    def test_unchanged(self):
+        report1, diff = incremental.parse_report_incremental(self.path)
+        report2, diff = incremental.parse_report_incremental(self.path, report1)
+        self.assertTrue(report1.units is report2.units)
+        self.assertTrue(report1.systems is report2.systems)
+        for name, net in report2.nets.iteritems():
+            self.assertTrue(report1.nets[name] is net)
+        for changes in [diff.units, diff.systems, diff.nets]:
+            self.assertChanges(changes)
+
+    def test_changed_net(self):
+        report1, diff = incremental.parse_report_incremental(self.path)
+        self.edit("03 50 50    Node ", "03 40 50    Node ")
+        report2, diff = incremental.parse_report_incremental(self.path, report1)
+        name1, name2 = report1.nets.keys()
+        self.assertTrue(report1.nets[name1] is report2.nets[name1])
+        self.assertChanges(diff.nets, changed=[name2])
+        self.assertChanges(diff.units)
+        self.assertEqual(repr(radiomobile.parse_report(self.path)), repr(report2))
+
+    def test_changed_system(self):
+        report1, diff = incremental.parse_report_incremental(self.path)
+        self.edit("wifi 5.8            0.398W", "wifi 5.8            0.500W")
+        report2, diff = incremental.parse_report_incremental(self.path, report1)
+        self.assertChanges(diff.systems, changed=["wifi 5.8"])
+        self.assertChanges(diff.nets)
+        self.assertEqual(0.5, report2.systems["wifi 5.8"].pwr_tx)
+
+    def test_changed_unit(self):
+        report1, diff = incremental.parse_report_incremental(self.path)
+        unit = report1.units["URPAY"]
+        self.edit(unit.location, unit.location.replace("13", "12", 1))
+        report2, diff = incremental.parse_report_incremental(self.path, report1)
+        name1, name2 = report1.nets.keys()
+        self.assertChanges(diff.units, changed=["URPAY"])
+        self.assertTrue(report1.nets[name1] is report2.nets[name1])
+        self.assertChanges(diff.nets, changed=[name2])
+        self.assertEqual(repr(radiomobile.parse_report(self.path)), repr(report2))
+
+if __name__ == '__main__':
+    unittest.main()
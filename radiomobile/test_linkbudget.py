@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import unittest
+
+import numpy
+
+import radiomobile
+import mapfile
+import linkbudget
+
+class LinkBudgetTest(unittest.TestCase):
+    def setUp(self):
+        directory = os.path.dirname(__file__)
+        path = os.path.join(directory, "radiomobile_report_test.txt")
+        self.report = radiomobile.parse_report(path)
+        path = os.path.join(directory, "examples", "cusco-ne", "cusco-ne.map")
+        self.rmap = mapfile.open_map(path)
+        path = os.path.join(directory, "..", "ns-3", "example.report.txt")
+        self.cusco_report = radiomobile.parse_report(path)
+
+    def test_get_system_params(self):
+        system = self.report.systems["Huiracochan Troncal"]
+        tx_power, loss, gain, rx_threshold = linkbudget.get_system_params(system)
+        self.assertAlmostEqual(23.01, tx_power, 2)
+        self.assertEqual((2.9, 19.0, -93.0), (loss, gain, rx_threshold))
+        system = radiomobile.System(pwr_tx="10,000W", loss="0,5dB", ant_g="2,0dBi",
+            rx_thr="-107,0dBm")
+        self.assertEqual((40.0, 0.5, 2.0, -107.0), linkbudget.get_system_params(system))
+
+    def test_get_net_frequency(self):
+        net = self.cusco_report.nets["Josjo2 [wimax]"]
+        self.assertEqual(146.0, linkbudget.get_net_frequency(net))
+        net.frequency_range = None
+        self.assertEqual(2400.0, linkbudget.get_net_frequency(net, 2400.0))
+
+    def test_free_space(self):
+        profiles = linkbudget.get_flat_profiles([0, 0], [0, 0], [10000, 20000])
+        losses = linkbudget.get_path_losses(profiles, 1000.0, 1000.0, 2400.0)
+        self.assertAlmostEqual(120.04, losses.free_space_loss[0], 2)
+        self.assertAlmostEqual(126.06, losses.free_space_loss[1], 2)
+        self.assertEqual([0.0, 0.0], list(losses.diffraction_loss))
+        self.assertTrue(numpy.all(losses.clearance > 1.0))
+
+    def test_obstacle(self):
+        profiles = linkbudget.get_flat_profiles([0], [0], [10000], samples=101)
+        profiles.elevations[0, 50] = 100.0
+        losses = linkbudget.get_path_losses(profiles, 10.0, 10.0, 2400.0)
+        self.assertTrue(losses.clearance[0] < 0)
+        self.assertTrue(losses.diffraction_loss[0] > 20.0)
+
+    def test_get_link_budget(self):
+        units, systems = self.report.units, self.report.systems
+        budget = linkbudget.get_link_budget(
+            units["URPAY"], systems["Uuario Final PCMCIA"],
+            units["JOSJOJAHUARINA 1"], systems["Josjo 1 Sectorial PC"],
+            frequency=2400.0, heights=(5.0, 6.5))
+        self.assertEqual(10756, budget.distance)
+        self.assertAlmostEqual(budget.rx_power + 89.0, budget.margin)
+    
+    def test_get_link_budget_with_terrain(self):
+        units, systems = self.cusco_report.units, self.cusco_report.systems
+        budget = linkbudget.get_link_budget(
+            units["Josjojauarina 2"], systems["[WXall]"],
+            units["Ccatcca"], systems["[WXqk34]"],
+            frequency=146.0, heights=(2.0, 2.0), rmap=self.rmap)
+        self.assertTrue(budget.path_loss >= budget.free_space_loss)
+        self.assertAlmostEqual(budget.rx_power + 107.0, budget.margin)
+
+    def test_get_link_budgets(self):
+        units = self.cusco_report.units.values()
+        coords = numpy.array([unit.location_coords for unit in units])
+        coords1 = numpy.repeat(coords, len(coords), axis=0)
+        coords2 = numpy.tile(coords, (len(coords), 1))
+        profiles = linkbudget.get_terrain_profiles(self.rmap, coords1, coords2)
+        budgets = linkbudget.get_link_budgets(profiles, 2.0, 2.0, 146.0, 
+            eirp=42.0, rx_gain=1.5, rx_threshold=-107.0)
+        self.assertEqual((len(coords)**2,), budgets.margin.shape)
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import unittest
+
+import mapfile
+
+class MapFileTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join("examples", "cusco-ne", "cusco-ne.map")
+        path = os.path.join(os.path.dirname(__file__), filename)
+        self.rmap = mapfile.open_map(path)
+
+    def test_header(self):
+        self.assertEqual((718, 1421), self.rmap.elevations.shape)
+        self.assertEqual(2437, self.rmap.max_elevation)
+        (south, west), (north, east) = self.rmap.bounds
+        self.assertAlmostEqual(-9.5851, south, 4)
+        self.assertAlmostEqual(-75.5040, west, 4)
+        self.assertAlmostEqual(-9.1351, north, 4)
+        self.assertAlmostEqual(-74.6008, east, 4)
+
+    def test_get_elevation(self):
+        josjo2 = (-9.266944, -74.948055)
+        self.assertEqual(217, mapfile.get_elevation(self.rmap, josjo2))
+        kcauri = (-9.312777, -74.813055)
+        self.assertEqual([217, 839], 
+            list(mapfile.get_elevation(self.rmap, [josjo2, kcauri])))
+
+    def test_get_elevation_out_of_bounds(self):
+        self.assertRaises(ValueError, mapfile.get_elevation, self.rmap, (0.0, 0.0))
+
+    def test_get_window(self):
+        elevations, bounds = mapfile.get_window(self.rmap, 
+            (-9.20, -75.00), (-9.30, -74.90))
+        self.assertEqual((161, 159), elevations.shape)
+        self.assertTrue(elevations.base is not None)
+        (south, west), (north, east) = bounds
+        self.assertTrue(south <= -9.30 + 0.001 and north >= -9.20 - 0.001)
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import unittest
+
+import radiomobile
+import netfile
+
+class NetFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = os.path.dirname(__file__)
+        path = os.path.join(directory, "examples", "cusco-ne", "cusco-ne.net")
+        self.report = netfile.parse_net_file(path)
+        # report.txt exported by Radio Mobile from the same .net file
+        path = os.path.join(directory, "..", "ns-3", "example.report.txt")
+        self.text_report = radiomobile.parse_report(path)
+
+    def test_units(self):
+        units, expected_units = self.report.units, self.text_report.units
+        self.assertEqual(expected_units.keys(), units.keys())
+        for name, expected_unit in expected_units.iteritems():
+            self.assertEqual(expected_unit.location, units[name].location)
+            self.assertEqual(expected_unit.elevation, units[name].elevation)
+            # report.txt coordinates are rounded to seconds (~30 meters)
+            for x1, x2 in zip(expected_unit.location_meters, 
+                    units[name].location_meters):
+                self.assertTrue(abs(x1 - x2) < 30)
+
+    def test_systems(self):
+        systems = self.report.systems
+        self.assertEqual(self.text_report.systems.keys(), systems.keys())
+        wfb = systems["[WFb5.5]"]
+        self.assertEqual(10.0, wfb.pwr_tx)
+        self.assertEqual(0.5, wfb.loss)
+        self.assertEqual(-107.0, wfb.rx_thr)
+        self.assertEqual(2.0, wfb.ant_g)
+
+    def test_nets(self):
+        nets, expected_nets = self.report.nets, self.text_report.nets
+        self.assertEqual(expected_nets.keys(), nets.keys())
+        for name, expected_net in expected_nets.iteritems():
+            net = nets[name]
+            self.assertEqual(expected_net.net_members.keys(), net.net_members.keys())
+            for member_name, expected_member in expected_net.net_members.iteritems():
+                member = net.net_members[member_name]
+                self.assertEqual(expected_member.role, member.role)
+                self.assertEqual(expected_member.system, member.system)
+                self.assertEqual(expected_member.antenna, member.antenna)
+            for key in ["topology", "frequency_range", "polarization", "refractivity",
+                    "conductivity", "permittivity", "climate"]:
+                self.assertEqual(getattr(expected_net, key), getattr(net, key))
+            self.assertEqual([link.peers for link in expected_net.links],
+                [link.peers for link in net.links])
+    
+    def test_net_details(self):
+        net = self.report.nets["Josjo2 [wimax]"]
+        ccatcca = net.net_members["Ccatcca"]
+        self.assertEqual("Slave", ccatcca.role)
+        self.assertEqual("[WXqk34]", ccatcca.system)
+        self.assertEqual(2.0, ccatcca.antenna)
+        link1 = net.links[0]
+        self.assertEqual(None, link1.quality)
+        self.assertEqual(15620, link1.distance)
+
+if __name__ == '__main__':
+    unittest.main()
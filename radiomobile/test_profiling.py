@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import json
+import shutil
+import pstats
+import tempfile
+import optparse
+import unittest
+
+import radiomobile
+import profiling
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        self.filename = os.path.join(os.path.dirname(__file__), 
+            "radiomobile_report_test.txt")
+        self.directory = tempfile.mkdtemp()
+        profiling.reset()
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+        shutil.rmtree(self.directory)
+
+    def get_options(self, args):
+        parser = optparse.OptionParser()
+        profiling.add_profile_options(parser)
+        return parser.parse_args(args)[0]
+
+    def test_disabled(self):
+        with profiling.timer("stage"):
+            profiling.count("items")
+        radiomobile.parse_report(self.filename)
+        self.assertEqual({}, dict(profiling.timers))
+        self.assertEqual({}, dict(profiling.counters))
+
+    def test_parse_report_stages(self):
+        profiling.enable()
+        report = radiomobile.parse_report(self.filename)
+        self.assertEqual(["parse_header", "parse_active_units", "parse_systems",
+            "parse_active_nets", "parse_report"], profiling.timers.keys())
+        self.assertEqual(len(report.nets), profiling.timers["parse_active_nets"][0])
+        self.assertEqual(dict(units=len(report.units), systems=len(report.systems),
+            nets=len(report.nets), links=sum(len(net.links) for net in 
+            report.nets.itervalues())), dict(profiling.counters))
+        self.assertTrue("parse_systems" in profiling.format_stats())
+
+    def test_run_profiled(self):
+        options = self.get_options([])
+        self.assertEqual(3, profiling.run_profiled(options, len, "abc"))
+        self.assertFalse(profiling.timers)
+        path = os.path.join(self.directory, "stats.json")
+        options = self.get_options(["--profile-output", path])
+        profiling.run_profiled(options, radiomobile.parse_report, self.filename)
+        self.assertFalse(profiling.enabled)
+        with open(path) as fd:
+            stats = json.load(fd)
+        self.assertEqual("parse_report", stats["timers"][-1]["name"])
+        self.assertEqual(1, stats["timers"][-1]["calls"])
+        self.assertTrue(stats["counters"]["units"] > 0)
+        path = os.path.join(self.directory, "stats.prof")
+        options = self.get_options(["--profile-output", path])
+        profiling.run_profiled(options, radiomobile.parse_report, self.filename)
+        functions = [name for (filename, line, name) in pstats.Stats(path).stats]
+        self.assertTrue("parse_active_units" in functions)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,26 @@ class RadioMobileReportTest(unittest.TestCase):
       self.assertEqual(position1, (0.0, 0.0))
       position2 = radiomobile.get_position_from_reference(unit2, reference)
       self.assertEqual(position2, (169469, 57747))
+
+    def test_get_positions_from_reference(self):
+      reference = radiomobile.get_reference((40.86, 0.16))
+      positions = radiomobile.get_positions_from_reference(
+          [(40.86, 0.16), (41.38, 2.17)], reference)
+      self.assertEqual([[0, 0], [169469, 57747]], positions.tolist())
+      positions = radiomobile.get_positions_from_reference(
+          [(41.38, 2.17)], reference, as_float=True)
+      self.assertAlmostEqual(169469.0, positions[0][0], 0)
+
+    def test_get_distances(self):
+      origins = [(-37.9510334, 144.4248679), (0.0, 0.0)]
+      destinations = [(-37.6528211, 143.9264955), (0.0, 1.0)]
+      distances = radiomobile.get_distances(origins, destinations, as_float=True,
+          method="vincenty")
+      self.assertAlmostEqual(54972.27, distances[0], 1)
+      self.assertAlmostEqual(111319.49, distances[1], 1)
+      distances = radiomobile.get_distances(origins, destinations)
+      self.assertEqual([radiomobile.get_distance(o, d) for (o, d) in 
+          zip(origins, destinations)], distances.tolist())
               
     def test_generated_on(self):
         self.assertEqual(datetime(2007, 7, 4, 17, 38, 51), self.report.generated_on)
@@ -46,13 +66,62 @@ class RadioMobileReportTest(unittest.TestCase):
     def test_system_details(self):
         systems = self.report.systems
         huira = systems["Huiracochan Troncal"]
-        self.assertEqual("0.200W", huira.pwr_tx)
-        self.assertEqual("2.9dB", huira.loss) 
-        self.assertEqual("0.000dB/m", getattr(huira, "loss_(+)"))
-        self.assertEqual("93.0dBm", huira.rx_thr)
-        self.assertEqual("19.0dBi", huira.ant_g)
+        self.assertEqual(0.2, huira.pwr_tx)
+        self.assertEqual(2.9, huira.loss) 
+        self.assertEqual(0.0, getattr(huira, "loss_(+)"))
+        self.assertEqual(-93.0, huira.rx_thr)
+        self.assertEqual(19.0, huira.ant_g)
         self.assertEqual("omni.ant", huira.ant_type)
 
+    def test_parse_table(self):
+        lines = ["Name                Pwr Tx    Loss  Loss (+)  Ant. Type", "",
+            "Josjo 1 Sectorial PC0,200W    6.7dB 0.000dB/m omni.ant",
+            "wifi                0.398W"]
+        converters = dict(radiomobile.get_column_converters(radiomobile.SYSTEM_UNITS),
+            Loss=None)
+        rows = list(radiomobile.parse_table(lines, 
+            ["Name", "Pwr Tx", "Loss", "Loss (+)", "Ant. Type"], converters=converters))
+        self.assertEqual([
+            {"name": "Josjo 1 Sectorial PC", "pwr_tx": 0.2, "loss": "6.7dB",
+                "loss_(+)": 0.0, "ant_type": "omni.ant"},
+            {"name": "wifi", "pwr_tx": 0.398, "loss": "",
+                "loss_(+)": None, "ant_type": ""}], rows)
+        self.assertRaises(ValueError, radiomobile.find_columns, 
+            "Name  Loss", ["Loss", "Name"])
+
+    def test_unit_converters(self):
+        self.assertEqual(-107.0, radiomobile.get_dbm("-107,0dBm"))
+        self.assertEqual(10.0, radiomobile.get_watts("10,000W"))
+        self.assertEqual(2.5, radiomobile.get_meters("2.5 m"))
+        self.assertEqual(None, radiomobile.get_dbi(""))
+        self.assertRaises(ValueError, radiomobile.get_db, "-")
+        get_dbm = radiomobile.get_column_converters({"Rx thr.": "dBm"}, ",")["Rx thr."]
+        self.assertEqual(-107.0, get_dbm("-107,0dBm"))
+        get_rx_threshold = radiomobile.get_system_converters(".")["Rx thr."]
+        self.assertEqual([-93.0, -93.0, None],
+            map(get_rx_threshold, ["93.0dBm", "-93.0dBm", ""]))
+
+    def test_decimal_separator(self):
+        self.assertEqual(".", self.report.decimal_separator)
+        self.assertEqual(",", radiomobile.detect_decimal_separator(
+            ["Josjojauarina 1     09\xc2\xb019'11\"S 075\xc2\xb008'45\"W FI20KQ  280,0m"]))
+        self.assertEqual(None, radiomobile.detect_decimal_separator(["Name", ""]))
+
+    def test_system_params(self):
+        huira = self.report.systems["Huiracochan Troncal"]
+        self.assertAlmostEqual(23.0103, huira.tx_power, 4)
+
+    def test_net_properties(self):
+        net = self.report.nets['1. Josjo1AP - Josjo2']
+        self.assertEqual(("Cluster", (2400.0, 2483.0), "Vertical"),
+            (net.topology, net.frequency_range, net.polarization))
+        self.assertEqual((301.0, 0.005, 15.0, "Continental temperate"),
+            (net.refractivity, net.conductivity, net.permittivity, net.climate))
+        properties = radiomobile.parse_net_properties(["Topology Star",
+            "144,0 MHz to 148,0 MHz"], ",")
+        self.assertEqual(("Star", (144.0, 148.0), None), (properties["topology"],
+            properties["frequency_range"], properties["climate"]))
+
     def test_nets(self):
         nets = self.report.nets
         self.assertEqual(['1. Josjo1AP - Josjo2', '2. Josjo1 AP - Huiracochan, Ur'], nets.keys())
@@ -75,12 +144,35 @@ class RadioMobileReportTest(unittest.TestCase):
         
         member1 = net1.net_members["URPAY"]
         self.assertEqual("Terminal", member1.role)
-        self.assertEqual("5.0m", member1.antenna) 
+        self.assertEqual(5.0, member1.antenna) 
 
         member2 = net1.net_members["HUIRACOCHAN"]
-        self.assertEqual("12.0m", member2.antenna) 
+        self.assertEqual(12.0, member2.antenna) 
         self.assertEqual("Terminal", member2.role)
 
+    def test_get_net_matrices(self):
+        net1 = self.report.nets['2. Josjo1 AP - Huiracochan, Ur']
+        names, qualities, distances = \
+            radiomobile.get_net_matrices(net1, self.report.units)
+        self.assertEqual(['URPAY', 'HUIRACOCHAN', 'JOSJOJAHUARINA 1'], names)
+        self.assertEqual([[0, 0, 50], [0, 0, 50], [0, 0, 0]], qualities.tolist())
+        self.assertEqual(10756, distances[0, 2])
+        self.assertEqual(distances[0, 2], distances[2, 0])
+
+    def test_odict_delete(self):
+        units = self.report.units.copy()
+        del units["HUIRACOCHAN"]
+        units["HUIRACOCHAN"] = self.report.units["HUIRACOCHAN"]
+        self.assertEqual(['URPAY', 'JOSJOJAHUARINA 1', 'JOSJOJAHUARINA 2', 
+            'HUIRACOCHAN'], units.keys())
+        self.assertEqual(4, len(self.report.units))
+
+    def test_iter_report(self):
+        path = os.path.join(os.path.dirname(__file__), "radiomobile_report_test.txt")
+        keys = [key for (key, value) in radiomobile.iter_report(open(path))]
+        self.assertEqual(["generated_on", "general_information", "decimal_separator",
+            "units", "systems", "net", "net"], keys)
+
     def test_get_units_for_network(self):
         net2 = self.report.nets.values()[1]
         self.assertEqual(['JOSJOJAHUARINA 1'],
@@ -0,0 +1,58 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import shutil
+import tempfile
+import unittest
+
+import radiomobile
+import reportcache
+
+class ReportCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, "cache")
+        source = os.path.join(os.path.dirname(__file__), "radiomobile_report_test.txt")
+        self.filename = os.path.join(self.directory, "report.txt")
+        shutil.copy(source, self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_entries(self):
+        return sorted(os.listdir(self.cache_directory))
+
+    def test_parse_report(self):
+        report = reportcache.parse_report(self.filename, self.cache_directory)
+        entries = self.get_entries()
+        self.assertEqual(1, len(entries))
+        cached_report = reportcache.parse_report(self.filename, self.cache_directory)
+        self.assertEqual(entries, self.get_entries())
+        self.assertEqual(repr(report.nets), repr(cached_report.nets))
+        self.assertEqual(report.units.keys(), cached_report.units.keys())
+        self.assertEqual(report.generated_on, cached_report.generated_on)
+
+    def test_invalidation(self):
+        reportcache.parse_report(self.filename, self.cache_directory)
+        with open(self.filename, "a") as fd:
+            fd.write("\n")
+        reportcache.parse_report(self.filename, self.cache_directory)
+        self.assertEqual(2, len(self.get_entries()))
+
+    def test_corrupt_entry(self):
+        reportcache.parse_report(self.filename, self.cache_directory)
+        entry, = self.get_entries()
+        with open(os.path.join(self.cache_directory, entry), "w") as fd:
+            fd.write("garbage")
+        report = reportcache.parse_report(self.filename, self.cache_directory)
+        self.assertEqual(4, len(report.units))
+
+    def test_evict(self):
+        reportcache.parse_report(self.filename, self.cache_directory)
+        with open(self.filename, "a") as fd:
+            fd.write("\n")
+        reportcache.parse_report(self.filename, self.cache_directory, max_size=1)
+        self.assertEqual([], self.get_entries())
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import netfile
+import mapfile
+import siteplanner
+
+class SitePlannerTest(unittest.TestCase):
+    def setUp(self):
+        directory = os.path.join(os.path.dirname(__file__), "examples", "cusco-ne")
+        self.report = netfile.parse_net_file(os.path.join(directory, "cusco-ne.net"))
+        self.rmap = mapfile.open_map(os.path.join(directory, "cusco-ne.map"))
+        self.candidates = siteplanner.get_grid_candidates(self.report.units, 2000,
+            rmap=self.rmap)
+        self.system = self.report.systems["[WFb5.5]"]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def plan(self, **options):
+        return siteplanner.plan_sites(self.report, self.candidates, self.system,
+            rmap=self.rmap, directory=self.directory, **options)
+
+    def test_get_members(self):
+        terminals = siteplanner.get_members(self.report, siteplanner.TERMINAL_ROLES)
+        self.assertEqual(["Josjojauarina 2", "Ccatcca", "Kcauri", "Urpay",
+            "Huiracochan", "Urcos"], terminals.keys())
+        self.assertEqual(("[WXqk34]", 2.0), terminals["Ccatcca"])
+        nodes = siteplanner.get_members(self.report, siteplanner.NODE_ROLES)
+        self.assertEqual(["Josjojauarina 1", "Josjojauarina 2", "Huiracochan"],
+            nodes.keys())
+
+    def test_greedy_cover(self):
+        coverage = numpy.array([
+            [1, 1, 0, 0, 0],
+            [0, 0, 1, 1, 0],
+            [1, 1, 1, 0, 0],
+            [0, 0, 0, 1, 1],
+        ], dtype=bool)
+        weights = numpy.ones(coverage.shape)
+        chosen = siteplanner.get_greedy_cover(coverage, weights)
+        self.assertEqual([2, 3], chosen)
+        self.assertEqual([3], siteplanner.get_greedy_cover(coverage, weights,
+            [False, False, False, True]))
+        self.assertEqual([0, 3], siteplanner.remove_redundant_sets(coverage, [0, 1, 3],
+            numpy.array([0, 0, 1, 0, 0], dtype=bool)))
+
+    def test_plan_sites(self):
+        plan = self.plan(min_margin=20.0)
+        terminals = siteplanner.get_members(self.report, siteplanner.TERMINAL_ROLES)
+        self.assertEqual(sorted(terminals), sorted(plan.assignments.keys() + plan.uncovered))
+        self.assertTrue(plan.sites)
+        for name, (site, margin) in plan.assignments.iteritems():
+            self.assertTrue(margin >= 20.0)
+            self.assertTrue(site in plan.sites or name in plan.covered_by_nodes)
+        self.assertEqual(1, len(self.plan(min_margin=20.0, max_sites=1).sites))
+        self.assertEqual([], self.plan(min_margin=200.0).sites)
+
+    def test_cached_scores(self):
+        plan = self.plan(min_margin=20.0)
+        def _compute_rows(sites, heights):
+            raise AssertionError("Scores should be cached")
+        plan.cache.compute_rows = _compute_rows
+        plan2 = siteplanner.plan_sites(self.report, self.candidates, self.system,
+            min_margin=40.0, rmap=self.rmap, cache=plan.cache)
+        self.assertTrue(set(plan2.assignments).issubset(plan.assignments))
+        # Rows are saved to disk and reused by a new cache
+        self.assertEqual(1, len(os.listdir(self.directory)))
+        cache = siteplanner.LinkScoreCache(plan.cache.units, plan.cache.heights,
+            rmap=self.rmap, directory=self.directory)
+        self.assertEqual(len(plan.cache.rows), len(cache.rows))
+        # The disk key depends on the contents of the map, not its name
+        copy = os.path.join(self.directory, "copy.map")
+        shutil.copy(self.rmap.filename, copy)
+        cache = siteplanner.LinkScoreCache(plan.cache.units, plan.cache.heights,
+            rmap=mapfile.open_map(copy), directory=self.directory)
+        self.assertEqual(len(plan.cache.rows), len(cache.rows))
+
+    def test_cache_params(self):
+        plan = self.plan(min_margin=20.0)
+        self.assertRaises(ValueError, siteplanner.plan_sites, self.report,
+            self.candidates, self.system, frequency=5800.0, rmap=self.rmap,
+            cache=plan.cache)
+        self.assertRaises(ValueError, siteplanner.plan_sites, self.report,
+            self.candidates, self.system, cache=plan.cache)
+        self.assertRaises(ValueError, siteplanner.plan_sites, self.report,
+            self.candidates, self.system, rmap=self.rmap, cache=plan.cache,
+            samples=16)
+
+if __name__ == '__main__':
+    unittest.main()
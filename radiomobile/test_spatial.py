@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import random
+import unittest
+
+import radiomobile
+import spatial
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        filename = "radiomobile_report_test.txt"
+        path = os.path.join(os.path.dirname(__file__), filename)
+        self.report = radiomobile.parse_report(path)
+        random.seed(1)
+        self.points = [("P%d" % idx, (random.uniform(-10.0, -9.0),
+            random.uniform(-75.5, -74.5))) for idx in range(500)]
+
+    def brute_force(self, coords):
+        return sorted(((name, radiomobile.get_distance(coords, point))
+            for (name, point) in self.points), key=lambda (n, d): (d, n))
+
+    def test_units(self):
+        index = spatial.create_unit_index(self.report.units)
+        self.assertEqual(4, len(index))
+        origin = self.report.units["URPAY"].location_coords
+        self.assertEqual([('URPAY', 0), ('HUIRACOCHAN', 4740)],
+            index.nearest(origin, 2))
+        self.assertEqual(['URPAY', 'HUIRACOCHAN'],
+            [name for (name, distance) in index.within(origin, 10000)])
+
+    def test_within(self):
+        index = spatial.SpatialIndex(self.points, cell_size=0.05)
+        for coords in [(-9.5, -75.0), (-9.01, -74.51), (-12.0, -70.0)]:
+            expected = [(name, distance) for (name, distance) in
+                self.brute_force(coords) if distance <= 12000]
+            self.assertEqual(expected, index.within(coords, 12000))
+
+    def test_within_antimeridian(self):
+        points = [("W", (-17.0, 179.99)), ("E", (-17.0, -179.99)),
+            ("FAR", (-17.0, 179.5))]
+        index = spatial.SpatialIndex(points, cell_size=0.05)
+        for coords in [(-17.0, 179.995), (-17.0, -179.995)]:
+            self.assertEqual(["E", "W"],
+                sorted(name for (name, distance) in index.within(coords, 5000)))
+        self.assertEqual([(-180.0, 180.0)], spatial.get_lon_ranges(-200.0, 200.0))
+        self.assertEqual([(170.0, 180.0), (-180.0, -175.0)],
+            spatial.get_lon_ranges(170.0, 185.0))
+
+    def test_nearest(self):
+        index = spatial.SpatialIndex(self.points, cell_size=0.05)
+        for coords in [(-9.5, -75.0), (-9.01, -74.51), (-12.0, -70.0)]:
+            self.assertEqual(self.brute_force(coords)[:7], index.nearest(coords, 7))
+        self.assertEqual(500, len(index.nearest((-9.5, -75.0), 1000)))
+        self.assertEqual([], index.nearest((-9.5, -75.0), 0))
+        self.assertEqual([], index.nearest((-9.5, -75.0), -1))
+
+    def test_in_box(self):
+        index = spatial.SpatialIndex(self.points, cell_size=0.05)
+        bounds = ((-9.6, -75.2), (-9.4, -74.9))
+        expected = sorted(name for (name, (lat, lon)) in self.points
+            if -9.6 <= lat <= -9.4 and -75.2 <= lon <= -74.9)
+        self.assertTrue(expected)
+        self.assertEqual(expected, index.in_box(bounds))
+
+    def test_update(self):
+        index = spatial.SpatialIndex(self.points[:2])
+        index.move("P0", (-9.0, -74.0))
+        self.assertEqual((-9.0, -74.0), index["P0"])
+        self.assertEqual([("P0", 0)], index.within((-9.0, -74.0), 100))
+        index.remove("P0")
+        self.assertFalse("P0" in index)
+        self.assertEqual([], index.within((-9.0, -74.0), 100))
+        index.add("P2", (-9.0, -74.0))
+        self.assertEqual("P2", index.nearest((-9.01, -74.0))[0][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import radiomobile
+import synthetic
+
+class SyntheticTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def parse(self, **options):
+        path = os.path.join(self.directory, "report.txt")
+        synthetic.write_report(path, **options)
+        return radiomobile.parse_report(path)
+
+    def test_sizes(self):
+        report = self.parse(nunits=50, nsystems=5, nnets=8, members=12, seed=1)
+        self.assertEqual((50, 5, 8), 
+            (len(report.units), len(report.systems), len(report.nets)))
+        for net in report.nets.itervalues():
+            self.assertEqual(12, len(net.net_members))
+            self.assertEqual(11, len(net.links))
+            node = radiomobile.get_units_for_network(net, "Master")[0]
+            self.assertTrue(all(node in link.peers for link in net.links))
+            self.assertTrue(all(link.quality == net.max_quality for link in net.links))
+
+    def test_decimal_comma(self):
+        options = dict(nunits=20, nnets=4, members=5, seed=2)
+        report = self.parse(**options)
+        localized = self.parse(decimal_comma=True, **options)
+        self.assertEqual(map(repr, report.systems.values()),
+            map(repr, localized.systems.values()))
+        for name, unit in report.units.iteritems():
+            self.assertEqual((unit.location_coords, unit.elevation),
+                (localized.units[name].location_coords, localized.units[name].elevation))
+        for name, net in report.nets.iteritems():
+            self.assertEqual(map(repr, net.links), map(repr, localized.nets[name].links))
+
+    def test_localized_systems_format(self):
+        def _get_systems_shapes(lines):
+            lines = [line.rstrip("\r\n") for line in lines]
+            start = lines.index("Systems") + 4
+            end = lines.index(synthetic.SEPARATOR, start)
+            return set(tuple(re.sub(r"\d+", "0", value) for value in line[20:].split())
+                for line in lines[start:end] if line.strip())
+        filename = os.path.join("..", "ns-3", "example.report.txt")
+        with open(os.path.join(os.path.dirname(__file__), filename)) as fd:
+            expected = _get_systems_shapes(fd)
+        self.assertEqual(expected, _get_systems_shapes(synthetic.generate_report(
+            nunits=20, nnets=2, members=5, decimal_comma=True, seed=1)))
+        self.assertEqual([("0,0W", "0,0dB", "0,0dB/m", "-0,0dBm", "0,0dBi", "omni.ant")],
+            list(expected))
+
+    def test_invalid_members(self):
+        self.assertRaises(ValueError, synthetic.generate_report, nunits=10, members=11)
+        self.assertRaises(ValueError, synthetic.generate_report, nunits=200, members=100)
+
+if __name__ == '__main__':
+    unittest.main()